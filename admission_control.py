@@ -0,0 +1,346 @@
+import asyncio
+import json
+import math
+import secrets
+import sqlite3
+import threading
+import time
+
+from observability import annotate, span
+
+
+# ===============================
+# 🚦 ADMISSION CONTROL
+# ===============================
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted within the bounded wait"""
+
+    def __init__(self, message: str, scope: str, retry_after: float):
+        super().__init__(message)
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class MemoryAdmissionStore:
+    """Token buckets and connection slots for this process only"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._buckets = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> float:
+        """Take cost tokens from the bucket; 0 when taken, else seconds until they will be available.
+
+        A cost above the burst is taken once the bucket is full and leaves it in debt.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            needed = min(cost, burst)
+            if tokens >= needed:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (needed - tokens) / rate
+
+    async def acquire(self, key: str, limit: int, holder: str, lease: float) -> bool:
+        """Take one of key's limit slots for holder; a slot not released within lease seconds is reclaimed"""
+        now = time.monotonic()
+        with self._lock:
+            holders = self._slots.setdefault(key, {})
+            for expired in [h for h, deadline in holders.items() if deadline <= now]:
+                del holders[expired]
+            if len(holders) >= limit:
+                return False
+            holders[holder] = now + lease
+            return True
+
+    async def release(self, key: str, holder: str):
+        with self._lock:
+            holders = self._slots.get(key)
+            if holders is not None:
+                holders.pop(holder, None)
+                if not holders:
+                    del self._slots[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tracked_buckets": len(self._buckets),
+                "slots_held": sum(len(holders) for holders in self._slots.values()),
+            }
+
+
+class SQLiteAdmissionStore:
+    """Token buckets and connection slots in a SQLite file, shared by every worker process on the host.
+
+    A local stand-in for a networked store: any object with the same async take/acquire/release
+    methods can replace it. Each call is one short IMMEDIATE transaction on a worker thread.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS admission_buckets ("
+                "bucket_key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS admission_slots ("
+                "slot_key TEXT NOT NULL, holder TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (slot_key, holder))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _transaction(self, fn, *args):
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(db, *args)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return result
+
+    @staticmethod
+    def _take(db, key, rate, burst, cost):
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        now = time.time()
+        row = db.execute("SELECT tokens, updated_at FROM admission_buckets WHERE bucket_key = ?", (key,)).fetchone()
+        tokens, updated = row if row else (burst, now)
+        tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+        needed = min(cost, burst)  # see MemoryAdmissionStore.take
+        wait = 0.0
+        if tokens >= needed:
+            tokens -= cost
+        else:
+            wait = (needed - tokens) / rate
+        db.execute("INSERT OR REPLACE INTO admission_buckets VALUES (?, ?, ?)", (key, tokens, now))
+        return wait
+
+    @staticmethod
+    def _acquire(db, key, limit, holder, lease):
+        now = time.time()
+        db.execute("DELETE FROM admission_slots WHERE slot_key = ? AND expires_at <= ?", (key, now))
+        held = db.execute("SELECT COUNT(*) FROM admission_slots WHERE slot_key = ?", (key,)).fetchone()[0]
+        if held >= limit:
+            return False
+        db.execute("INSERT INTO admission_slots VALUES (?, ?, ?)", (key, holder, now + lease))
+        return True
+
+    @staticmethod
+    def _release(db, key, holder):
+        db.execute("DELETE FROM admission_slots WHERE slot_key = ? AND holder = ?", (key, holder))
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> float:
+        return await asyncio.to_thread(self._transaction, self._take, key, rate, burst, cost)
+
+    async def acquire(self, key: str, limit: int, holder: str, lease: float) -> bool:
+        return await asyncio.to_thread(self._transaction, self._acquire, key, limit, holder, lease)
+
+    async def release(self, key: str, holder: str):
+        await asyncio.to_thread(self._transaction, self._release, key, holder)
+
+    def stats(self) -> dict:
+        db = sqlite3.connect(self.path, timeout=5)
+        try:
+            return {
+                "path": self.path,
+                "tracked_buckets": db.execute("SELECT COUNT(*) FROM admission_buckets").fetchone()[0],
+                "slots_held": db.execute(
+                    "SELECT COUNT(*) FROM admission_slots WHERE expires_at > ?", (time.time(),)
+                ).fetchone()[0],
+            }
+        finally:
+            db.close()
+
+
+class AdmissionController:
+    """Per-user token buckets and per-connection concurrency slots, waited on for at most max_wait seconds.
+
+    buckets maps a bucket name ("llm", "sql") to (tokens per minute, burst); a rate of 0 turns that
+    bucket off, as does a connection_limit of 0 for slots. Slots released by this process wake local
+    waiters at once; slots freed by other processes sharing the store are noticed by polling.
+    """
+
+    def __init__(self, store, buckets: dict, connection_limit=10, max_wait=2.0,
+                 slot_lease=900.0, poll_interval=0.05, rejected_metric=None):
+        self.store = store
+        self.buckets = {name: limits for name, limits in buckets.items() if limits[0] > 0}
+        self.connection_limit = connection_limit
+        self.max_wait = max_wait
+        self.slot_lease = slot_lease
+        self.poll_interval = poll_interval
+        self.rejected_metric = rejected_metric
+        self._released = {}
+        self.admitted = 0
+        self.waited = 0
+        self.rejected = {"user": 0, "connection": 0}
+
+    def _reject(self, scope: str, message: str, retry_after: float):
+        self.rejected[scope] += 1
+        if self.rejected_metric is not None:
+            self.rejected_metric.inc(1, scope)
+        annotate(admission=f"rejected:{scope}")
+        raise AdmissionRejected(message, scope, retry_after)
+
+    async def _take_tokens(self, identity: str, bucket: str, cost: float, deadline: float) -> bool:
+        per_minute, burst = self.buckets[bucket]
+        rate = per_minute / 60
+        waited = False
+        while True:
+            wait = await self.store.take(f"{bucket}:{identity}", rate, burst, cost)
+            if wait <= 0:
+                return waited
+            if time.monotonic() + wait > deadline:
+                self._reject("user", f"Rate limit exceeded for {bucket} requests. Please slow down.", wait)
+            waited = True
+            await asyncio.sleep(wait)
+
+    async def _acquire_slot(self, connection: str, holder: str, deadline: float) -> bool:
+        waited = False
+        while not await self.store.acquire(connection, self.connection_limit, holder, self.slot_lease):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._reject(
+                    "connection", "Too many queries are running against this database. Please try again shortly.",
+                    max(self.max_wait, 1.0),
+                )
+            waited = True
+            released = self._released.setdefault(connection, asyncio.Event())
+            try:
+                await asyncio.wait_for(released.wait(), min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+        return waited
+
+    async def admit(self, identity: str, bucket=None, cost: float = 1, connection=None):
+        """Wait for the identity's tokens and a slot on connection; returns the slot to release, or None.
+
+        Raises AdmissionRejected when either cannot be had within max_wait.
+        """
+        deadline = time.monotonic() + self.max_wait
+        waited = False
+        with span("admission"):
+            if bucket in self.buckets:
+                waited = await self._take_tokens(identity, bucket, cost, deadline)
+            slot = None
+            if connection is not None and self.connection_limit > 0:
+                holder = secrets.token_hex(8)
+                waited = await self._acquire_slot(connection, holder, deadline) or waited
+                slot = (connection, holder)
+        self.admitted += 1
+        if waited:
+            self.waited += 1
+            annotate(admission="waited")
+        return slot
+
+    async def release(self, slot):
+        if slot is None:
+            return
+        connection, holder = slot
+        await self.store.release(connection, holder)
+        released = self._released.pop(connection, None)
+        if released is not None:
+            released.set()
+
+    def stats(self) -> dict:
+        return {
+            "store": self.store.name,
+            "buckets": {name: {"per_minute": rate, "burst": burst} for name, (rate, burst) in self.buckets.items()},
+            "connection_limit": self.connection_limit,
+            "max_wait": self.max_wait,
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "rejected": dict(self.rejected),
+            **self.store.stats(),
+        }
+
+
+# ===============================
+# 🧱 ADMISSION MIDDLEWARE
+# ===============================
+class AdmissionMiddleware:
+    """ASGI middleware admitting requests to the configured paths before they reach their endpoint.
+
+    classify(path, body) returns (bucket, cost, connection) for a request and identify(scope) the
+    caller's identity. The connection slot is held until the response
+    has been sent in full, so streamed results count for as long as they run. Rejections are a
+    429 with Retry-After.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths, identify, classify):
+        self.app = app
+        self.controller = controller
+        self.paths = set(paths)
+        self.identify = identify
+        self.classify = classify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        # Read the JSON body once and replay it to the endpoint; later receives (disconnects) pass through
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                await self.app(scope, receive, send)
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        raw = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": raw, "more_body": False}
+            return await receive()
+
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        bucket, cost, connection = self.classify(scope["path"], body if isinstance(body, dict) else {})
+        try:
+            slot = await self.controller.admit(await self.identify(scope), bucket, cost, connection)
+        except AdmissionRejected as e:
+            await self._too_many_requests(send, e)
+            return
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            await self.controller.release(slot)
+
+    @staticmethod
+    async def _too_many_requests(send, e: AdmissionRejected):
+        content = json.dumps({"error": str(e), "limit": e.scope}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(content)).encode("latin-1")),
+                (b"retry-after", str(math.ceil(e.retry_after)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": content})
@@ -1,24 +1,61 @@
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response, JSONResponse, FileResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq, APITimeoutError, RateLimitError
 import os
+import asyncio
+import functools
+import random
+import time
+import hashlib
+import logging
+import re
+import tempfile
 from urllib.parse import quote_plus
 import jwt
-import bcrypt
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from engine_registry import EngineRegistry, connection_key, connection_scope, database_key, is_connection_error
+from schema_cache import SchemaCache, INTROSPECTION_BACKENDS
+from schema_pruning import prune_schema
+from sql_cache import GeneratedSQLCache
+from example_store import ExampleStore, example_scope
+from result_formats import (
+    ndjson_header, ndjson_rows, ndjson_footer, ndjson_error, dumps, sse_event, SSE_MEDIA_TYPE,
+    column_types, columnar_payload, arrow_schema, arrow_batch, ARROW_EOS, ARROW_MEDIA_TYPE,
+    EXPORT_ENCODERS, GzipCSVEncoder, ParquetEncoder,
+)
+import result_formats
+from pagination import clamp_limit, paginate_sql, encode_page_token, decode_page_token
+from result_cache import ResultCache
+from query_control import QueryCancelled, QueryHandle, clamp_timeout, add_execution_time_hint, kill_query
+from password_hashing import PasswordHasher, PasswordPoolBusy
+from auth_database import AuthDatabase, AUTH_STATEMENTS
+from auth_cache import TTLCache, token_key
+from sql_stream import StatementDetector
+from sql_guard import SQLValidationError, validate_sql, estimate_scanned_rows
+from single_flight import SingleFlight
+from query_jobs import JobManager, JobQueueFull, JobCancelled, ARROW_FILE_MEDIA_TYPE
+from admission_control import AdmissionController, AdmissionMiddleware, MemoryAdmissionStore, SQLiteAdmissionStore
+from observability import MetricsRegistry, TimingMiddleware, configure_logging, log_event, span, annotate
 
 # ===============================
 # 🌍 Load environment variables
 # ===============================
 load_dotenv()
 
+# Leveled logger (LOG_LEVEL=DEBUG|INFO|WARNING|ERROR|OFF)
+logger = configure_logging(os.getenv("LOG_LEVEL", "INFO"))
+
 # Groq client + model
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+client = AsyncGroq(api_key=GROQ_API_KEY, timeout=LLM_TIMEOUT_SECONDS) if GROQ_API_KEY else None
 
 # JWT configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
@@ -28,7 +65,223 @@ JWT_EXPIRATION_HOURS = 24
 # HTTP Bearer security
 security = HTTPBearer()
 
-app = FastAPI(title="Ask-Lytics Backend", version="1.0")
+# Verified JWT payloads (never kept past the token's exp) and /auth/me profiles
+token_cache = TTLCache(
+    max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000")),
+    ttl=int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300")),
+)
+profile_cache = TTLCache(
+    max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000")),
+    ttl=int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60")),
+)
+
+# bcrypt runs on its own bounded pool; requests beyond workers + queue get a 503
+password_hasher = PasswordHasher(
+    rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 4))),
+    max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64")),
+    mode=os.getenv("PASSWORD_HASH_POOL", "thread"),
+)
+
+# Pooled engines for user-supplied connections (one pool per connection identity)
+engine_registry = EngineRegistry(
+    max_size=int(os.getenv("ENGINE_REGISTRY_MAX_SIZE", "16")),
+    idle_ttl=int(os.getenv("ENGINE_IDLE_TTL_SECONDS", "600")),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+)
+
+# Introspected schema per database, revalidated by fingerprint after the TTL
+schema_cache = SchemaCache(
+    ttl=int(os.getenv("SCHEMA_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.getenv("SCHEMA_CACHE_MAX_ENTRIES", "64")),
+    loader=INTROSPECTION_BACKENDS[os.getenv("SCHEMA_INTROSPECTION", "bulk")],
+)
+
+# Schema pruning: only the most relevant tables (plus FK neighbours) go into the prompt
+SCHEMA_PRUNING = os.getenv("SCHEMA_PRUNING", "true").lower() == "true"
+SCHEMA_PRUNE_TOP_K = int(os.getenv("SCHEMA_PRUNE_TOP_K", "8"))
+SCHEMA_PROMPT_TOKEN_BUDGET = int(os.getenv("SCHEMA_PROMPT_TOKEN_BUDGET", "2000"))
+
+# Generated SQL per (database, question, schema fingerprint, model, prompt version)
+sql_cache = GeneratedSQLCache(
+    max_entries=int(os.getenv("SQL_CACHE_MAX_ENTRIES", "1000")),
+    db_path=os.getenv("SQL_CACHE_PATH", ""),
+)
+
+# Verified (question, SQL) pairs per database, retrieved as few-shot examples for the prompt
+FEW_SHOT_TOP_K = int(os.getenv("FEW_SHOT_TOP_K", "3"))
+example_store = ExampleStore(
+    max_per_scope=int(os.getenv("FEW_SHOT_MAX_PER_DATABASE", "500")),
+    db_path=os.getenv("FEW_SHOT_PATH", ""),
+)
+
+# Background query jobs: bounded workers, results spilled to disk and deleted after the TTL
+job_manager = JobManager(
+    spill_dir=os.getenv("JOB_SPILL_DIR") or os.path.join(tempfile.gettempdir(), "asklytics-jobs"),
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("JOB_MAX_QUEUED", "100")),
+    ttl=float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600")),
+    spill_format=os.getenv("JOB_SPILL_FORMAT", "auto").lower(),
+)
+
+# Blocking SQLAlchemy/PyMySQL work runs here so it never stalls the event loop
+db_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_WORKER_THREADS", "32")), thread_name_prefix="db"
+)
+
+# One pooled engine for the users table, created in lifespan and disposed at shutdown
+auth_db = AuthDatabase(
+    url=(
+        f"mysql+pymysql://{os.getenv('DB_USER', 'root')}:{quote_plus(os.getenv('DB_PASSWORD', ''))}"
+        f"@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'classicmodels')}"
+    ),
+    pool_size=int(os.getenv("AUTH_DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("AUTH_DB_MAX_OVERFLOW", "20")),
+    pool_timeout=int(os.getenv("AUTH_DB_POOL_TIMEOUT_SECONDS", "10")),
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+)
+
+# Auth queries get their own threads (one per pooled connection) so slow user queries cannot starve them
+auth_executor = ThreadPoolExecutor(
+    max_workers=auth_db.pool_size + auth_db.max_overflow, thread_name_prefix="auth-db"
+)
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run blocking database work on the bounded DB thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_auth_db(fn, *args, **kwargs):
+    """Run blocking auth database work on the auth thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(auth_executor, functools.partial(fn, *args, **kwargs))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    auth_db.start()
+    job_manager.start()
+    yield
+    await job_manager.shutdown()
+    sql_cache.close()
+    example_store.close()
+    db_executor.shutdown(wait=False, cancel_futures=True)
+    auth_executor.shutdown(wait=False, cancel_futures=True)
+    password_hasher.shutdown()
+    engine_registry.dispose_all()
+    auth_db.dispose()
+
+
+app = FastAPI(title="Ask-Lytics Backend", version="1.0", lifespan=lifespan)
+
+# ===============================
+# 📈 METRICS
+# ===============================
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram(
+    "asklytics_request_duration_seconds", "End-to-end request latency", ["endpoint", "method", "status"]
+)
+PHASE_SECONDS = metrics.histogram(
+    "asklytics_phase_duration_seconds", "Time spent per request phase", ["endpoint", "phase"]
+)
+LLM_TOKENS = metrics.counter("asklytics_llm_tokens_total", "Tokens billed by the LLM", ["kind"])
+COALESCED = metrics.counter(
+    "asklytics_coalesced_requests_total", "Requests that shared an identical in-flight call", ["operation"]
+)
+
+ADMISSION_REJECTED = metrics.counter(
+    "asklytics_admission_rejected_total", "Requests refused with 429 by admission control", ["scope"]
+)
+
+# Identical concurrent schema loads, LLM generations and reads share one in-flight call
+single_flight = SingleFlight(coalesced_metric=COALESCED)
+
+# ===============================
+# 🚦 ADMISSION CONTROL
+# ===============================
+# Limits live in this process (memory) or in a SQLite file shared by every worker on the host (sqlite)
+if os.getenv("ADMISSION_STORE", "memory").lower() == "sqlite":
+    admission_store = SQLiteAdmissionStore(
+        os.getenv("ADMISSION_STORE_PATH") or os.path.join(tempfile.gettempdir(), "asklytics-admission.sqlite3")
+    )
+else:
+    admission_store = MemoryAdmissionStore()
+
+# Token buckets per user (tokens per minute, burst) and a cap on in-flight requests per target database
+admission = AdmissionController(
+    store=admission_store,
+    buckets={
+        "llm": (float(os.getenv("RATE_LIMIT_LLM_PER_MINUTE", "30")), float(os.getenv("RATE_LIMIT_LLM_BURST", "10"))),
+        "sql": (float(os.getenv("RATE_LIMIT_SQL_PER_MINUTE", "120")), float(os.getenv("RATE_LIMIT_SQL_BURST", "30"))),
+    },
+    connection_limit=int(os.getenv("CONNECTION_MAX_CONCURRENT", "10")),
+    max_wait=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "2")),
+    rejected_metric=ADMISSION_REJECTED,
+)
+
+# Which bucket each admitted endpoint draws from
+ADMISSION_BUCKETS = {
+    "/query": "llm", "/query/stream": "llm", "/query/batch": "llm",
+    "/execute-sql": "sql", "/export": "sql", "/jobs": "sql",
+}
+
+
+async def admission_identity(scope) -> str:
+    """The JWT user when the request carries a valid bearer token, otherwise the client address"""
+    request = Request(scope)
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = await verify_jwt_token(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+        except HTTPException:
+            payload = {}
+        if payload.get("user_id") is not None:
+            return f"user:{payload['user_id']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def admission_request(path: str, body: dict) -> tuple:
+    """(bucket, cost, connection) for an admitted request"""
+    bucket = ADMISSION_BUCKETS[path]
+    cost = 1
+    if path == "/query/batch" and isinstance(body.get("prompts"), list):
+        cost = max(1, len(body["prompts"]))
+    # A later page re-runs stored SQL without the LLM, but only these endpoints honour page tokens
+    if path in ("/query", "/execute-sql") and body.get("page_token"):
+        try:
+            decode_page_token(JWT_SECRET, body["page_token"])
+            bucket = "sql"
+        except ValueError:
+            pass
+    if path == "/jobs" and not body.get("sql"):
+        bucket = "llm"
+    conn_info = body.get("connection")
+    connection = None
+    # Jobs hold no connection slot: JOB_WORKERS already bounds how many run at once
+    if path != "/jobs" and isinstance(conn_info, dict) and conn_info:
+        # An opaque id, since a shared admission store writes slot keys to disk
+        connection = connection_scope(conn_info, JWT_SECRET)
+    return bucket, cost, connection
+
+
+app.add_middleware(
+    AdmissionMiddleware, controller=admission, paths=ADMISSION_BUCKETS,
+    identify=admission_identity, classify=admission_request,
+)
+app.add_middleware(TimingMiddleware, requests=REQUEST_SECONDS, phases=PHASE_SECONDS, logger=logger)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
 
 # ===============================
 # ⚙️ CORS SETTINGS
@@ -53,7 +306,19 @@ async def health_check():
         "service": "Ask-Lytics Backend",
         "version": "1.0",
         "model": GROQ_MODEL,
-        "groq_configured": bool(GROQ_API_KEY)
+        "groq_configured": bool(GROQ_API_KEY),
+        "engines": engine_registry.stats(),
+        "schema_cache": schema_cache.stats(),
+        "sql_cache": sql_cache.stats(),
+        "few_shot": example_store.stats(),
+        "result_cache": result_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "auth_db": auth_db.stats(),
+        "token_cache": token_cache.stats(),
+        "profile_cache": profile_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "jobs": job_manager.stats(),
+        "admission": admission.stats()
     }
 
 @app.post("/test-connection")
@@ -62,23 +327,14 @@ async def test_connection(request: Request):
     body = await request.json()
     conn_info = body.get("connection", {})
     
-    required_fields = ["host", "port", "user", "password", "database"]
-    missing = []
-    for f in required_fields:
-        val = conn_info.get(f)
-        if f == "password":
-            if val is None:
-                missing.append(f)
-        else:
-            if not val:
-                missing.append(f)
+    missing = missing_connection_fields(conn_info)
     if missing:
         return {"error": f"Missing fields: {', '.join(missing)}"}
     
     try:
         engine = create_dynamic_engine(conn_info)
-        with engine.connect() as test_conn:
-            test_conn.execute(text("SELECT 1"))
+        with span("connection_test"):
+            await run_db(ping_engine, engine)
         return {"success": True, "message": "Database connection successful!"}
     except Exception as e:
         return {"success": False, "error": f"Connection failed: {str(e)}"}
@@ -89,38 +345,34 @@ async def get_schema(request: Request):
     body = await request.json()
     conn_info = body.get("connection", {})
     
-    required_fields = ["host", "port", "user", "password", "database"]
-    missing = []
-    for f in required_fields:
-        val = conn_info.get(f)
-        if f == "password":
-            if val is None:
-                missing.append(f)
-        else:
-            if not val:
-                missing.append(f)
+    missing = missing_connection_fields(conn_info)
     if missing:
         return {"error": f"Missing fields: {', '.join(missing)}"}
     
     try:
         engine = create_dynamic_engine(conn_info)
-        schema_info = []
-        
-        with engine.begin() as conn:
-            # Get all tables
-            tables_result = conn.execute(text("SHOW TABLES"))
-            tables = [row[0] for row in tables_result]
-            
-            # Get detailed schema for each table
-            for table in tables:
-                rows = conn.execute(text(f"DESCRIBE {table}")).fetchall()
-                columns = [{"name": row[0], "type": row[1], "nullable": row[2], "key": row[3]} for row in rows]
-                schema_info.append({"table": table, "columns": columns})
+        cached_schema = await load_schema(conn_info, engine)
+        schema_info = cached_schema["schema"]
         
         return {"schema": schema_info, "tableCount": len(schema_info)}
     except Exception as e:
         return {"error": f"Failed to fetch schema: {str(e)}"}
 
+@app.post("/schema/refresh")
+async def refresh_schema(request: Request):
+    """Invalidate the cached schema so the next request re-introspects"""
+    body = await request.json()
+    conn_info = body.get("connection", {})
+    
+    missing = missing_connection_fields(conn_info)
+    if missing:
+        return {"error": f"Missing fields: {', '.join(missing)}"}
+    
+    invalidated = schema_cache.invalidate(connection_key(conn_info))
+    # SQL generated against the old schema must not outlive it
+    sql_cache.invalidate_scope(connection_scope(conn_info, JWT_SECRET))
+    return {"success": True, "invalidated": invalidated}
+
 @app.post("/execute-sql")
 async def execute_sql(request: Request):
     """Execute raw SQL query directly"""
@@ -128,12 +380,71 @@ async def execute_sql(request: Request):
     sql = body.get("sql", "")
     conn_info = body.get("connection", {})
     
+    try:
+        page = page_request(body)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    if page["sql"]:
+        sql = page["sql"]
+    
     if not sql or not sql.strip():
         return {"error": "SQL query is required"}
     
-    required_fields = ["host", "port", "user", "password", "database"]
+    missing = missing_connection_fields(conn_info)
+    if missing:
+        return {"error": f"Missing fields: {', '.join(missing)}"}
+    
+    try:
+        engine = create_dynamic_engine(conn_info)
+        
+        scope = "|".join(connection_key(conn_info))
+        database = database_key(conn_info)
+        timeout = clamp_timeout(body.get("timeout"), QUERY_TIMEOUT_SECONDS, MAX_QUERY_TIMEOUT_SECONDS)
+        
+        # Opt-in cache for repeated reads (dashboards polling the same SELECT)
+        cache_key = result_cache_key(request, body, scope, sql, page)
+        if cache_key:
+            hit = result_cache.get(cache_key)
+            if hit:
+                return cached_json_response(hit[0], "HIT", hit[1])
+        
+        encoded = await encoded_read_response(request, body, engine, sql, page, timeout)
+        if encoded is not None:
+            if cache_key and isinstance(encoded, Response):
+                return store_cached_result(cache_key, database, sql, encoded.body, body)
+            return encoded
+        
+        result = await run_shared(
+            request, engine, timeout, run_statement,
+            engine, add_execution_time_hint(sql, timeout), page["limit"], page["offset"],
+        )
+        if "data" in result:
+            rows = result["data"]
+            payload = {
+                "sql": sql, "data": rows, "rowCount": len(rows),
+                **page_fields(sql, page, len(rows), result["truncated"]),
+            }
+            with span("serialize"):
+                content = dumps(payload).encode("utf-8")
+            if cache_key:
+                return store_cached_result(cache_key, database, sql, content, body)
+            return Response(content, media_type="application/json")
+        else:
+            result_cache.invalidate_for_write(database, sql)
+            return {"sql": sql, "message": f"{result['rowcount']} rows affected.", "rowCount": result["rowcount"]}
+    except QueryCancelled as e:
+        return {"error": str(e), "cancelled": e.reason}
+    except Exception as e:
+        return {"error": f"SQL execution failed: {str(e)}"}
+
+
+# ===============================
+# 🗄️ DYNAMIC DATABASE ENGINE
+# ===============================
+def missing_connection_fields(conn_info: dict) -> list:
+    """Return the required connection fields that are absent (empty password is allowed)"""
     missing = []
-    for f in required_fields:
+    for f in ["host", "port", "user", "password", "database"]:
         val = conn_info.get(f)
         if f == "password":
             if val is None:
@@ -141,180 +452,1199 @@ async def execute_sql(request: Request):
         else:
             if not val:
                 missing.append(f)
-    if missing:
-        return {"error": f"Missing fields: {', '.join(missing)}"}
-    
+    return missing
+
+def create_dynamic_engine(conn):
+    """Return the pooled engine for this connection (shared across requests)"""
     try:
-        engine = create_dynamic_engine(conn_info)
-        
+        with span("engine_acquire"):
+            return engine_registry.get(conn)
+    except Exception as e:
+        raise ValueError(f"Invalid connection: {e}")
+
+
+async def load_schema(conn_info: dict, engine) -> dict:
+    """schema_cache.get off the event loop, shared by concurrent requests for the same database"""
+    key = connection_key(conn_info)
+    with span("schema"):
+        return await single_flight.do("schema", key, lambda _: run_db(schema_cache.get, key, engine))
+
+
+def connection_failed(e: Exception) -> dict:
+    return {"error": f"Database connection failed: {str(e)}. Please check your credentials."}
+
+
+def ping_engine(engine):
+    """Round trip to the server to prove the credentials work"""
+    with engine.connect() as test_conn:
+        test_conn.execute(text("SELECT 1"))
+
+
+def is_read_statement(sql: str) -> bool:
+    return sql.strip().upper().startswith(("SELECT", "SHOW"))
+
+
+def fetch_page(conn, sql: str, limit: int, offset: int = 0):
+    """Fetch at most `limit` rows starting at `offset`, plus one look-ahead row to detect truncation.
+
+    SELECTs get a LIMIT/OFFSET pushed into the SQL; anything else (SHOW, FOR UPDATE, ...)
+    runs on a server-side cursor that is skipped forward and abandoned early.
+    Returns (result, rows, truncated, drained).
+    """
+    paged_sql, rewritten = paginate_sql(sql, limit + 1, offset)
+    result = conn.execution_options(stream_results=not rewritten).execute(text(paged_sql))
+    if not rewritten:
+        skipped = 0
+        while skipped < offset:
+            chunk = result.fetchmany(min(STREAM_BATCH_SIZE, offset - skipped))
+            if not chunk:
+                break
+            skipped += len(chunk)
+    rows = result.fetchmany(limit + 1)
+    truncated = len(rows) > limit
+    return result, rows[:limit], truncated, rewritten or not truncated
+
+
+def run_statement(engine, sql: str, limit=None, offset: int = 0, handle=None) -> dict:
+    """Execute one statement: {"data", "truncated"} for reads (capped at limit), {"rowcount"} for writes"""
+    if not is_read_statement(sql):
         with engine.begin() as conn:
+            if handle:
+                handle.attach(conn)
             result = conn.execute(text(sql))
-            if sql.strip().upper().startswith("SELECT") or sql.strip().upper().startswith("SHOW"):
-                rows = [dict(row._mapping) for row in result]
-                return {"sql": sql, "data": rows, "rowCount": len(rows)}
-            else:
-                return {"sql": sql, "message": f"{result.rowcount} rows affected.", "rowCount": result.rowcount}
+            return {"rowcount": result.rowcount}
+
+    with engine.connect() as conn:
+        if handle:
+            handle.attach(conn)
+        if limit is None:
+            result = conn.execute(text(sql))
+            return {"data": [dict(row._mapping) for row in result], "truncated": False}
+        result, rows, truncated, drained = fetch_page(conn, sql, limit, offset)
+        if not drained:
+            # Don't let close() drain the rest of an unbounded server-side cursor
+            conn.invalidate()
+        return {"data": [dict(row._mapping) for row in rows], "truncated": truncated}
+
+
+# ===============================
+# 📄 ROW LIMITS & PAGINATION
+# ===============================
+DEFAULT_ROW_LIMIT = int(os.getenv("DEFAULT_ROW_LIMIT", "1000"))
+MAX_ROW_LIMIT = int(os.getenv("MAX_ROW_LIMIT", "10000"))
+PAGE_TOKEN_TTL_MINUTES = int(os.getenv("PAGE_TOKEN_TTL_MINUTES", "60"))
+
+
+def page_request(body: dict) -> dict:
+    """Resolve {sql, limit, offset} from the body; a page_token supplies the SQL and position"""
+    token = body.get("page_token")
+    if token:
+        page = decode_page_token(JWT_SECRET, token)
+        limit = clamp_limit(body.get("limit", page["limit"]), DEFAULT_ROW_LIMIT, MAX_ROW_LIMIT)
+        return {"sql": page["sql"], "limit": limit, "offset": page["offset"]}
+    limit = clamp_limit(body.get("limit"), DEFAULT_ROW_LIMIT, MAX_ROW_LIMIT)
+    return {"sql": None, "limit": limit, "offset": 0}
+
+
+def page_fields(sql: str, page: dict, row_count: int, truncated: bool) -> dict:
+    """Response fields telling the client whether there is more and how to fetch it"""
+    next_token = None
+    if truncated:
+        next_token = encode_page_token(
+            JWT_SECRET, sql, page["offset"] + row_count, page["limit"], PAGE_TOKEN_TTL_MINUTES
+        )
+    return {"offset": page["offset"], "limit": page["limit"], "truncated": truncated, "nextPageToken": next_token}
+
+
+# ===============================
+# ⏱️ QUERY TIMEOUTS & CANCELLATION
+# ===============================
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+MAX_QUERY_TIMEOUT_SECONDS = float(os.getenv("MAX_QUERY_TIMEOUT_SECONDS", "300"))
+DISCONNECT_POLL_SECONDS = 0.5
+KILL_GRACE_SECONDS = 5
+
+
+async def run_with_deadline(request, engine, timeout: float, fn, *args, **kwargs):
+    """Run blocking DB work under a deadline; KILL QUERY on timeout or client disconnect.
+
+    fn must accept a handle= keyword and attach it to the connection it executes on.
+    """
+    handle = QueryHandle()
+    task = asyncio.ensure_future(run_db(fn, *args, handle=handle, **kwargs))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    reason = None
+    with span("execute"):
+        while reason is None:
+            remaining = deadline - loop.time()
+            done, _ = await asyncio.wait({task}, timeout=max(0, min(DISCONNECT_POLL_SECONDS, remaining)))
+            if done:
+                return task.result()
+            if loop.time() >= deadline:
+                reason = "timeout"
+            elif request is not None and await request.is_disconnected():
+                reason = "disconnect"
+
+    try:
+        # Off the DB pool, whose threads may all be busy with the statements being killed
+        await asyncio.to_thread(handle.cancel, engine, reason, timeout)
     except Exception as e:
-        return {"error": f"SQL execution failed: {str(e)}"}
+        logger.warning("Could not kill query on thread %s: %s", handle.thread_id, e)
+    if handle.thread_id is None:
+        # Still queued for a DB thread: drop it, or attach refuses to start it if it is past that
+        task.cancel()
+    else:
+        # Let the worker unwind so its connection is back in the pool before we answer
+        await asyncio.wait({task}, timeout=KILL_GRACE_SECONDS)
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    raise QueryCancelled(reason, timeout)
+
+
+async def run_shared(request, engine, timeout: float, fn, engine_arg, sql: str, *args):
+    """run_with_deadline(fn(engine, sql, ...)) where identical concurrent reads share one execution.
+
+    Writes always run on their own. A shared read is killed at the deadline, or for a disconnect
+    only once every client waiting on it has gone.
+    """
+    if not is_read_statement(sql):
+        return await run_with_deadline(request, engine, timeout, fn, engine_arg, sql, *args)
+    return await single_flight.do(
+        "execute", (fn.__name__, engine_arg, sql, *args),
+        lambda flight: run_with_deadline(flight, engine, timeout, fn, engine_arg, sql, *args),
+        client=request,
+    )
 
 
 # ===============================
-# 🗄️ DYNAMIC DATABASE ENGINE
+# 🗃️ READ-ONLY RESULT CACHE
 # ===============================
-def create_dynamic_engine(conn):
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "30"))
+RESULT_CACHE_MAX_TTL_SECONDS = float(os.getenv("RESULT_CACHE_MAX_TTL_SECONDS", "3600"))
+
+result_cache = ResultCache(
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    default_ttl=RESULT_CACHE_TTL_SECONDS,
+)
+
+
+def result_cache_key(request: Request, body: dict, scope: str, sql: str, page: dict):
+    """Cache key for an opted-in ({"cache": true} or {"cache": <ttl seconds>}) buffered read, else None"""
+    result_format = body.get("format", "rows")
+    if not body.get("cache") or not is_read_statement(sql):
+        return None
+    if result_format not in ("rows", "columnar") or wants_stream(request, body):
+        return None
+    params = {"format": result_format, "limit": page["limit"], "offset": page["offset"]}
+    return result_cache.make_key(scope, sql, params)
+
+
+def cached_json_response(content: bytes, status: str, age: float) -> Response:
+    return Response(
+        content, media_type="application/json", headers={"X-Cache": status, "Age": str(int(age))}
+    )
+
+
+def store_cached_result(cache_key: str, database: str, sql: str, content: bytes, body: dict) -> Response:
+    ttl = body.get("cache")
+    if ttl is True:
+        ttl = RESULT_CACHE_TTL_SECONDS
+    ttl = clamp_timeout(ttl, RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_TTL_SECONDS)
+    result_cache.put(cache_key, database, sql, content, ttl=ttl)
+    return cached_json_response(content, "MISS", 0)
+
+
+# ===============================
+# 📡 STREAMING & COLUMNAR RESULTS
+# ===============================
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_stream(request: Request, body: dict) -> bool:
+    """Streaming is opt-in via {"stream": true} or Accept: application/x-ndjson"""
+    return bool(body.get("stream")) or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def open_stream(engine, sql: str, handle=None):
+    """Run sql on a dedicated connection with a server-side cursor (SSCursor via stream_results)"""
+    conn = engine.connect()
     try:
-        # URL-encode the password to handle special characters like @, #, etc.
-        encoded_password = quote_plus(conn['password'])
-        db_url = (
-            f"mysql+pymysql://{conn['user']}:{encoded_password}"
-            f"@{conn['host']}:{conn['port']}/{conn['database']}"
+        if handle:
+            handle.attach(conn)
+        result = conn.execution_options(stream_results=True).execute(text(sql))
+    except Exception:
+        conn.close()
+        raise
+    return conn, result
+
+
+def close_stream(conn, finished: bool):
+    # Closing an unfinished server-side cursor drains every remaining row,
+    # so an abandoned stream kills its statement and drops the connection instead
+    if not finished:
+        handle = QueryHandle()
+        handle.attach(conn)
+        try:
+            kill_query(conn.engine, handle.thread_id)
+        except Exception as e:
+            logger.warning("Could not kill abandoned stream query: %s", e)
+        conn.invalidate()
+    conn.close()
+
+
+async def open_stream_with_deadline(request, engine, sql: str, timeout: float):
+    """open_stream a read under run_with_deadline and MAX_EXECUTION_TIME; returns (conn, result, deadline).
+
+    Pass the deadline to fetch_before_deadline so the rows are fetched within the same budget.
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    conn, result = await run_with_deadline(
+        request, engine, timeout, open_stream, engine, add_execution_time_hint(sql, timeout)
+    )
+    return conn, result, deadline
+
+
+async def fetch_before_deadline(conn, result, deadline: float, timeout: float) -> list:
+    """Fetch the next batch of a stream; past the deadline its statement is killed and QueryCancelled raised"""
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(run_db(result.fetchmany, STREAM_BATCH_SIZE))
+    done, _ = await asyncio.wait({task}, timeout=max(0, deadline - loop.time()))
+    if done:
+        return task.result()
+    handle = QueryHandle()
+    handle.attach(conn)
+    try:
+        await asyncio.to_thread(kill_query, conn.engine, handle.thread_id)
+    except Exception as e:
+        logger.warning("Could not kill stream query on thread %s: %s", handle.thread_id, e)
+    await asyncio.wait({task}, timeout=KILL_GRACE_SECONDS)
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    raise QueryCancelled("timeout", timeout)
+
+
+async def stream_rows(conn, result, deadline: float, timeout: float, **meta):
+    """Yield an NDJSON header with the columns, one array per row, then a footer with the row count"""
+    finished = False
+    try:
+        yield ndjson_header(list(result.keys()), **meta)
+        row_count = 0
+        while True:
+            with span("execute"):
+                rows = await fetch_before_deadline(conn, result, deadline, timeout)
+            if not rows:
+                break
+            row_count += len(rows)
+            with span("serialize"):
+                chunk = ndjson_rows(rows)
+            yield chunk
+        finished = True
+        yield ndjson_footer(rowCount=row_count)
+    except QueryCancelled as e:
+        yield ndjson_error(str(e))
+    except Exception as e:
+        yield ndjson_error(f"SQL execution failed: {str(e)}")
+    finally:
+        db_executor.submit(close_stream, conn, finished)
+
+
+async def stream_arrow(conn, result, deadline: float, timeout: float, **meta):
+    """Yield an Arrow IPC stream: schema message, one record batch per fetch, end-of-stream marker"""
+    finished = False
+    try:
+        with span("execute"):
+            rows = await fetch_before_deadline(conn, result, deadline, timeout)
+        schema = arrow_schema(
+            list(result.keys()), result.cursor.description, rows, metadata={"asklytics": dumps(meta)}
         )
-        return create_engine(db_url)
+        yield schema.serialize().to_pybytes()
+        while rows:
+            with span("serialize"):
+                chunk = arrow_batch(schema, rows)
+            yield chunk
+            with span("execute"):
+                rows = await fetch_before_deadline(conn, result, deadline, timeout)
+        finished = True
+        yield ARROW_EOS
     except Exception as e:
-        raise ValueError(f"Invalid connection: {e}")
+        # Arrow has no in-band error message; the truncated stream tells the client it failed
+        logger.warning("Arrow stream failed: %s", e)
+    finally:
+        db_executor.submit(close_stream, conn, finished)
+
+
+def fetch_columnar(engine, sql: str, limit: int, offset: int = 0, handle=None) -> dict:
+    """Execute a read and build {columns, types, data} straight from the cursor"""
+    with engine.connect() as conn:
+        if handle:
+            handle.attach(conn)
+        result, rows, truncated, drained = fetch_page(conn, sql, limit, offset)
+        payload = columnar_payload(list(result.keys()), column_types(result.cursor.description), [rows])
+        if not drained:
+            conn.invalidate()
+        return {**payload, "truncated": truncated}
+
+
+async def encoded_read_response(request: Request, body: dict, engine, sql: str, page: dict, timeout: float, **meta):
+    """Serve a read in the requested encoding; None means the default list-of-dicts JSON.
+
+    format=ndjson (or stream=true / Accept: application/x-ndjson), format=columnar, format=arrow.
+    Streams are only capped when the client sends an explicit limit.
+    """
+    if not is_read_statement(sql):
+        return None
+    result_format = body.get("format", "rows")
+    # Streams run the paged statement but report the one the client asked for
+    run_sql = sql
+    if result_format in ("ndjson", "arrow") or wants_stream(request, body):
+        if body.get("limit") is not None or page["offset"]:
+            run_sql, _ = paginate_sql(sql, page["limit"], page["offset"])
+    if result_format == "ndjson" or wants_stream(request, body):
+        conn, result, deadline = await open_stream_with_deadline(request, engine, run_sql, timeout)
+        return StreamingResponse(
+            stream_rows(conn, result, deadline, timeout, sql=sql, **meta), media_type=NDJSON_MEDIA_TYPE
+        )
+    if result_format == "arrow":
+        if result_formats.pyarrow is None:
+            return {"error": "Arrow output needs the optional pyarrow package (pip install pyarrow)."}
+        conn, result, deadline = await open_stream_with_deadline(request, engine, run_sql, timeout)
+        return StreamingResponse(
+            stream_arrow(conn, result, deadline, timeout, sql=sql, **meta), media_type=ARROW_MEDIA_TYPE
+        )
+    if result_format == "columnar":
+        payload = await run_shared(
+            request, engine, timeout, fetch_columnar,
+            engine, add_execution_time_hint(sql, timeout), page["limit"], page["offset"],
+        )
+        # The payload may be shared with coalesced requests, so it is read, never modified
+        extra = page_fields(sql, page, payload["rowCount"], payload["truncated"])
+        columns = {k: v for k, v in payload.items() if k != "truncated"}
+        with span("serialize"):
+            content = dumps({"sql": sql, **meta, **columns, **extra})
+        return Response(content, media_type="application/json")
+    return None
 
 # ===============================
 # 💬 NLP → SQL ENDPOINT
 # ===============================
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+# EXPLAIN guard for generated SELECTs: refuse | limit | off
+EXPLAIN_GUARD = os.getenv("EXPLAIN_GUARD", "refuse").lower()
+EXPLAIN_MAX_ROWS = int(os.getenv("EXPLAIN_MAX_ROWS", "5000000"))
+EXPLAIN_LIMITED_ROWS = int(os.getenv("EXPLAIN_LIMITED_ROWS", str(DEFAULT_ROW_LIMIT)))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "1"))
+
+SYSTEM_PROMPT = (
+    "You are an expert MySQL database assistant. Your task is to convert natural language questions "
+    "into accurate, executable SQL queries.\n\n"
+    "CRITICAL RULES:\n"
+    "1. Analyze the user's question carefully to identify which table(s) and columns are relevant\n"
+    "2. Use exact column names and table names from the provided schema\n"
+    "3. When example questions for this database are given, follow the tables and patterns they use\n"
+    "4. Return ONLY the SQL query - no explanations, comments, backticks, or markdown\n"
+    "5. Use appropriate WHERE clauses to filter based on the user's specific criteria\n"
+    "6. Join tables when necessary to get complete information\n"
+    "7. Do NOT return generic queries - always address the specific question asked"
+)
+
+# Part of the generated-SQL cache key, so editing the prompt retires old answers
+SYSTEM_PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def build_user_prompt(schema_text: str, prompt: str, examples=()) -> str:
+    shots = "".join(f"Q: {e['question']}\nSQL: {e['sql']}\n" for e in examples)
+    return (
+        f"Database Schema:\n{schema_text}\n\n"
+        + (f"Example Questions (verified on this database):\n{shots}\n" if shots else "")
+        + f"User Question: {prompt}\n\n"
+        f"Instructions: Generate a MySQL query that directly answers this specific question. "
+        f"Use the exact table and column names from the schema. Return only the SQL query."
+    )
+
+
+def clean_generated_sql(sql: str) -> str:
+    """Strip markdown fences and newlines from the model's answer"""
+    sql = sql.strip()
+    
+    # Remove markdown code fences if present
+    if sql.startswith("```"):
+        lines = sql.split("\n")
+        sql = "\n".join(lines[1:-1]) if len(lines) > 2 else lines[1] if len(lines) > 1 else sql
+    sql = sql.replace("```sql", "").replace("```", "").strip()
+    
+    # Clean up the SQL (remove any extra formatting)
+    return sql.replace("\n", " ").strip()
+
+
+def llm_messages(prompt: str, schema_text: str, examples=()) -> list:
+    with span("prompt_build"):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_user_prompt(schema_text, prompt, examples)},
+        ]
+
+
+async def generate_sql(prompt: str, schema_text: str, timeout: float = LLM_TIMEOUT_SECONDS, examples=()) -> str:
+    """Ask Groq Llama 3.1 to turn the question into a single SQL statement"""
+    messages = llm_messages(prompt, schema_text, examples)
+    with span("llm"):
+        chat = await client.chat.completions.create(
+            model=GROQ_MODEL,
+            messages=messages,
+            temperature=0.1,
+            max_tokens=512,
+            timeout=timeout,
+        )
+    record_llm_usage(getattr(chat, "usage", None))
+    return clean_generated_sql(chat.choices[0].message.content or "")
+
+
+def record_llm_usage(usage):
+    """Count billed tokens for /metrics and the request log"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    LLM_TOKENS.inc(prompt_tokens, "prompt")
+    LLM_TOKENS.inc(completion_tokens, "completion")
+    annotate(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+class GenerationError(Exception):
+    """The question could not be turned into runnable SQL (message is shown to the user)"""
+
+
+class RateLimitGate:
+    """Shared pause so one 429 backs off every caller, not just the one that hit it"""
+
+    def __init__(self):
+        self.resume_at = 0.0
+
+    async def wait(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+
+llm_rate_gate = RateLimitGate()
+
+
+async def generate_sql_with_backoff(prompt: str, schema_text: str, timeout: float, examples=()) -> str:
+    """generate_sql that honours Groq 429s: wait for Retry-After (or exponential backoff) and retry"""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        await llm_rate_gate.wait()
+        try:
+            return await generate_sql(prompt, schema_text, timeout=timeout, examples=examples)
+        except RateLimitError as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            try:
+                delay = float(e.response.headers.get("retry-after", ""))
+            except ValueError:
+                delay = LLM_BACKOFF_SECONDS * 2 ** attempt
+            llm_rate_gate.pause(delay + random.uniform(0, LLM_BACKOFF_SECONDS / 4))
+
+
+def generation_context(prompt: str, conn_info: dict, cached_schema: dict) -> dict:
+    """{cache_args, sql, schema_text, schema_report, examples}: sql is set on a cache hit, else what to prompt with"""
+    cache_args = (
+        connection_scope(conn_info, JWT_SECRET), prompt,
+        "|".join(cached_schema["fingerprint"]), GROQ_MODEL, SYSTEM_PROMPT_VERSION,
+    )
+
+    # Reuse SQL generated earlier for the same question against the same schema
+    sql = sql_cache.get(*cache_args)
+    if sql is not None:
+        annotate(sql_cache="hit")
+        return {"cache_args": cache_args, "sql": sql, "schema_text": None, "schema_report": None, "examples": []}
+    context = {
+        "cache_args": cache_args, "schema_info": cached_schema["schema"], "database": conn_info.get("database", ""),
+    }
+
+    schema_report = None
+    with span("prompt_build"):
+        if SCHEMA_PRUNING:
+            schema_text, schema_report = prune_schema(
+                cached_schema, prompt, top_k=SCHEMA_PRUNE_TOP_K, token_budget=SCHEMA_PROMPT_TOKEN_BUDGET
+            )
+        else:
+            schema_text = cached_schema["schema_text"]
+        examples = example_store.search(example_scope(conn_info), prompt, FEW_SHOT_TOP_K) if FEW_SHOT_TOP_K else []
+    annotate(few_shot=len(examples))
+    
+    log_event(
+        logger, logging.DEBUG, "schema_sent",
+        tables_total=len(cached_schema["tables"]),
+        tables_sent=schema_report["tables_sent"] if schema_report else len(cached_schema["tables"]),
+        schema_chars=len(schema_text), question=prompt,
+    )
+    context.update(sql=None, schema_text=schema_text, schema_report=schema_report, examples=examples)
+    return context
+
+
+def accept_generated_sql(context: dict, prompt: str, sql: str) -> str:
+    """Validate freshly generated SQL and remember it for the next identical question"""
+    log_event(logger, logging.DEBUG, "sql_generated", question=prompt, sql=sql)
+    
+    # Validate SQL starts with SELECT, INSERT, UPDATE, or DELETE
+    if not any(sql.upper().startswith(cmd) for cmd in ["SELECT", "INSERT", "UPDATE", "DELETE", "SHOW"]):
+        raise GenerationError(f"Generated invalid SQL: {sql}. Please rephrase your question.")
+
+    # Tables/columns must exist in the cached schema, and only one statement may run
+    try:
+        validate_sql(sql, context["schema_info"], context["database"])
+    except SQLValidationError as e:
+        raise GenerationError(f"Generated SQL failed validation: {e} Please rephrase your question.")
+
+    sql_cache.put(*context["cache_args"], sql)
+    return sql
+
+
+async def guard_query_cost(engine, sql: str) -> tuple:
+    """EXPLAIN a generated SELECT before it runs: (sql to run, guard report or None).
+
+    Past EXPLAIN_MAX_ROWS estimated rows the query is refused (SQLValidationError), or with
+    EXPLAIN_GUARD=limit rewritten to return at most EXPLAIN_LIMITED_ROWS rows when a LIMIT can be added.
+    """
+    if EXPLAIN_GUARD == "off" or not sql.lstrip().upper().startswith("SELECT"):
+        return sql, None
+    try:
+        with span("explain"):
+            estimate = await run_db(estimate_scanned_rows, engine, sql)
+    except Exception as e:
+        if is_connection_error(e):
+            raise
+        # Let execution report the real error for SQL that cannot even be explained
+        log_event(logger, logging.DEBUG, "explain_failed", sql=sql, error=str(e))
+        return sql, None
+    annotate(estimated_rows=estimate)
+    if estimate is None or estimate <= EXPLAIN_MAX_ROWS:
+        return sql, None
+    if EXPLAIN_GUARD == "limit":
+        limited, rewritten = paginate_sql(sql, EXPLAIN_LIMITED_ROWS)
+        if rewritten:
+            return limited, {"estimatedRows": estimate, "limitedTo": EXPLAIN_LIMITED_ROWS}
+    raise SQLValidationError(
+        f"Query refused: MySQL estimates it would examine about {estimate:,} rows "
+        f"(limit {EXPLAIN_MAX_ROWS:,}). Please ask a narrower question."
+    )
+
+
+def remember_example(conn_info: dict, prompt: str, sql: str):
+    """A freshly generated read that ran cleanly becomes a few-shot example for its database"""
+    if is_read_statement(sql):
+        example_store.add(example_scope(conn_info), prompt, sql)
+
+
+def require_llm_client():
+    if not client:
+        raise GenerationError("Groq API key not configured. Set GROQ_API_KEY in .env.")
+
+
+async def resolve_sql(prompt: str, conn_info: dict, cached_schema: dict, llm_timeout: float) -> tuple:
+    """Return (sql, from_cache, schema_report) for a question; raises GenerationError"""
+    context = generation_context(prompt, conn_info, cached_schema)
+    if context["sql"] is not None:
+        return context["sql"], True, None
+
+    require_llm_client()
+    try:
+        # Same question, database and schema already being generated: wait for that answer
+        sql = await single_flight.do(
+            "llm", sql_cache.make_key(*context["cache_args"]),
+            lambda _: generate_sql_with_backoff(prompt, context["schema_text"], llm_timeout, context["examples"]),
+        )
+    except APITimeoutError:
+        raise GenerationError(f"SQL generation timed out after {llm_timeout:g}s. Please try again.")
+    except RateLimitError:
+        raise GenerationError("The AI service is rate limiting requests. Please try again shortly.")
+    
+    return accept_generated_sql(context, prompt, sql), False, context["schema_report"]
+
+
 @app.post("/query")
 async def query_db(request: Request):
     body = await request.json()
     prompt = body.get("prompt", "")
     conn_info = body.get("connection", {})
 
-    # Validate inputs
-    if not prompt or not prompt.strip():
+    try:
+        page = page_request(body)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    # Validate inputs (a page token already carries the generated SQL)
+    if not page["sql"] and (not prompt or not prompt.strip()):
         return {"error": "Prompt is required and cannot be empty."}
     
-    required_fields = ["host", "port", "user", "password", "database"]
-    missing = []
-    for f in required_fields:
-        val = conn_info.get(f)
-        if f == "password":
-            if val is None:
-                missing.append(f)
-        else:
-            if not val:
-                missing.append(f)
+    missing = missing_connection_fields(conn_info)
     if missing:
         return {"error": f"Missing connection fields: {', '.join(missing)}"}
 
     try:
+        # No separate SELECT 1: pool pre-ping checks liveness on checkout, and a failure to
+        # connect during schema loading or execution is reported as a credentials problem below
         engine = create_dynamic_engine(conn_info)
         
-        # Test connection
-        try:
-            with engine.connect() as test_conn:
-                test_conn.execute(text("SELECT 1"))
-        except Exception as db_err:
-            return {"error": f"Database connection failed: {str(db_err)}. Please check your credentials."}
-        
-        # Get database schema for prompting the LLM
-        schema_parts = []
-        with engine.begin() as conn:
-            # Get all tables
-            tables_result = conn.execute(text("SHOW TABLES"))
-            tables = [row[0] for row in tables_result]
-            
-            # Get detailed schema for each table (column name and type)
-            for table in tables:
-                rows = conn.execute(text(f"DESCRIBE {table}")).fetchall()
-                columns_info = [f"{row[0]} ({row[1]})" for row in rows]
-                schema_parts.append(f"Table '{table}': {', '.join(columns_info)}")
-        
-        schema_text = "\n".join(schema_parts)
-        
-        # Log schema for debugging
-        print(f"\n=== SCHEMA SENT TO AI ===")
-        print(f"Total tables: {len(tables)}")
-        print(f"Tables: {', '.join(tables)}")
-        print(f"Full schema length: {len(schema_text)} characters")
-        print(schema_text)  # Print FULL schema, not truncated
-        print(f"=== USER QUESTION ===")
-        print(prompt)
-        print(f"========================\n")
-
-        if not client:
-            return {"error": "Groq API key not configured. Set GROQ_API_KEY in .env."}
-
-        # Generate SQL using Groq Llama 3.1
-        system_prompt = (
-            "You are an expert MySQL database assistant. Your task is to convert natural language questions "
-            "into accurate, executable SQL queries.\n\n"
-            "CRITICAL RULES:\n"
-            "1. Analyze the user's question carefully to identify which table(s) and columns are relevant\n"
-            "2. Use exact column names and table names from the provided schema\n"
-            "3. For questions about 'payment details' or 'check number', use the 'payments' table\n"
-            "4. For questions about customers, use the 'customers' table\n"
-            "5. For questions about orders, use the 'orders' table\n"
-            "6. For questions about products, use the 'products' table\n"
-            "7. Return ONLY the SQL query - no explanations, comments, backticks, or markdown\n"
-            "8. Use appropriate WHERE clauses to filter based on the user's specific criteria\n"
-            "9. Join tables when necessary to get complete information\n"
-            "10. Do NOT return generic queries - always address the specific question asked"
-        )
+        schema_report = None
+        cached_sql = False
+        cost_guard = None
+        if page["sql"]:
+            # Next page of an earlier answer: no schema or LLM work needed
+            sql = page["sql"]
+        else:
+            # Get database schema for prompting the LLM (cached per database)
+            cached_schema = await load_schema(conn_info, engine)
+            llm_timeout = clamp_timeout(body.get("llm_timeout"), LLM_TIMEOUT_SECONDS, LLM_TIMEOUT_SECONDS * 4)
+            try:
+                sql, cached_sql, schema_report = await resolve_sql(prompt, conn_info, cached_schema, llm_timeout)
+            except GenerationError as e:
+                return {"error": str(e)}
+            try:
+                sql, cost_guard = await guard_query_cost(engine, sql)
+            except SQLValidationError as e:
+                return {"sql": sql, "error": str(e)}
 
-        user_prompt = (
-            f"Database Schema:\n{schema_text}\n\n"
-            f"User Question: {prompt}\n\n"
-            f"Instructions: Generate a MySQL query that directly answers this specific question. "
-            f"Use the exact table and column names from the schema. Return only the SQL query."
+        # Execute the generated SQL query
+        timeout = clamp_timeout(body.get("timeout"), QUERY_TIMEOUT_SECONDS, MAX_QUERY_TIMEOUT_SECONDS)
+        generated = not page["sql"] and not cached_sql and cost_guard is None
+        encoded = await encoded_read_response(
+            request, body, engine, sql, page, timeout,
+            cached=cached_sql, schemaContext=schema_report, costGuard=cost_guard,
         )
+        if encoded is not None:
+            if generated and isinstance(encoded, Response) and not isinstance(encoded, StreamingResponse):
+                remember_example(conn_info, prompt, sql)
+            return encoded
 
-        chat = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.1,
-            max_tokens=512,
+        result = await run_shared(
+            request, engine, timeout, run_statement,
+            engine, add_execution_time_hint(sql, timeout), page["limit"], page["offset"],
         )
+        if "rowcount" in result:
+            result_cache.invalidate_for_write(database_key(conn_info), sql)
+        if "data" in result:
+            if generated:
+                remember_example(conn_info, prompt, sql)
+            rows = result["data"]
+            payload = {
+                "sql": sql, "data": rows, "cached": cached_sql, "schemaContext": schema_report,
+                "costGuard": cost_guard, **page_fields(sql, page, len(rows), result["truncated"]),
+            }
+            with span("serialize"):
+                content = dumps(payload)
+            return Response(content, media_type="application/json")
+        else:
+            return {
+                "sql": sql,
+                "message": f"{result['rowcount']} rows affected.",
+                "cached": cached_sql,
+                "schemaContext": schema_report,
+            }
 
-        sql = (chat.choices[0].message.content or "").strip()
-        
-        # Remove markdown code fences if present
-        if sql.startswith("```"):
-            lines = sql.split("\n")
-            sql = "\n".join(lines[1:-1]) if len(lines) > 2 else lines[1] if len(lines) > 1 else sql
-        sql = sql.replace("```sql", "").replace("```", "").strip()
-        
-        # Clean up the SQL (remove any extra formatting)
-        sql = sql.replace("\n", " ").strip()
-        
-        # Log generated SQL for debugging
-        print(f"\n=== GENERATED SQL ===")
-        print(sql)
-        print(f"=====================\n")
-        
-        # Validate SQL starts with SELECT, INSERT, UPDATE, or DELETE
-        if not any(sql.upper().startswith(cmd) for cmd in ["SELECT", "INSERT", "UPDATE", "DELETE", "SHOW"]):
-            return {"error": f"Generated invalid SQL: {sql}. Please rephrase your question."}
+    except QueryCancelled as e:
+        return {"sql": sql, "error": str(e), "cancelled": e.reason}
+    except Exception as e:
+        if is_connection_error(e):
+            return connection_failed(e)
+        return {"error": f"Server error: {e}"}
 
-        # Execute the generated SQL query
-        with engine.begin() as conn:
-            result = conn.execute(text(sql))
-            if sql.upper().startswith("SELECT") or sql.upper().startswith("SHOW"):
-                rows = [dict(row._mapping) for row in result]
-                return {"sql": sql, "data": rows}
-            else:
-                return {"sql": sql, "message": f"{result.rowcount} rows affected."}
 
+# ===============================
+# ⚡ STREAMING NLP → SQL (SSE)
+# ===============================
+async def stream_generated_sql(prompt: str, schema_text: str, timeout: float, examples=()):
+    """Yield ("token", text) per streamed delta, then ("sql", statement) as soon as the statement is complete.
+
+    The Groq stream is closed at the first ; or closing code fence, so execution does not
+    wait for the model to finish talking.
+    """
+    messages = llm_messages(prompt, schema_text, examples)
+    await llm_rate_gate.wait()
+    detector = StatementDetector()
+    stream = None
+    try:
+        with span("llm"):
+            stream = await client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=messages,
+                temperature=0.1,
+                max_tokens=512,
+                timeout=timeout,
+                stream=True,
+            )
+            async for chunk in stream:
+                x_groq = getattr(chunk, "x_groq", None)
+                record_llm_usage(getattr(x_groq, "usage", None) or getattr(chunk, "usage", None))
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                yield "token", delta
+                statement = detector.feed(delta)
+                if statement is not None:
+                    yield "sql", clean_generated_sql(statement)
+                    return
+        yield "sql", clean_generated_sql(detector.finish())
+    finally:
+        if stream is not None:
+            await stream.close()
+
+
+async def sse_query_events(request: Request, body: dict, prompt: str, conn_info: dict, engine):
+    """Event sequence for /query/stream: token*, sql, columns, rows*, end (or error at any point)"""
+    sql = None
+    try:
+        cached_schema = await load_schema(conn_info, engine)
+        context = generation_context(prompt, conn_info, cached_schema)
+        sql = context["sql"]
+        if sql is None:
+            require_llm_client()
+            llm_timeout = clamp_timeout(body.get("llm_timeout"), LLM_TIMEOUT_SECONDS, LLM_TIMEOUT_SECONDS * 4)
+            try:
+                async for kind, value in stream_generated_sql(
+                    prompt, context["schema_text"], llm_timeout, context["examples"]
+                ):
+                    if kind == "token":
+                        yield sse_event("token", {"text": value})
+                    else:
+                        sql = value
+            except APITimeoutError:
+                raise GenerationError(f"SQL generation timed out after {llm_timeout:g}s. Please try again.")
+            except RateLimitError:
+                raise GenerationError("The AI service is rate limiting requests. Please try again shortly.")
+            sql = accept_generated_sql(context, prompt, sql)
+        generated_sql = sql
+        sql, cost_guard = await guard_query_cost(engine, sql)
+        yield sse_event("sql", {
+            "sql": sql, "cached": context["sql"] is not None, "schemaContext": context["schema_report"],
+            "costGuard": cost_guard,
+        })
+
+        timeout = clamp_timeout(body.get("timeout"), QUERY_TIMEOUT_SECONDS, MAX_QUERY_TIMEOUT_SECONDS)
+        if not is_read_statement(sql):
+            result = await run_with_deadline(request, engine, timeout, run_statement, engine, sql)
+            result_cache.invalidate_for_write(database_key(conn_info), sql)
+            yield sse_event("end", {"message": f"{result['rowcount']} rows affected.", "rowCount": result["rowcount"]})
+            return
+
+        run_sql = sql
+        if body.get("limit") is not None:
+            run_sql, _ = paginate_sql(sql, clamp_limit(body.get("limit"), DEFAULT_ROW_LIMIT, MAX_ROW_LIMIT))
+        conn, result, deadline = await open_stream_with_deadline(request, engine, run_sql, timeout)
+        finished = False
+        try:
+            yield sse_event("columns", {"columns": list(result.keys())})
+            row_count = 0
+            while True:
+                with span("execute"):
+                    rows = await fetch_before_deadline(conn, result, deadline, timeout)
+                if not rows:
+                    break
+                row_count += len(rows)
+                with span("serialize"):
+                    chunk = sse_event("rows", {"rows": [list(row) for row in rows]})
+                yield chunk
+            finished = True
+            if context["sql"] is None:
+                remember_example(conn_info, prompt, generated_sql)
+            yield sse_event("end", {"rowCount": row_count})
+        finally:
+            db_executor.submit(close_stream, conn, finished)
+
+    except (GenerationError, SQLValidationError, QueryCancelled) as e:
+        yield sse_event("error", {"error": str(e), "sql": sql})
+    except Exception as e:
+        if is_connection_error(e):
+            error = connection_failed(e)["error"]
+        elif sql:
+            error = f"SQL execution failed: {str(e)}"
+        else:
+            error = f"Server error: {e}"
+        yield sse_event("error", {"error": error, "sql": sql})
+
+
+@app.post("/query/stream")
+async def query_stream(request: Request):
+    """/query over server-sent events: LLM tokens as they arrive, then result rows in batches"""
+    body = await request.json()
+    prompt = body.get("prompt", "")
+    conn_info = body.get("connection", {})
+
+    if not prompt or not prompt.strip():
+        return {"error": "Prompt is required and cannot be empty."}
+    missing = missing_connection_fields(conn_info)
+    if missing:
+        return {"error": f"Missing connection fields: {', '.join(missing)}"}
+
+    try:
+        engine = create_dynamic_engine(conn_info)
+    except Exception as e:
+        return {"error": f"Server error: {e}"}
+
+    return StreamingResponse(
+        sse_query_events(request, body, prompt, conn_info, engine),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ===============================
+# 📦 BATCH NLP → SQL ENDPOINT
+# ===============================
+BATCH_MAX_PROMPTS = int(os.getenv("BATCH_MAX_PROMPTS", "100"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+@app.post("/query/batch")
+async def query_batch(request: Request):
+    """Answer many questions against one connection: schema once, LLM calls fanned out concurrently"""
+    batch_start = time.perf_counter()
+    body = await request.json()
+    prompts = body.get("prompts", [])
+    conn_info = body.get("connection", {})
+
+    if not isinstance(prompts, list) or not prompts:
+        return {"error": "prompts must be a non-empty list of questions."}
+    if len(prompts) > BATCH_MAX_PROMPTS:
+        return {"error": f"At most {BATCH_MAX_PROMPTS} prompts per batch."}
+
+    missing = missing_connection_fields(conn_info)
+    if missing:
+        return {"error": f"Missing connection fields: {', '.join(missing)}"}
+
+    try:
+        engine = create_dynamic_engine(conn_info)
+        schema_start = time.perf_counter()
+        try:
+            cached_schema = await load_schema(conn_info, engine)
+        except Exception as db_err:
+            return connection_failed(db_err)
+        schema_ms = elapsed_ms(schema_start)
     except Exception as e:
         return {"error": f"Server error: {e}"}
 
+    concurrency = clamp_limit(body.get("concurrency"), BATCH_LLM_CONCURRENCY, BATCH_LLM_CONCURRENCY * 4)
+    llm_slots = asyncio.Semaphore(concurrency)
+    llm_timeout = clamp_timeout(body.get("llm_timeout"), LLM_TIMEOUT_SECONDS, LLM_TIMEOUT_SECONDS * 4)
+    timeout = clamp_timeout(body.get("timeout"), QUERY_TIMEOUT_SECONDS, MAX_QUERY_TIMEOUT_SECONDS)
+    limit = clamp_limit(body.get("limit"), DEFAULT_ROW_LIMIT, MAX_ROW_LIMIT)
+    database = database_key(conn_info)
+
+    async def answer(index: int, prompt) -> dict:
+        item = {"index": index, "prompt": prompt}
+        timings = item["timings"] = {}
+        start = time.perf_counter()
+        try:
+            if not isinstance(prompt, str) or not prompt.strip():
+                raise GenerationError("Prompt is required and cannot be empty.")
+
+            queued = time.perf_counter()
+            async with llm_slots:
+                timings["queue_ms"] = elapsed_ms(queued)
+                llm_start = time.perf_counter()
+                sql, item["cached"], _ = await resolve_sql(prompt, conn_info, cached_schema, llm_timeout)
+                timings["llm_ms"] = elapsed_ms(llm_start)
+            item["sql"] = generated_sql = sql
+            sql, item["costGuard"] = await guard_query_cost(engine, sql)
+            item["sql"] = sql
+
+            # Execution is outside the LLM semaphore; the DB thread pool and engine pool bound it
+            execute_start = time.perf_counter()
+            result = await run_shared(
+                request, engine, timeout, run_statement, engine, add_execution_time_hint(sql, timeout), limit
+            )
+            timings["execute_ms"] = elapsed_ms(execute_start)
+            if "data" in result:
+                if not item["cached"]:
+                    remember_example(conn_info, prompt, generated_sql)
+                item.update({"data": result["data"], "rowCount": len(result["data"]), "truncated": result["truncated"]})
+            else:
+                result_cache.invalidate_for_write(database, sql)
+                item.update({"message": f"{result['rowcount']} rows affected.", "rowCount": result["rowcount"]})
+        except (GenerationError, SQLValidationError, QueryCancelled) as e:
+            item["error"] = str(e)
+        except Exception as e:
+            item["error"] = f"SQL execution failed: {str(e)}"
+        timings["total_ms"] = elapsed_ms(start)
+        return item
+
+    results = await asyncio.gather(*(answer(i, p) for i, p in enumerate(prompts)))
+    return {
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "timings": {"schema_ms": schema_ms, "total_ms": elapsed_ms(batch_start), "concurrency": concurrency},
+    }
+
+
+# ===============================
+# 📤 BULK EXPORT
+# ===============================
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+
+def export_first_chunk(result, encoder) -> bytes:
+    """Fetch the first batch and return the encoder's header followed by that batch"""
+    description = result.cursor.description  # the cursor is released once a fetch comes back empty
+    rows = result.fetchmany(EXPORT_BATCH_SIZE)
+    header = encoder.start(list(result.keys()), description, rows)
+    return header + (encoder.encode(rows) if rows else b"")
+
+
+def export_next_chunk(result, encoder):
+    """Fetch and encode the next batch in one DB-thread hop; None once the cursor is exhausted"""
+    rows = result.fetchmany(EXPORT_BATCH_SIZE)
+    return encoder.encode(rows) if rows else None
+
+
+async def stream_export(conn, result, encoder, first_chunk: bytes):
+    """Yield the export batch by batch, so memory stays at one batch whatever the result size"""
+    finished = False
+    try:
+        yield first_chunk
+        while True:
+            with span("execute"):
+                chunk = await run_db(export_next_chunk, result, encoder)
+            if chunk is None:
+                break
+            yield chunk
+        finished = True
+        yield encoder.finish()
+    except Exception as e:
+        # CSV and Parquet have no in-band error; the truncated file tells the client it failed
+        logger.warning("Export failed: %s", e)
+    finally:
+        db_executor.submit(close_stream, conn, finished)
+
+
+@app.post("/export")
+async def export_results(request: Request):
+    """Stream a read as CSV, gzip CSV or Parquet straight from a server-side cursor"""
+    body = await request.json()
+    sql = (body.get("sql") or "").strip()
+    conn_info = body.get("connection", {})
+    export_format = body.get("format", "csv")
+
+    encoder_class = EXPORT_ENCODERS.get(export_format)
+    if encoder_class is None:
+        return {"error": f"Unknown format '{export_format}'. Use one of: {', '.join(EXPORT_ENCODERS)}."}
+    if encoder_class is ParquetEncoder and result_formats.parquet is None:
+        return {"error": "Parquet export needs the optional pyarrow package (pip install pyarrow)."}
+    if not sql:
+        return {"error": "SQL is required."}
+    missing = missing_connection_fields(conn_info)
+    if missing:
+        return {"error": f"Missing fields: {', '.join(missing)}"}
+    if not is_read_statement(sql):
+        return {"error": "Only reads (SELECT or SHOW) can be exported."}
+
+    # Open the cursor and encode the first batch before answering, so SQL errors still come back as JSON
+    encoder = GzipCSVEncoder(EXPORT_GZIP_LEVEL) if encoder_class is GzipCSVEncoder else encoder_class()
+    try:
+        engine = create_dynamic_engine(conn_info)
+        with span("execute"):
+            conn, result = await run_db(open_stream, engine, sql)
+    except Exception as e:
+        if is_connection_error(e):
+            return connection_failed(e)
+        return {"error": f"SQL execution failed: {str(e)}"}
+    try:
+        with span("execute"):
+            first_chunk = await run_db(export_first_chunk, result, encoder)
+    except Exception as e:
+        db_executor.submit(close_stream, conn, False)
+        return {"error": f"SQL execution failed: {str(e)}"}
+
+    filename = re.sub(r"[^\w.-]", "_", str(body.get("filename") or "export"))[:100]
+    return StreamingResponse(
+        stream_export(conn, result, encoder, first_chunk),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{encoder.extension}"'},
+    )
+
+
+# ===============================
+# 🧵 BACKGROUND QUERY JOBS
+# ===============================
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "3600"))
+JOB_MAX_ROWS = int(os.getenv("JOB_MAX_ROWS", "1000000"))
+JOB_QUEUE_RETRY_AFTER = "5"
+
+
+def spill_query(engine, sql: str, job, handle=None):
+    """Run a read on a server-side cursor and append every batch to the job's spill file.
+
+    The spill is closed here, by the thread that writes it, however the query ends.
+    """
+    spill = None
+    try:
+        with engine.connect() as conn:
+            if handle:
+                handle.attach(conn)
+            result = conn.execution_options(stream_results=True).execute(text(sql))
+            rows = result.fetchmany(min(STREAM_BATCH_SIZE, JOB_MAX_ROWS))
+            spill = job_manager.open_spill(job, list(result.keys()), result.cursor.description, rows)
+            while rows:
+                spill.write(rows)
+                job.rows += len(rows)
+                if job.rows >= JOB_MAX_ROWS or job.cancel_requested:
+                    job.truncated = job.rows >= JOB_MAX_ROWS
+                    # Don't let close() drain the rest of the server-side cursor
+                    conn.invalidate()
+                    return
+                rows = result.fetchmany(min(STREAM_BATCH_SIZE, JOB_MAX_ROWS - job.rows))
+    finally:
+        if spill is not None:
+            spill.close()
+
+
+async def run_query_job(job, body: dict, conn_info: dict):
+    """Resolve the job's SQL (generating it from the prompt if needed) and spill its rows to disk"""
+    try:
+        engine = create_dynamic_engine(conn_info)
+        if job.sql is None:
+            cached_schema = await job.unless_cancelled(load_schema(conn_info, engine))
+            llm_timeout = clamp_timeout(body.get("llm_timeout"), LLM_TIMEOUT_SECONDS, LLM_TIMEOUT_SECONDS * 4)
+            job.sql, job.meta["cached"], _ = await job.unless_cancelled(
+                resolve_sql(body["prompt"].strip(), conn_info, cached_schema, llm_timeout)
+            )
+        if not is_read_statement(job.sql):
+            job.fail("Jobs only run reads (SELECT or SHOW). Use /execute-sql for writes.")
+            return
+        # The job itself stands in for the client: cancelling it kills the query like a disconnect
+        await run_with_deadline(
+            job, engine, JOB_TIMEOUT_SECONDS, spill_query,
+            engine, add_execution_time_hint(job.sql, JOB_TIMEOUT_SECONDS), job,
+        )
+    except JobCancelled:
+        raise
+    except (GenerationError, SQLValidationError) as e:
+        job.fail(str(e))
+    except QueryCancelled as e:
+        if e.reason == "timeout":
+            job.fail(str(e))
+    except ValueError as e:
+        job.fail(str(e))
+    except Exception as e:
+        job.fail(connection_failed(e)["error"] if is_connection_error(e) else f"SQL execution failed: {str(e)}")
+
+
+def job_not_found() -> JSONResponse:
+    return JSONResponse(status_code=404, content={"error": "Job not found. Finished jobs expire after their TTL."})
+
+
+@app.post("/jobs")
+async def submit_job(request: Request):
+    """Queue a read (sql) or a question (prompt) to run in the background; returns the job id at once"""
+    body = await request.json()
+    conn_info = body.get("connection", {})
+    sql = (body.get("sql") or "").strip()
+    prompt = body.get("prompt") or ""
+
+    if not sql and not prompt.strip():
+        return {"error": "Either sql or prompt is required."}
+    missing = missing_connection_fields(conn_info)
+    if missing:
+        return {"error": f"Missing fields: {', '.join(missing)}"}
+    if sql and not is_read_statement(sql):
+        return {"error": "Jobs only run reads (SELECT or SHOW). Use /execute-sql for writes."}
+    if not sql:
+        try:
+            require_llm_client()
+        except GenerationError as e:
+            return {"error": str(e)}
+
+    try:
+        job = job_manager.submit(lambda job: run_query_job(job, body, conn_info), sql=sql or None)
+    except JobQueueFull as e:
+        return JSONResponse(
+            status_code=503, content={"error": str(e)}, headers={"Retry-After": JOB_QUEUE_RETRY_AFTER}
+        )
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status and progress (rows fetched so far) of a job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found()
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, request: Request):
+    """A finished job's rows: a JSON page (offset/limit), the whole result as NDJSON, or the Arrow file"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found()
+    if job.status != "succeeded":
+        return JSONResponse(status_code=409, content={"error": f"Job is {job.status}.", "status": job.status})
+
+    result_format = request.query_params.get("format", "json")
+    if result_format == "ndjson":
+        def ndjson():
+            yield from job_manager.iter_ndjson(job)
+            yield ndjson_footer(rowCount=job.rows, truncated=job.truncated)
+        return StreamingResponse(ndjson(), media_type=NDJSON_MEDIA_TYPE)
+    if result_format == "arrow":
+        if job.spill_format != "arrow":
+            return {"error": "This job's result was not stored as Arrow. Use format=json or format=ndjson."}
+        return FileResponse(job.path, media_type=ARROW_FILE_MEDIA_TYPE, filename=f"{job.id}.arrow")
+
+    try:
+        offset = max(0, int(request.query_params.get("offset", 0)))
+    except ValueError:
+        return {"error": "offset must be a non-negative integer."}
+    limit = clamp_limit(request.query_params.get("limit"), DEFAULT_ROW_LIMIT, MAX_ROW_LIMIT)
+    rows = await asyncio.to_thread(job_manager.read_page, job, offset, limit)
+    payload = {
+        "jobId": job.id, "columns": job.columns, "data": rows, "rowCount": len(rows),
+        "offset": offset, "limit": limit, "totalRows": job.rows, "truncated": job.truncated,
+        "nextOffset": offset + len(rows) if offset + len(rows) < job.rows else None,
+    }
+    with span("serialize"):
+        content = dumps(payload)
+    return Response(content, media_type="application/json")
+
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Cancel a queued or running job (killing its query) and delete its result"""
+    if not job_manager.delete(job_id):
+        return job_not_found()
+    return {"success": True}
+
 
 # ===============================
 # 🔐 AUTHENTICATION HELPERS
 # ===============================
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt(rounds=12)
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+async def hash_password(password: str) -> str:
+    """Hash a password using bcrypt on the password pool"""
+    return await password_hasher.hash(password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the password pool"""
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+PASSWORD_POOL_RETRY_AFTER = "1"
+
+def password_pool_busy(e: PasswordPoolBusy) -> JSONResponse:
+    """503 with Retry-After when the bcrypt queue is full"""
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "error": str(e)},
+        headers={"Retry-After": PASSWORD_POOL_RETRY_AFTER},
+    )
 
 def create_jwt_token(user_id: int, email: str) -> str:
     """Create a JWT token for authenticated user"""
@@ -327,31 +1657,45 @@ def create_jwt_token(user_id: int, email: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def verify_jwt_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify JWT token from Authorization header"""
+async def verify_jwt_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Verify JWT token from Authorization header (recently verified tokens skip the HMAC check)"""
     try:
         token = credentials.credentials
+        key = token_key(token)
+        payload = token_cache.get(key)
+        if payload is not None:
+            return payload
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        if payload.get("user_id") is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        token_cache.put(key, payload, expires_at=payload.get("exp"))
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def get_auth_engine():
-    """Create engine for authentication database"""
-    try:
-        host = os.getenv("DB_HOST", "localhost")
-        port = os.getenv("DB_PORT", "3306")
-        user = os.getenv("DB_USER", "root")
-        password = os.getenv("DB_PASSWORD", "")
-        database = os.getenv("DB_NAME", "classicmodels")
-        
-        encoded_password = quote_plus(password)
-        db_url = f"mysql+pymysql://{user}:{encoded_password}@{host}:{port}/{database}"
-        return create_engine(db_url)
-    except Exception as e:
-        raise ValueError(f"Invalid auth database connection: {e}")
+def insert_user(name: str, mobile: str, email: str, password_hash: str):
+    """Insert a user unless the email or mobile is taken; returns the new id or None"""
+    with auth_db.begin() as conn:
+        if conn.execute(AUTH_STATEMENTS["find_duplicate"], {"email": email, "mobile": mobile}).fetchone():
+            return None
+        result = conn.execute(
+            AUTH_STATEMENTS["insert_user"],
+            {"name": name, "mobile": mobile, "email": email, "password_hash": password_hash}
+        )
+        return result.lastrowid
+
+def save_profile(user_id: int, name: str, email: str, mobile: str) -> bool:
+    """Update a user's profile; False when the email belongs to someone else"""
+    with auth_db.begin() as conn:
+        if conn.execute(AUTH_STATEMENTS["email_taken"], {"email": email, "user_id": user_id}).fetchone():
+            return False
+        conn.execute(
+            AUTH_STATEMENTS["update_profile"],
+            {"name": name, "email": email, "mobile": mobile, "id": user_id}
+        )
+        return True
 
 
 # ===============================
@@ -375,26 +1719,12 @@ async def register(request: Request):
             return {"success": False, "error": "Password must be at least 8 characters"}
         
         # Hash password
-        password_hash = hash_password(password)
+        password_hash = await hash_password(password)
         
-        # Insert user into database
-        engine = get_auth_engine()
-        with engine.begin() as conn:
-            # Check if email or mobile already exists
-            check = conn.execute(
-                text("SELECT id FROM users WHERE email = :email OR mobile = :mobile"),
-                {"email": email, "mobile": mobile}
-            ).fetchone()
-            
-            if check:
-                return {"success": False, "error": "Email or mobile number already registered"}
-            
-            # Insert new user
-            result = conn.execute(
-                text("INSERT INTO users (name, mobile, email, password_hash) VALUES (:name, :mobile, :email, :password_hash)"),
-                {"name": name, "mobile": mobile, "email": email, "password_hash": password_hash}
-            )
-            user_id = result.lastrowid
+        # Insert user into database (fails if email or mobile already exists)
+        user_id = await run_auth_db(insert_user, name, mobile, email, password_hash)
+        if user_id is None:
+            return {"success": False, "error": "Email or mobile number already registered"}
         
         # Create JWT token
         token = create_jwt_token(user_id, email)
@@ -406,6 +1736,8 @@ async def register(request: Request):
             "user": {"id": user_id, "name": name, "email": email}
         }
     
+    except PasswordPoolBusy as e:
+        return password_pool_busy(e)
     except Exception as e:
         return {"success": False, "error": f"Registration failed: {str(e)}"}
 
@@ -422,30 +1754,32 @@ async def login(request: Request):
             return {"success": False, "error": "Email and password are required"}
         
         # Find user in database
-        engine = get_auth_engine()
-        with engine.begin() as conn:
-            result = conn.execute(
-                text("SELECT id, name, email, password_hash, is_active FROM users WHERE email = :email"),
-                {"email": email}
-            ).fetchone()
-            
-            if not result:
-                return {"success": False, "error": "Invalid email or password"}
-            
-            user_id, name, email, password_hash, is_active = result
-            
-            if not is_active:
-                return {"success": False, "error": "Account is deactivated"}
-            
-            # Verify password
-            if not verify_password(password, password_hash):
-                return {"success": False, "error": "Invalid email or password"}
-            
-            # Update last login
-            conn.execute(
-                text("UPDATE users SET last_login = NOW() WHERE id = :id"),
-                {"id": user_id}
-            )
+        result = await run_auth_db(auth_db.fetchone, "login_lookup", {"email": email})
+        
+        if not result:
+            return {"success": False, "error": "Invalid email or password"}
+        
+        user_id, name, email, password_hash, is_active = result
+        
+        if not is_active:
+            return {"success": False, "error": "Account is deactivated"}
+        
+        # Verify password (no connection is held while bcrypt runs)
+        if not await verify_password(password, password_hash):
+            return {"success": False, "error": "Invalid email or password"}
+        
+        # Upgrade hashes made with a different BCRYPT_ROUNDS while we still have the plaintext
+        new_hash = None
+        if password_hasher.needs_rehash(password_hash):
+            new_hash = await hash_password(password)
+        
+        # Update last login
+        if new_hash:
+            await run_auth_db(auth_db.execute, "rehash_and_touch", {"password_hash": new_hash, "id": user_id})
+            password_hasher.rehashed += 1
+        else:
+            await run_auth_db(auth_db.execute, "touch_last_login", {"id": user_id})
+        profile_cache.invalidate(user_id)
         
         # Create JWT token
         token = create_jwt_token(user_id, email)
@@ -457,6 +1791,8 @@ async def login(request: Request):
             "user": {"id": user_id, "name": name, "email": email}
         }
     
+    except PasswordPoolBusy as e:
+        return password_pool_busy(e)
     except Exception as e:
         return {"success": False, "error": f"Login failed: {str(e)}"}
 
@@ -476,31 +1812,26 @@ async def forgot_password(request: Request):
         if len(new_password) < 8:
             return {"success": False, "error": "New password must be at least 8 characters"}
             
-        engine = get_auth_engine()
-        with engine.begin() as conn:
-            # Verify user exists with this exact email and mobile combination
-            result = conn.execute(
-                text("SELECT id FROM users WHERE email = :email AND mobile = :mobile AND is_active = TRUE"),
-                {"email": email, "mobile": mobile}
-            ).fetchone()
-            
-            if not result:
-                return {"success": False, "error": "Invalid email or mobile number"}
-                
-            user_id = result[0]
+        # Verify user exists with this exact email and mobile combination
+        result = await run_auth_db(auth_db.fetchone, "reset_lookup", {"email": email, "mobile": mobile})
+        
+        if not result:
+            return {"success": False, "error": "Invalid email or mobile number"}
             
-            # Hash new password and update
-            new_hash = hash_password(new_password)
-            conn.execute(
-                text("UPDATE users SET password_hash = :password_hash WHERE id = :id"),
-                {"password_hash": new_hash, "id": user_id}
-            )
+        user_id = result[0]
+        
+        # Hash new password and update
+        new_hash = await hash_password(new_password)
+        await run_auth_db(auth_db.execute, "set_password_hash", {"password_hash": new_hash, "id": user_id})
+        profile_cache.invalidate(user_id)
             
         return {
             "success": True,
             "message": "Password reset successfully. You can now login with your new password."
         }
         
+    except PasswordPoolBusy as e:
+        return password_pool_busy(e)
     except Exception as e:
         return {"success": False, "error": f"Password reset failed: {str(e)}"}
 
@@ -509,29 +1840,28 @@ async def forgot_password(request: Request):
 async def get_current_user(payload: dict = Depends(verify_jwt_token)):
     """Get current authenticated user details"""
     try:
-        engine = get_auth_engine()
-        with engine.connect() as conn:
-            result = conn.execute(
-                text("SELECT id, name, email, mobile, created_at, last_login FROM users WHERE id = :id"),
-                {"id": payload["user_id"]}
-            ).fetchone()
-            
-            if not result:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            user_id, name, email, mobile, created_at, last_login = result
-            
-            return {
-                "success": True,
-                "user": {
-                    "id": user_id,
-                    "name": name,
-                    "email": email,
-                    "mobile": mobile,
-                    "created_at": created_at.isoformat() if created_at else None,
-                    "last_login": last_login.isoformat() if last_login else None
-                }
-            }
+        user = profile_cache.get(payload["user_id"])
+        if user is not None:
+            return {"success": True, "user": user}
+        
+        result = await run_auth_db(auth_db.fetchone, "profile_by_id", {"id": payload["user_id"]})
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        user_id, name, email, mobile, created_at, last_login = result
+        
+        user = {
+            "id": user_id,
+            "name": name,
+            "email": email,
+            "mobile": mobile,
+            "created_at": created_at.isoformat() if created_at else None,
+            "last_login": last_login.isoformat() if last_login else None
+        }
+        profile_cache.put(user_id, user)
+        
+        return {"success": True, "user": user}
     
     except HTTPException:
         raise
@@ -551,22 +1881,10 @@ async def update_profile(request: Request, payload: dict = Depends(verify_jwt_to
         if not name or not email:
             raise HTTPException(status_code=400, detail="Name and email are required")
         
-        engine = get_auth_engine()
-        with engine.begin() as conn:
-            # Check if new email is already used by another user
-            result = conn.execute(
-                text("SELECT id FROM users WHERE email = :email AND id != :user_id"),
-                {"email": email, "user_id": payload["user_id"]}
-            ).fetchone()
-            
-            if result:
-                raise HTTPException(status_code=400, detail="Email already in use")
-            
-            # Update user information
-            conn.execute(
-                text("UPDATE users SET name = :name, email = :email, mobile = :mobile WHERE id = :id"),
-                {"name": name, "email": email, "mobile": mobile, "id": payload["user_id"]}
-            )
+        # Update user information unless the new email is used by another user
+        if not await run_auth_db(save_profile, payload["user_id"], name, email, mobile):
+            raise HTTPException(status_code=400, detail="Email already in use")
+        profile_cache.invalidate(payload["user_id"])
         
         return {
             "success": True,
@@ -594,31 +1912,24 @@ async def change_password(request: Request, payload: dict = Depends(verify_jwt_t
         if len(new_password) < 8:
             raise HTTPException(status_code=400, detail="New password must be at least 8 characters")
         
-        engine = get_auth_engine()
-        with engine.begin() as conn:
-            # Get current password hash
-            result = conn.execute(
-                text("SELECT password_hash FROM users WHERE id = :id"),
-                {"id": payload["user_id"]}
-            ).fetchone()
-            
-            if not result:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            stored_hash = result[0]
-            
-            # Verify current password
-            if not verify_password(current_password, stored_hash):
-                raise HTTPException(status_code=400, detail="Current password is incorrect")
-            
-            # Hash new password
-            new_hash = hash_password(new_password)
-            
-            # Update password
-            conn.execute(
-                text("UPDATE users SET password_hash = :password_hash WHERE id = :id"),
-                {"password_hash": new_hash, "id": payload["user_id"]}
-            )
+        # Get current password hash
+        result = await run_auth_db(auth_db.fetchone, "password_hash_by_id", {"id": payload["user_id"]})
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        stored_hash = result[0]
+        
+        # Verify current password
+        if not await verify_password(current_password, stored_hash):
+            raise HTTPException(status_code=400, detail="Current password is incorrect")
+        
+        # Hash new password
+        new_hash = await hash_password(new_password)
+        
+        # Update password
+        await run_auth_db(auth_db.execute, "set_password_hash", {"password_hash": new_hash, "id": payload["user_id"]})
+        profile_cache.invalidate(payload["user_id"])
         
         return {
             "success": True,
@@ -627,6 +1938,8 @@ async def change_password(request: Request, payload: dict = Depends(verify_jwt_t
     
     except HTTPException:
         raise
+    except PasswordPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": PASSWORD_POOL_RETRY_AFTER})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to change password: {str(e)}")
 
@@ -0,0 +1,136 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+# ===============================
+# 🔐 AUTH DATABASE
+# ===============================
+# Built once so every request reuses the same parsed clause and SQLAlchemy's compiled-statement cache
+AUTH_STATEMENTS = {
+    "find_duplicate": text("SELECT id FROM users WHERE email = :email OR mobile = :mobile"),
+    "insert_user": text(
+        "INSERT INTO users (name, mobile, email, password_hash) VALUES (:name, :mobile, :email, :password_hash)"
+    ),
+    "login_lookup": text("SELECT id, name, email, password_hash, is_active FROM users WHERE email = :email"),
+    "touch_last_login": text("UPDATE users SET last_login = NOW() WHERE id = :id"),
+    "rehash_and_touch": text("UPDATE users SET password_hash = :password_hash, last_login = NOW() WHERE id = :id"),
+    "reset_lookup": text("SELECT id FROM users WHERE email = :email AND mobile = :mobile AND is_active = TRUE"),
+    "set_password_hash": text("UPDATE users SET password_hash = :password_hash WHERE id = :id"),
+    "profile_by_id": text("SELECT id, name, email, mobile, created_at, last_login FROM users WHERE id = :id"),
+    "email_taken": text("SELECT id FROM users WHERE email = :email AND id != :user_id"),
+    "update_profile": text("UPDATE users SET name = :name, email = :email, mobile = :mobile WHERE id = :id"),
+    "password_hash_by_id": text("SELECT password_hash FROM users WHERE id = :id"),
+}
+
+
+class AuthDatabase:
+    """The one pooled engine behind /auth/*, created at startup and timed on every checkout"""
+
+    def __init__(self, url: str, pool_size=10, max_overflow=20, pool_timeout=10,
+                 pool_pre_ping=True, pool_recycle=1800):
+        self.url = url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_pre_ping = pool_pre_ping
+        self.pool_recycle = pool_recycle
+        self._engine = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _build_engine(self):
+        return create_engine(
+            self.url,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_pre_ping=self.pool_pre_ping,
+            pool_recycle=self.pool_recycle,
+        )
+
+    def start(self):
+        """Create the engine (idempotent; also happens lazily on first use)"""
+        with self._lock:
+            if self._engine is None:
+                self._engine = self._build_engine()
+        return self._engine
+
+    @property
+    def engine(self):
+        return self._engine or self.start()
+
+    def dispose(self):
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+    def _checkout(self, acquire):
+        start = time.perf_counter()
+        try:
+            conn = acquire()
+        except PoolTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    @contextmanager
+    def connect(self):
+        conn = self._checkout(self.engine.connect)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def begin(self):
+        conn = self._checkout(self.engine.connect)
+        try:
+            with conn.begin():
+                yield conn
+        finally:
+            conn.close()
+
+    def fetchone(self, name: str, params: dict):
+        """Run one of AUTH_STATEMENTS and return its first row"""
+        with self.connect() as conn:
+            return conn.execute(AUTH_STATEMENTS[name], params).fetchone()
+
+    def execute(self, name: str, params: dict):
+        """Run one of AUTH_STATEMENTS in its own transaction"""
+        with self.begin() as conn:
+            return conn.execute(AUTH_STATEMENTS[name], params)
+
+    def stats(self) -> dict:
+        with self._lock:
+            engine = self._engine
+            stats = {
+                "started": engine is not None,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        if engine is not None:
+            pool = engine.pool
+            stats["pool"] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": self.max_overflow,
+            }
+        return stats
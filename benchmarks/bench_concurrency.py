@@ -0,0 +1,105 @@
+"""
+Concurrent Request Benchmark
+Fires requests at a running backend with a fixed number of in-flight clients
+and reports throughput and latency percentiles. Run it once against the old
+build and once against the new one to compare.
+
+The default payload runs SELECT SLEEP(0.2) through /execute-sql, so a server
+that blocks its event loop tops out near 5 req/s regardless of concurrency.
+
+    uvicorn app:app --port 8000
+    python benchmarks/bench_concurrency.py --concurrency 1,10,50 --requests 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def default_connection() -> dict:
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "3306")),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD", ""),
+        "database": os.getenv("DB_NAME", "classicmodels"),
+    }
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(url: str, endpoint: str, payload: dict, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload)
+                if response.status_code != 200 or "error" in response.json():
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "throughput": total / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("BACKEND_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--endpoint", default="/execute-sql")
+    parser.add_argument("--sql", default="SELECT SLEEP(0.2) AS slept")
+    parser.add_argument("--prompt", default="Show me all customers from USA")
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = {"connection": default_connection()}
+    if args.endpoint.startswith("/query"):
+        payload["prompt"] = args.prompt
+    else:
+        payload["sql"] = args.sql
+
+    print("=" * 72)
+    print(f"⚡ CONCURRENCY BENCHMARK  {args.url}{args.endpoint}")
+    print("=" * 72)
+    print(f"{'clients':>8} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'errors':>8}")
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        r = asyncio.run(run_level(args.url, args.endpoint, payload, level, args.requests))
+        print(
+            f"{r['concurrency']:>8} {r['throughput']:>10.1f} {r['p50'] * 1000:>10.1f} "
+            f"{r['p95'] * 1000:>10.1f} {r['p99'] * 1000:>10.1f} {r['errors']:>8}"
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Bulk Export Benchmark
+Measures rows per second and peak Python memory of POST /export's CSV, gzip
+CSV and Parquet encoders against plain batch iteration and against the NDJSON
+encoding that /execute-sql streams with.
+Rows are the synthetic orderdetails-like tuples from bench_result_encoding.py,
+handed out in EXPORT_BATCH_SIZE batches like a server-side cursor, and every
+chunk is dropped once counted, so peak memory should stay flat as rows grow.
+
+    python benchmarks/bench_export.py [--rows 100000,1000000] [--batch-size 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import result_formats  # noqa: E402
+from bench_result_encoding import COLUMNS, make_rows  # noqa: E402
+from result_formats import CSVEncoder, GzipCSVEncoder, ParquetEncoder, ndjson_header, ndjson_rows  # noqa: E402
+
+
+class FakeCursor:
+    """fetchmany building fresh row tuples from a template batch, like a driver decoding a packet"""
+
+    def __init__(self, template: list, total: int):
+        self.template = template
+        self.remaining = total
+
+    def fetchmany(self, size: int) -> list:
+        count = min(size, self.remaining, len(self.template))
+        self.remaining -= count
+        return [tuple(row) for row in self.template[:count]]
+
+
+class NDJSONEncoder:
+    """The existing streamed encoding behind the same start/encode/finish interface"""
+
+    def start(self, columns: list, description, first_rows: list) -> bytes:
+        return ndjson_header(columns).encode("utf-8")
+
+    def encode(self, rows) -> bytes:
+        return ndjson_rows(rows).encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b""
+
+
+def export(encoder, total: int, batch_size: int, template: list) -> int:
+    """Bytes produced by one export; encoder None just fetches"""
+    cursor = FakeCursor(template, total)
+    produced = 0
+    rows = cursor.fetchmany(batch_size)
+    if encoder is not None:
+        produced += len(encoder.start(COLUMNS, None, rows))
+    while rows:
+        if encoder is not None:
+            produced += len(encoder.encode(rows))
+        rows = cursor.fetchmany(batch_size)
+    if encoder is not None:
+        produced += len(encoder.finish())
+    return produced
+
+
+def run(make_encoder, total: int, batch_size: int, template: list) -> tuple:
+    """(seconds, bytes produced, peak traced bytes); memory is traced in a second pass so it does not skew timing"""
+    start = time.perf_counter()
+    produced = export(make_encoder(), total, batch_size, template)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    export(make_encoder(), total, batch_size, template)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, produced, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    encoders = [("ndjson", NDJSONEncoder), ("fetch only", lambda: None), ("csv", CSVEncoder), ("csv.gz", GzipCSVEncoder)]
+    if result_formats.parquet is not None:
+        encoders.append(("parquet", ParquetEncoder))
+    template = make_rows(args.batch_size)
+
+    print("=" * 72)
+    print("📤 BULK EXPORT BENCHMARK")
+    print("=" * 72)
+    for total in [int(n) for n in args.rows.split(",")]:
+        print(f"\n{total} rows in batches of {args.batch_size}")
+        print(f"{'format':>12} {'rows/s':>12} {'vs ndjson':>10} {'bytes':>14} {'peak MB':>9}")
+        baseline = None
+        for name, make_encoder in encoders:
+            elapsed, produced, peak = run(make_encoder, total, args.batch_size, template)
+            rate = total / elapsed
+            baseline = baseline or rate
+            print(f"{name:>12} {rate:>12,.0f} {rate / baseline:>9.2f}x {produced:>14,} {peak / 2**20:>9.1f}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Offline Load Test
+Drives /query, /schema, /execute-sql and /auth/login at each concurrency level
+and reports throughput, p50/p95/p99 latency and the server's resident memory,
+so every optimization can be compared against a saved baseline.
+
+Everything can run locally: load the datasets once with load_sample_db.py,
+then let this script start the fake LLM (--fake-llm) and the backend itself
+(--start-server). The backend is then started with GROQ_BASE_URL pointing at
+the fake LLM and its RSS is sampled from /proc while each level runs. Against
+an already running backend pass --url (and --server-pid for RSS).
+
+    python benchmarks/load_sample_db.py --scales 1,10 --wide-tables 300
+    python benchmarks/bench_load.py --fake-llm --llm-latency-ms 400 --start-server \\
+        --databases classicmodels,classicmodels_x10,classicmodels_wide \\
+        --concurrency 1,10,50 --requests 200 --json after.json --baseline before.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_concurrency import default_connection, percentile  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SCENARIOS = ["query", "schema", "execute-sql", "login"]
+QUESTIONS = [
+    "Show me all customers from USA",
+    "Total payments per customer",
+    "How many orders are in each status?",
+    "Which products have the most stock?",
+    "List all employees and their job titles",
+    "Which offices do we have?",
+    "Revenue by customer country",
+]
+EXECUTE_SQL = (
+    "SELECT c.country, COUNT(*) AS orders FROM customers c "
+    "JOIN orders o ON o.customerNumber = c.customerNumber GROUP BY c.country ORDER BY orders DESC"
+)
+BENCH_USER = {
+    "name": "Benchmark User", "mobile": "0000000000", "email": "bench@example.com", "password": "benchmark-pass",
+}
+
+
+# ===============================
+# 🧪 LOCAL STAND-INS
+# ===============================
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{url} exited during startup (code {process.returncode})")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not come up within {timeout:g}s")
+
+
+def start_fake_llm(args) -> tuple:
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, os.path.join(os.path.dirname(__file__), "fake_llm.py"), "--port", str(port),
+        "--latency-ms", str(args.llm_latency_ms), "--jitter-ms", str(args.llm_jitter_ms),
+    ])
+    url = f"http://127.0.0.1:{port}"
+    wait_for(url, process)
+    return process, url
+
+
+def start_server(args, llm_url: str) -> tuple:
+    port = free_port()
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    # Every simulated user shares one address, so per-user limits are off unless set in the environment
+    for name in ("RATE_LIMIT_LLM_PER_MINUTE", "RATE_LIMIT_SQL_PER_MINUTE", "CONNECTION_MAX_CONCURRENT"):
+        env.setdefault(name, "0")
+    if llm_url:
+        env.update(GROQ_BASE_URL=llm_url, GROQ_API_KEY=env.get("GROQ_API_KEY") or "fake")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    wait_for(url, process)
+    return process, url
+
+
+class RSSSampler:
+    """Peak resident set size of a process, polled from /proc (Linux only)"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def current_kb(self):
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, self.current_kb() or 0)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_kb = self.current_kb() or 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._stop.set()
+        self._thread.join()
+
+
+# ===============================
+# 🚦 LOAD GENERATION
+# ===============================
+def scenario_requests(scenario: str, connection: dict):
+    """Endless (endpoint, payload) pairs for one scenario"""
+    if scenario == "query":
+        for question in itertools.cycle(QUESTIONS):
+            yield "/query", {"prompt": question, "connection": connection}
+    elif scenario == "schema":
+        while True:
+            yield "/schema", {"connection": connection}
+    elif scenario == "execute-sql":
+        while True:
+            yield "/execute-sql", {"sql": EXECUTE_SQL, "connection": connection}
+    elif scenario == "login":
+        while True:
+            yield "/auth/login", {"email": BENCH_USER["email"], "password": BENCH_USER["password"]}
+
+
+def failed(scenario: str, response: httpx.Response) -> bool:
+    if response.status_code != 200:
+        return True
+    body = response.json()
+    return ("error" in body) if scenario != "login" else not body.get("success")
+
+
+async def run_level(url: str, scenario: str, connection: dict, concurrency: int, total: int, cold: bool) -> dict:
+    latencies = []
+    errors = 0
+    requests = scenario_requests(scenario, connection)
+    remaining = iter(range(total))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for i in remaining:
+            endpoint, payload = next(requests)
+            if cold and scenario == "query":
+                # A question the SQL cache has never seen forces the schema/prompt/LLM path
+                payload = {**payload, "prompt": f"{payload['prompt']} (run {time.time_ns()}-{i})"}
+            start = time.perf_counter()
+            try:
+                if failed(scenario, await client.post(endpoint, json=payload)):
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "throughput": total / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+def ensure_user(url: str):
+    with httpx.Client(base_url=url, timeout=60) as client:
+        client.post("/auth/register", json=BENCH_USER)
+        response = client.post("/auth/login", json={"email": BENCH_USER["email"], "password": BENCH_USER["password"]})
+        if not response.json().get("success"):
+            raise SystemExit(f"Cannot log in as {BENCH_USER['email']}: {response.json().get('error')}")
+
+
+# ===============================
+# 📊 REPORT
+# ===============================
+def result_key(r: dict) -> str:
+    return f"{r['scenario']}|{r['database']}|{r['concurrency']}"
+
+
+def print_row(r: dict, baseline: dict):
+    rss = f"{r['rss_mb']:.0f}" if r["rss_mb"] is not None else "n/a"
+    line = (
+        f"{r['scenario']:>12} {r['database']:>20} {r['concurrency']:>6} {r['throughput']:>9.1f} "
+        f"{r['p50'] * 1000:>9.1f} {r['p95'] * 1000:>9.1f} {r['p99'] * 1000:>9.1f} {r['errors']:>7} {rss:>8}"
+    )
+    before = baseline.get(result_key(r))
+    if before:
+        line += f"   {r['throughput'] / before['throughput']:>5.2f}x req/s, p95 {before['p95'] * 1000:.1f} ms before"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("BACKEND_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--server-pid", type=int, help="backend PID for RSS when using --url")
+    parser.add_argument("--start-server", action="store_true", help="start uvicorn app:app on a free port")
+    parser.add_argument("--fake-llm", action="store_true", help="start fake_llm.py and point the started server at it")
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--databases", default="classicmodels")
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--cold", action="store_true", help="make every /query question unique (no SQL cache hits)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --json")
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        llm_url = None
+        if args.fake_llm:
+            llm, llm_url = start_fake_llm(args)
+            processes.append(llm)
+        url, pid = args.url, args.server_pid
+        if args.start_server:
+            server, url = start_server(args, llm_url)
+            processes.append(server)
+            pid = server.pid
+
+        scenarios = [s for s in args.scenarios.split(",") if s]
+        if "login" in scenarios:
+            ensure_user(url)
+        baseline = {}
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = {result_key(r): r for r in json.load(f)["results"]}
+
+        print("=" * 110)
+        print(f"🏋️ LOAD TEST  {url}  ({args.requests} requests per level, fake LLM: {llm_url or 'no'})")
+        print("=" * 110)
+        print(
+            f"{'scenario':>12} {'database':>20} {'conc':>6} {'req/s':>9} {'p50 ms':>9} "
+            f"{'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'RSS MB':>8}"
+        )
+        results = []
+        for scenario in scenarios:
+            # Login does not touch the target databases; run it once
+            databases = ["-"] if scenario == "login" else [d for d in args.databases.split(",") if d]
+            for database in databases:
+                connection = {**default_connection(), "database": database}
+                for level in [int(c) for c in args.concurrency.split(",")]:
+                    sampler = RSSSampler(pid) if pid else None
+                    with sampler or nullcontext():
+                        r = asyncio.run(run_level(url, scenario, connection, level, args.requests, args.cold))
+                    r.update(
+                        scenario=scenario, database=database, concurrency=level,
+                        rss_mb=sampler.peak_kb / 1024 if sampler and sampler.peak_kb else None,
+                    )
+                    results.append(r)
+                    print_row(r, baseline)
+        print("=" * 110)
+
+        if args.json:
+            with open(args.json, "w") as f:
+                summary = {"requests": args.requests, "llm_latency_ms": args.llm_latency_ms, "results": results}
+                json.dump(summary, f, indent=2)
+            print(f"💾 Results written to {args.json}")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Login Throughput Benchmark
+Hammers /auth/login with 1/10/100 concurrent clients and reports throughput,
+latency percentiles and how many requests were shed with 503. With bcrypt on
+the event loop every login serializes behind the previous one; with the
+password pool, throughput should scale up to PASSWORD_HASH_WORKERS.
+
+The benchmark user is registered on first run (the auth database must have the
+users table from users_authentication.sql).
+
+    uvicorn app:app --port 8000
+    python benchmarks/bench_login.py --concurrency 1,10,100 --requests 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_concurrency import percentile  # noqa: E402
+
+
+async def ensure_user(url: str, email: str, password: str):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        await client.post("/auth/register", json={
+            "name": "Benchmark User", "mobile": "0000000000", "email": email, "password": password,
+        })
+        response = await client.post("/auth/login", json={"email": email, "password": password})
+        if not response.json().get("success"):
+            raise SystemExit(f"Cannot log in as {email}: {response.json().get('error')}")
+
+
+async def run_level(url: str, payload: dict, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    shed = 0
+    remaining = iter(range(total))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors, shed
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.post("/auth/login", json=payload)
+                if response.status_code == 503:
+                    shed += 1
+                elif not response.json().get("success"):
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "throughput": total / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "shed": shed,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("BACKEND_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--email", default="bench-login@example.com")
+    parser.add_argument("--password", default="bench-login-password")
+    parser.add_argument("--concurrency", default="1,10,100")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(ensure_user(args.url, args.email, args.password))
+    payload = {"email": args.email, "password": args.password}
+
+    print("=" * 80)
+    print(f"🔑 LOGIN THROUGHPUT BENCHMARK  {args.url}/auth/login")
+    print("=" * 80)
+    print(f"{'clients':>8} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'503s':>8} {'errors':>8}")
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        r = asyncio.run(run_level(args.url, payload, level, args.requests))
+        print(
+            f"{r['concurrency']:>8} {r['throughput']:>10.1f} {r['p50'] * 1000:>10.1f} "
+            f"{r['p95'] * 1000:>10.1f} {r['p99'] * 1000:>10.1f} {r['shed']:>8} {r['errors']:>8}"
+        )
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
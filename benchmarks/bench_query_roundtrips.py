@@ -0,0 +1,115 @@
+"""
+/query Round-Trip Benchmark
+Replays the database side of one /query call with the old lifecycle (a
+connection just for SELECT 1, then another for the statement) and the new one
+(a single checkout, liveness left to pool pre-ping) and reports latency,
+checkouts and server round trips per request. The schema comes from the cache
+in both cases, as it does for every question after the first.
+
+Uses the DB_* settings from .env by default. Any SQLAlchemy URL works as a
+local stand-in; --rtt-ms then adds a simulated network round trip to every
+statement and pre-ping so the difference is visible without a remote server.
+
+    python benchmarks/bench_query_roundtrips.py [--requests 500]
+    python benchmarks/bench_query_roundtrips.py --url sqlite:///bench.sqlite3 --rtt-ms 0.5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from urllib.parse import quote_plus
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_concurrency import percentile  # noqa: E402
+
+load_dotenv()
+
+
+def default_url() -> str:
+    return (
+        f"mysql+pymysql://{os.getenv('DB_USER', 'root')}:{quote_plus(os.getenv('DB_PASSWORD', ''))}"
+        f"@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'classicmodels')}"
+    )
+
+
+def instrument(engine, rtt: float) -> dict:
+    """Count checkouts and statements; optionally sleep one simulated RTT per server round trip"""
+    counts = {"checkouts": 0, "statements": 0}
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(*_):
+        counts["checkouts"] += 1
+        if rtt:
+            time.sleep(rtt)  # the pre-ping
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_execute(*_):
+        counts["statements"] += 1
+        if rtt:
+            time.sleep(rtt)
+
+    return counts
+
+
+def old_lifecycle(engine, sql: str):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    with engine.connect() as conn:
+        conn.execute(text(sql)).fetchall()
+
+
+def new_lifecycle(engine, sql: str):
+    with engine.connect() as conn:
+        conn.execute(text(sql)).fetchall()
+
+
+def run(engine, counts: dict, fn, sql: str, total: int) -> dict:
+    fn(engine, sql)  # warm the pool
+    counts.update(checkouts=0, statements=0)
+    latencies = []
+    for _ in range(total):
+        start = time.perf_counter()
+        fn(engine, sql)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "checkouts": counts["checkouts"] / total,
+        # pre-ping costs one round trip per checkout on top of each statement
+        "round_trips": (counts["checkouts"] + counts["statements"]) / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=default_url())
+    parser.add_argument("--sql", default="SELECT 1 AS answer")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url, poolclass=QueuePool, pool_size=5, pool_pre_ping=True)
+    counts = instrument(engine, args.rtt_ms / 1000)
+
+    print("=" * 72)
+    print(f"🔁 /query ROUND-TRIP BENCHMARK  ({args.requests} requests, rtt {args.rtt_ms:g} ms)")
+    print("=" * 72)
+    print(f"{'lifecycle':>22} {'p50 (ms)':>10} {'p95 (ms)':>10} {'checkouts':>10} {'round trips':>12}")
+    for name, fn in [("ping + execute (old)", old_lifecycle), ("single checkout (new)", new_lifecycle)]:
+        r = run(engine, counts, fn, args.sql, args.requests)
+        print(
+            f"{name:>22} {r['p50'] * 1000:>10.3f} {r['p95'] * 1000:>10.3f} "
+            f"{r['checkouts']:>10.1f} {r['round_trips']:>12.1f}"
+        )
+    print("=" * 72)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Result Encoding Benchmark
+Compares payload size and encode time of the default row-dict JSON response
+against the columnar JSON, NDJSON and Arrow IPC encodings. Rows are synthetic
+orderdetails/payments-like tuples (int, str, Decimal, datetime), so no database
+is needed.
+
+    python benchmarks/bench_result_encoding.py [--rows 1000,100000] [--repeat 3]
+"""
+
+import argparse
+import datetime
+import decimal
+import json
+import os
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import result_formats  # noqa: E402
+from result_formats import (  # noqa: E402
+    ARROW_EOS, arrow_batch, arrow_schema, columnar_payload, dumps, ndjson_footer, ndjson_header, ndjson_rows,
+)
+
+COLUMNS = ["orderNumber", "productCode", "quantityOrdered", "priceEach", "orderLineNumber", "orderDate", "status"]
+BATCH_SIZE = 1000
+
+
+def make_rows(count: int) -> list:
+    base = datetime.datetime(2004, 1, 1)
+    return [
+        (
+            10100 + i // 10, f"S{i % 110:02d}_{i % 9999:04d}", 20 + i % 50,
+            decimal.Decimal(f"{50 + i % 200}.{i % 100:02d}"), i % 18 + 1,
+            base + datetime.timedelta(hours=i), "Shipped",
+        )
+        for i in range(count)
+    ]
+
+
+def batches(rows: list):
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start:start + BATCH_SIZE]
+
+
+def encode_row_dicts(rows: list) -> bytes:
+    # What the default path does: dict per row, then FastAPI's generic encoder
+    data = [dict(zip(COLUMNS, row)) for row in rows]
+    return json.dumps(jsonable_encoder({"data": data, "rowCount": len(data)})).encode("utf-8")
+
+
+def encode_columnar(rows: list) -> bytes:
+    return dumps(columnar_payload(COLUMNS, [], batches(rows))).encode("utf-8")
+
+
+def encode_ndjson(rows: list) -> bytes:
+    parts = [ndjson_header(COLUMNS)]
+    parts.extend(ndjson_rows(batch) for batch in batches(rows))
+    parts.append(ndjson_footer(rowCount=len(rows)))
+    return "".join(parts).encode("utf-8")
+
+
+def encode_arrow(rows: list) -> bytes:
+    schema = arrow_schema(COLUMNS, None, rows[:BATCH_SIZE])
+    parts = [schema.serialize().to_pybytes()]
+    parts.extend(arrow_batch(schema, batch) for batch in batches(rows))
+    parts.append(ARROW_EOS)
+    return b"".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    encoders = [("row dicts", encode_row_dicts), ("columnar", encode_columnar), ("ndjson", encode_ndjson)]
+    if result_formats.pyarrow is not None:
+        encoders.append(("arrow", encode_arrow))
+
+    print("=" * 60)
+    print("📦 RESULT ENCODING BENCHMARK")
+    print("=" * 60)
+    for count in [int(n) for n in args.rows.split(",")]:
+        rows = make_rows(count)
+        print(f"\n{count} rows")
+        print(f"{'encoding':>12} {'bytes':>14} {'vs dicts':>9} {'encode (ms)':>12} {'vs dicts':>9}")
+        baseline = None
+        for name, encode in encoders:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                payload = encode(rows)
+                timings.append(time.perf_counter() - start)
+            elapsed = min(timings)
+            if baseline is None:
+                baseline = (len(payload), elapsed)
+            print(
+                f"{name:>12} {len(payload):>14,} {len(payload) / baseline[0]:>8.2f}x "
+                f"{elapsed * 1000:>12.1f} {elapsed / baseline[1]:>8.2f}x"
+            )
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Schema Introspection Benchmark
+Compares the SHOW TABLES + DESCRIBE loop against the single information_schema
+query at 10, 100 and 1000 tables. Uses the DB_* settings from .env and creates
+(then drops) scratch databases named asklytics_bench_<n>.
+
+    python benchmarks/bench_schema_introspection.py [--sizes 10,100,1000] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from urllib.parse import quote_plus
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from schema_cache import introspect_schema_bulk, introspect_schema_describe  # noqa: E402
+
+load_dotenv()
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "3306")
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+
+
+def server_url(database: str = "") -> str:
+    return f"mysql+pymysql://{DB_USER}:{quote_plus(DB_PASSWORD)}@{DB_HOST}:{DB_PORT}/{database}"
+
+
+def create_scratch_database(name: str, table_count: int):
+    """Create a database with table_count tables of 8 columns, each FK-linked to the previous one"""
+    engine = create_engine(server_url())
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS `{name}`"))
+        conn.execute(text(f"CREATE DATABASE `{name}`"))
+        conn.execute(text(f"USE `{name}`"))
+        for i in range(table_count):
+            fk = f", FOREIGN KEY (parent_id) REFERENCES t{i - 1:04d}(id)" if i else ""
+            conn.execute(text(
+                f"CREATE TABLE t{i:04d} ("
+                "id INT PRIMARY KEY AUTO_INCREMENT, parent_id INT NULL, "
+                "name VARCHAR(64) NOT NULL, email VARCHAR(128) UNIQUE, "
+                "amount DECIMAL(10,2), created_at DATETIME, notes TEXT, flag TINYINT(1)"
+                f"{fk})"
+            ))
+    engine.dispose()
+
+
+def drop_scratch_database(name: str):
+    engine = create_engine(server_url())
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS `{name}`"))
+    engine.dispose()
+
+
+def time_loader(engine, loader, repeat: int) -> tuple:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        with engine.connect() as conn:
+            start = time.perf_counter()
+            result = loader(conn)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📚 SCHEMA INTROSPECTION BENCHMARK")
+    print("=" * 60)
+    print(f"{'tables':>8} {'describe (ms)':>15} {'bulk (ms)':>12} {'speedup':>9}")
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        name = f"asklytics_bench_{size}"
+        create_scratch_database(name, size)
+        try:
+            engine = create_engine(server_url(name))
+            describe_time, describe_schema = time_loader(engine, introspect_schema_describe, args.repeat)
+            bulk_time, bulk_schema = time_loader(engine, introspect_schema_bulk, args.repeat)
+            engine.dispose()
+        finally:
+            drop_scratch_database(name)
+
+        if describe_schema != bulk_schema:
+            print(f"❌ Structures differ at {size} tables")
+            sys.exit(1)
+        print(f"{size:>8} {describe_time * 1000:>15.1f} {bulk_time * 1000:>12.1f} {describe_time / bulk_time:>8.1f}x")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
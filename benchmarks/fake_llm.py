@@ -0,0 +1,147 @@
+"""
+Fake LLM Server
+A local stand-in for the Groq chat completions API so benchmarks measure the
+backend, not a remote model. It answers every request after a configurable
+latency with canned classicmodels SQL picked from keywords in the question,
+and supports streamed completions (/query/stream) at a fixed token rate.
+
+Point the backend at it with GROQ_BASE_URL (read by the Groq client) and any
+non-empty GROQ_API_KEY:
+
+    python benchmarks/fake_llm.py --port 8100 --latency-ms 400 --jitter-ms 100
+    GROQ_BASE_URL=http://127.0.0.1:8100 GROQ_API_KEY=fake uvicorn app:app --port 8000
+
+bench_load.py starts it for you with --fake-llm.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# First keyword found in the question wins; the fallback keeps unknown questions answerable
+CANNED_SQL = [
+    ("payment", "SELECT customerNumber, SUM(amount) AS total FROM payments GROUP BY customerNumber ORDER BY total DESC"),
+    ("order", "SELECT status, COUNT(*) AS orders FROM orders GROUP BY status"),
+    ("product", "SELECT productName, productLine, quantityInStock FROM products ORDER BY quantityInStock DESC"),
+    ("employee", "SELECT firstName, lastName, jobTitle FROM employees"),
+    ("office", "SELECT city, country FROM offices"),
+    ("revenue", (
+        "SELECT c.country, SUM(od.quantityOrdered * od.priceEach) AS revenue FROM customers c "
+        "JOIN orders o ON o.customerNumber = c.customerNumber "
+        "JOIN orderdetails od ON od.orderNumber = o.orderNumber GROUP BY c.country ORDER BY revenue DESC"
+    )),
+    ("usa", "SELECT customerName, city, creditLimit FROM customers WHERE country = 'USA'"),
+]
+FALLBACK_SQL = "SELECT customerName, country FROM customers"
+
+app = FastAPI(title="Fake LLM")
+settings = {"latency": 0.0, "jitter": 0.0, "tokens_per_second": 0.0}
+counters = {"requests": 0, "streamed": 0}
+
+
+def pick_sql(messages: list) -> str:
+    question = (messages[-1].get("content", "") if messages else "").split("User Question:")[-1].lower()
+    for keyword, sql in CANNED_SQL:
+        if keyword in question:
+            return sql
+    return FALLBACK_SQL
+
+
+def usage(messages: list, completion: str) -> dict:
+    # Roughly 4 characters per token, which is all the backend's token counters need
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    completion_tokens = max(1, len(completion) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+async def think():
+    delay = settings["latency"] + random.uniform(-settings["jitter"], settings["jitter"])
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def chunk(completion_id: str, model: str, delta: dict, finish_reason=None, **extra) -> str:
+    payload = {
+        "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra,
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def stream_completion(completion_id: str, model: str, messages: list, content: str):
+    # Time to first token is the configured latency; the rest arrives at tokens_per_second
+    await think()
+    yield chunk(completion_id, model, {"role": "assistant", "content": ""})
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        yield chunk(completion_id, model, {"content": word if i == 0 else " " + word})
+        if settings["tokens_per_second"]:
+            await asyncio.sleep(1 / settings["tokens_per_second"])
+    yield chunk(completion_id, model, {}, "stop", x_groq={"id": completion_id, "usage": usage(messages, content)})
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    model = body.get("model", "fake-llm")
+    content = f"{pick_sql(messages)};"
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    counters["requests"] += 1
+
+    if body.get("stream"):
+        counters["streamed"] += 1
+        return StreamingResponse(
+            stream_completion(completion_id, model, messages, content), media_type="text/event-stream"
+        )
+
+    await think()
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+            "logprobs": None,
+        }],
+        "usage": usage(messages, content),
+    }
+
+
+@app.get("/")
+async def health():
+    return {"status": "ok", **settings, **counters}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="time to answer (or to first token)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- noise on the latency")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="streamed token rate (0 = no delay)")
+    args = parser.parse_args()
+
+    settings.update(
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, tokens_per_second=args.tokens_per_second
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark Dataset Loader
+Loads mysqlsampledatabase.sql into MySQL once per benchmark database:
+
+    classicmodels            the sample as shipped
+    classicmodels_x10/x100   customers, payments, orders and orderdetails copied
+                             10x/100x with shifted keys (products, employees and
+                             offices stay as they are, like a real fact/dimension split)
+    classicmodels_wide       the sample plus --wide-tables synthetic tables, for
+                             schema introspection and pruning at hundreds of tables
+
+It also creates the users table from users_authentication.sql in DB_NAME so
+/auth/login can be benchmarked. Uses the DB_* settings from .env; --docker
+starts a throwaway MySQL 8 container on --docker-port instead and waits for it.
+
+    python benchmarks/load_sample_db.py --scales 1,10,100 --wide-tables 300
+    python benchmarks/load_sample_db.py --docker --docker-port 3307
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import time
+
+import pymysql
+from dotenv import load_dotenv
+from pymysql.constants import CLIENT
+
+load_dotenv()
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SAMPLE_SQL = os.path.join(ROOT, "mysqlsampledatabase.sql")
+USERS_SQL = os.path.join(ROOT, "users_authentication.sql")
+DOCKER_CONTAINER = "asklytics-bench-mysql"
+
+# Key columns shifted by KEY_STRIDE * copy so each copy is a disjoint set of customers and orders
+SCALED_TABLES = {
+    "customers": {"customerNumber"},
+    "payments": {"customerNumber"},
+    "orders": {"orderNumber", "customerNumber"},
+    "orderdetails": {"orderNumber"},
+}
+KEY_STRIDE = 1_000_000
+WIDE_WORDS = [
+    "account", "invoice", "shipment", "warehouse", "supplier", "campaign", "ticket", "refund",
+    "contract", "region", "vendor", "budget", "asset", "lead", "review", "coupon", "carrier", "batch",
+]
+WIDE_ROWS = 20
+
+
+def connect(args, database=None):
+    return pymysql.connect(
+        host=args.host, port=args.port, user=args.user, password=args.password, database=database,
+        client_flag=CLIENT.MULTI_STATEMENTS, autocommit=True,
+    )
+
+
+def run_script(conn, script: str):
+    """Execute a multi-statement script, draining every result set"""
+    with conn.cursor() as cur:
+        cur.execute(script)
+        while cur.nextset():
+            pass
+
+
+def start_docker(args):
+    subprocess.run(["docker", "rm", "-f", DOCKER_CONTAINER], capture_output=True)
+    subprocess.run([
+        "docker", "run", "-d", "--name", DOCKER_CONTAINER, "-p", f"{args.port}:3306",
+        "-e", f"MYSQL_ROOT_PASSWORD={args.password}", "mysql:8.0",
+    ], check=True)
+    deadline = time.monotonic() + 120
+    while True:
+        try:
+            connect(args).close()
+            return
+        except pymysql.err.OperationalError:
+            if time.monotonic() > deadline:
+                raise SystemExit("MySQL container did not accept connections within 120s")
+            time.sleep(2)
+
+
+def load_sample(conn, database: str):
+    with open(SAMPLE_SQL, encoding="utf-8") as f:
+        script = f.read()
+    script = re.sub(r"(CREATE DATABASE\s+IF NOT EXISTS|USE)\s+classicmodels;", rf"\1 `{database}`;", script)
+    run_script(conn, f"DROP DATABASE IF EXISTS `{database}`;\n{script}")
+
+
+def scale_up(conn, database: str, scale: int):
+    with conn.cursor() as cur:
+        cur.execute(f"USE `{database}`")
+        cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table, keys in SCALED_TABLES.items():
+            cur.execute(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+                (database, table),
+            )
+            columns = [row[0] for row in cur.fetchall()]
+            column_list = ", ".join(f"`{c}`" for c in columns)
+            for copy in range(1, scale):
+                shift = copy * KEY_STRIDE
+                select = ", ".join(f"`{c}` + {shift}" if c in keys else f"`{c}`" for c in columns)
+                anchor = sorted(keys)[0]  # copy only the original rows, never earlier copies
+                cur.execute(
+                    f"INSERT INTO `{table}` ({column_list}) "
+                    f"SELECT {select} FROM `{table}` WHERE `{anchor}` < {KEY_STRIDE}"
+                )
+        cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+
+def add_wide_tables(conn, database: str, count: int):
+    """count extra tables of 6-10 columns, every third one referencing customers"""
+    with conn.cursor() as cur:
+        cur.execute(f"USE `{database}`")
+        for i in range(count):
+            word = WIDE_WORDS[i % len(WIDE_WORDS)]
+            name = f"{word}_{i:03d}"
+            width = 6 + i % 5
+            columns = [f"`{word}_attr_{c}` VARCHAR(50)" for c in range(width - 2)]
+            fk = ""
+            if i % 3 == 0:
+                columns.append("`customerNumber` INT")
+                fk = ", FOREIGN KEY (`customerNumber`) REFERENCES customers (`customerNumber`)"
+            cur.execute(
+                f"CREATE TABLE `{name}` (`id` INT PRIMARY KEY, `created_at` DATETIME, "
+                f"{', '.join(columns)}{fk})"
+            )
+            attrs = [c.split("`")[1] for c in columns if c.startswith(f"`{word}_attr_")]
+            rows = []
+            for r in range(WIDE_ROWS):
+                values = [r, "2024-01-01 00:00:00", *(f"{word} {r}-{c}" for c in range(len(attrs)))]
+                if fk:
+                    values.append(103)  # a customer present in the sample
+                rows.append(values)
+            names = ["id", "created_at", *attrs] + (["customerNumber"] if fk else [])
+            cur.executemany(
+                f"INSERT INTO `{name}` ({', '.join(f'`{n}`' for n in names)}) "
+                f"VALUES ({', '.join(['%s'] * len(names))})",
+                rows,
+            )
+
+
+def create_users_table(conn, database: str):
+    with open(USERS_SQL, encoding="utf-8") as f:
+        script = f.read()
+    run_script(conn, f"CREATE DATABASE IF NOT EXISTS `{database}`;\nUSE `{database}`;\n{script}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("DB_PORT", "3306")))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--auth-database", default=os.getenv("DB_NAME", "classicmodels"))
+    parser.add_argument("--scales", default="1,10,100", help="row multipliers; 1 loads plain classicmodels")
+    parser.add_argument("--wide-tables", type=int, default=300, help="extra tables in classicmodels_wide (0 skips)")
+    parser.add_argument("--docker", action="store_true", help="start a mysql:8.0 container first")
+    parser.add_argument("--docker-port", type=int, default=3307)
+    args = parser.parse_args()
+
+    if args.docker:
+        args.host, args.port, args.user = "127.0.0.1", args.docker_port, "root"
+        args.password = args.password or "bench"
+        print(f"🐳 Starting {DOCKER_CONTAINER} on port {args.port} (root password: {args.password})")
+        start_docker(args)
+
+    conn = connect(args)
+    try:
+        for scale in [int(s) for s in args.scales.split(",") if s]:
+            database = "classicmodels" if scale == 1 else f"classicmodels_x{scale}"
+            start = time.perf_counter()
+            load_sample(conn, database)
+            if scale > 1:
+                scale_up(conn, database, scale)
+            print(f"✅ {database:<22} {time.perf_counter() - start:6.1f}s")
+        if args.wide_tables:
+            start = time.perf_counter()
+            load_sample(conn, "classicmodels_wide")
+            add_wide_tables(conn, "classicmodels_wide", args.wide_tables)
+            print(f"✅ {'classicmodels_wide':<22} {time.perf_counter() - start:6.1f}s (+{args.wide_tables} tables)")
+        create_users_table(conn, args.auth_database)
+        print(f"✅ users table in {args.auth_database}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
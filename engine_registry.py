@@ -0,0 +1,190 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote_plus
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+
+
+# ===============================
+# 🗄️ POOLED ENGINE REGISTRY
+# ===============================
+def connection_key(conn: dict) -> tuple:
+    """Build the registry key for a connection dict (password is hashed, never stored)"""
+    password_hash = hashlib.sha256(str(conn.get("password", "")).encode("utf-8")).hexdigest()
+    return (
+        str(conn.get("host", "")),
+        str(conn.get("port", "")),
+        str(conn.get("user", "")),
+        str(conn.get("database", "")),
+        password_hash,
+    )
+
+
+def database_key(conn: dict) -> str:
+    """The database a connection points at, whichever account it logs in as"""
+    return "|".join([str(conn.get("host", "")).lower(), str(conn.get("port", "")), str(conn.get("database", ""))])
+
+
+def connection_scope(conn: dict, secret: str) -> str:
+    """Opaque id for a connection that is safe to persist: an HMAC of its registry key under the server secret"""
+    raw = "|".join(connection_key(conn))
+    return hmac.new(secret.encode("utf-8"), raw.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def connection_id(key: tuple) -> str:
+    """Opaque short id for a registry key, safe to expose on the unauthenticated health endpoint"""
+    return hashlib.sha256("|".join(key).encode("utf-8")).hexdigest()[:16]
+
+
+# MySQL codes meaning "could not reach or log in to the server", as opposed to a bad statement
+CONNECTION_ERROR_CODES = {
+    1044,  # access denied to database
+    1045,  # access denied for user
+    1049,  # unknown database
+    2002,  # can't connect through socket
+    2003,  # can't connect to server
+    2005,  # unknown host
+    2006,  # server has gone away
+    2013,  # lost connection during query
+}
+
+
+def is_connection_error(exc: Exception) -> bool:
+    """True when exc came from connecting/authenticating rather than from running SQL"""
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    args = getattr(getattr(exc, "orig", None), "args", ())
+    return bool(args) and args[0] in CONNECTION_ERROR_CODES
+
+
+class EngineRegistry:
+    """Process-wide cache of SQLAlchemy engines keyed by connection identity"""
+
+    def __init__(self, max_size=16, idle_ttl=600, pool_size=5, max_overflow=10,
+                 pool_pre_ping=True, pool_recycle=1800):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_pre_ping = pool_pre_ping
+        self.pool_recycle = pool_recycle
+
+        self._entries = OrderedDict()
+        # Counters outlive their engine so re-created entries keep their history
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _build_engine(self, conn: dict):
+        # URL-encode the password to handle special characters like @, #, etc.
+        encoded_password = quote_plus(conn['password'])
+        db_url = (
+            f"mysql+pymysql://{conn['user']}:{encoded_password}"
+            f"@{conn['host']}:{conn['port']}/{conn['database']}"
+        )
+        return create_engine(
+            db_url,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_pre_ping=self.pool_pre_ping,
+            pool_recycle=self.pool_recycle,
+        )
+
+    def _counter(self, key: tuple) -> dict:
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = {"hits": 0, "misses": 0, "evictions": 0}
+            self._counters[key] = counter
+            while len(self._counters) > self.max_size * 4:
+                self._counters.popitem(last=False)
+        else:
+            self._counters.move_to_end(key)
+        return counter
+
+    def _evict(self, key: tuple):
+        entry = self._entries.pop(key)
+        entry["engine"].dispose()
+        self.evictions += 1
+        self._counter(key)["evictions"] += 1
+
+    def _evict_idle(self, now: float):
+        if not self.idle_ttl:
+            return
+        expired = [k for k, e in self._entries.items() if now - e["last_used"] > self.idle_ttl]
+        for key in expired:
+            self._evict(key)
+
+    def get(self, conn: dict):
+        """Return the shared engine for this connection, creating it on first use"""
+        key = connection_key(conn)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["last_used"] = now
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._counter(key)["hits"] += 1
+                return entry["engine"]
+
+            engine = self._build_engine(conn)
+            self._entries[key] = {"engine": engine, "created": now, "last_used": now}
+            self.misses += 1
+            self._counter(key)["misses"] += 1
+            while len(self._entries) > self.max_size:
+                self._evict(next(iter(self._entries)))
+            return engine
+
+    def invalidate(self, conn: dict) -> bool:
+        """Dispose and forget the engine for this connection, if any"""
+        key = connection_key(conn)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._evict(key)
+            return True
+
+    def dispose_all(self):
+        """Dispose every cached engine (used at shutdown)"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry["engine"].dispose()
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Registry-wide and per-entry counters for the health endpoint"""
+        now = time.monotonic()
+        with self._lock:
+            entries = []
+            for key, entry in self._entries.items():
+                counter = self._counters.get(key, {})
+                pool = entry["engine"].pool
+                entries.append({
+                    "connection": connection_id(key),
+                    "hits": counter.get("hits", 0),
+                    "misses": counter.get("misses", 0),
+                    "evictions": counter.get("evictions", 0),
+                    "idle_seconds": round(now - entry["last_used"], 1),
+                    "pool": {
+                        "size": pool.size(),
+                        "checked_in": pool.checkedin(),
+                        "checked_out": pool.checkedout(),
+                        "overflow": pool.overflow(),
+                    },
+                })
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "idle_ttl": self.idle_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+            }
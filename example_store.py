@@ -0,0 +1,161 @@
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from schema_pruning import tokenize
+from sql_cache import SQLiteWriter, normalize_prompt
+
+
+# ===============================
+# 🧩 FEW-SHOT EXAMPLE STORE
+# ===============================
+def example_scope(conn: dict) -> str:
+    """Examples belong to a database, whoever queries it (credentials are not part of the scope)"""
+    return f"{conn.get('host', '')}:{conn.get('port', '')}/{conn.get('database', '')}"
+
+
+class ExampleIndex:
+    """BM25 over the questions of one database's examples, updated in place as examples come and go.
+
+    Document frequencies are kept as counts and turned into IDF per query term, so adding or
+    dropping an example touches only that example's terms.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs = {}
+        self._df = Counter()
+        self._total_len = 0
+
+    def add(self, key: str, example: dict):
+        self.remove(key)
+        doc = Counter(tokenize(example["question"]))
+        length = sum(doc.values())
+        self._docs[key] = (example, doc, length)
+        self._df.update(doc.keys())
+        self._total_len += length
+
+    def remove(self, key: str):
+        entry = self._docs.pop(key, None)
+        if entry is None:
+            return
+        _, doc, length = entry
+        self._df.subtract(doc.keys())
+        for term in doc:
+            if self._df[term] <= 0:
+                del self._df[term]
+        self._total_len -= length
+
+    def search(self, question: str, top_k: int) -> list:
+        terms = [term for term in set(tokenize(question)) if term in self._df]
+        if not terms:
+            return []
+        n = len(self._docs)
+        idf = {term: math.log(1 + (n - self._df[term] + 0.5) / (self._df[term] + 0.5)) for term in terms}
+        avg_len = self._total_len / n
+        scored = []
+        for order, (example, doc, length) in enumerate(self._docs.values()):
+            total = 0.0
+            for term in terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / (avg_len or 1))
+                    total += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if total > 0:
+                scored.append((total, order, example))
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [example for _, _, example in scored[:top_k]]
+
+
+class ExampleStore:
+    """Verified (question, SQL) pairs per database, recorded from queries that ran successfully.
+
+    Each database keeps its newest max_per_scope examples in a BM25 index that is built on the
+    first search and then updated in place. When db_path is set, examples persist to SQLite
+    across restarts; writes go through a background thread so recording never waits on disk.
+    """
+
+    def __init__(self, max_per_scope=500, db_path=""):
+        self.max_per_scope = max_per_scope
+        self._scopes = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self.added = 0
+        self.searches = 0
+        self.search_seconds = 0.0
+
+        self._writer = None
+        if db_path:
+            db = sqlite3.connect(db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sql_examples ("
+                "scope TEXT NOT NULL, question_key TEXT NOT NULL, question TEXT NOT NULL, "
+                "sql TEXT NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (scope, question_key))"
+            )
+            db.commit()
+            rows = db.execute(
+                "SELECT scope, question_key, question, sql FROM sql_examples ORDER BY created_at"
+            ).fetchall()
+            for scope, key, question, sql in rows:
+                self._scopes.setdefault(scope, OrderedDict())[key] = {"question": question, "sql": sql}
+            self._writer = SQLiteWriter(db, "few-shot")
+
+    def add(self, scope: str, question: str, sql: str):
+        key = normalize_prompt(question)
+        if not key:
+            return
+        example = {"question": question.strip(), "sql": sql}
+        with self._lock:
+            examples = self._scopes.setdefault(scope, OrderedDict())
+            examples[key] = example
+            examples.move_to_end(key)
+            dropped = []
+            while len(examples) > self.max_per_scope:
+                dropped.append(examples.popitem(last=False)[0])
+            index = self._indexes.get(scope)
+            if index is not None:
+                for old in dropped:
+                    index.remove(old)
+                index.add(key, example)
+            self.added += 1
+        if self._writer is not None:
+            self._writer.submit(
+                (
+                    "INSERT OR REPLACE INTO sql_examples (scope, question_key, question, sql, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (scope, key, example["question"], sql, time.time()),
+                ),
+                ("DELETE FROM sql_examples WHERE scope = ? AND question_key = ?", [(scope, k) for k in dropped]),
+            )
+
+    def search(self, scope: str, question: str, top_k: int = 3) -> list:
+        """Up to top_k [{question, sql}] most similar to question, best first"""
+        start = time.perf_counter()
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None and self._scopes.get(scope):
+                index = self._indexes[scope] = ExampleIndex()
+                for key, example in self._scopes[scope].items():
+                    index.add(key, example)
+            found = index.search(question, top_k) if index is not None else []
+            self.searches += 1
+            self.search_seconds += time.perf_counter() - start
+        return found
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "databases": len(self._scopes),
+                "examples": sum(len(e) for e in self._scopes.values()),
+                "persistent": self._writer is not None,
+                "added": self.added,
+                "searches": self.searches,
+                "avg_search_ms": round(self.search_seconds / self.searches * 1000, 3) if self.searches else 0.0,
+            }
@@ -0,0 +1,208 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+# ===============================
+# 📝 LEVELED LOGGING
+# ===============================
+def configure_logging(level: str = "INFO") -> logging.Logger:
+    """The app logger; LOG_LEVEL=OFF silences it entirely"""
+    logger = logging.getLogger("asklytics")
+    logger.propagate = False
+    if level.upper() == "OFF":
+        logger.disabled = True
+        return logger
+    logger.setLevel(level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """One structured line: event name followed by its fields as compact JSON"""
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s %s", event, json.dumps(fields, default=str, separators=(",", ":")))
+
+
+# ===============================
+# ⏱️ PER-REQUEST PHASE SPANS
+# ===============================
+_current_timer = contextvars.ContextVar("asklytics_request_timer", default=None)
+
+
+class RequestTimer:
+    """Seconds spent per phase (summed when a phase repeats) plus free-form fields for the request log"""
+
+    def __init__(self):
+        self.phases = {}
+        self.fields = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def span(phase: str):
+    """Time a block and charge it to the current request's phase (no-op outside a request)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.add(phase, time.perf_counter() - start)
+
+
+def annotate(**fields):
+    """Attach fields (token counts, cache hits, ...) to the current request's log line"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.fields.update(fields)
+
+
+# ===============================
+# 📈 PROMETHEUS METRICS
+# ===============================
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    le = _labels(self.labelnames, values, f'le="{bound:g}"')
+                    lines.append(f"{self.name}_bucket{le} {count}")
+                inf = _labels(self.labelnames, values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf} {series['count']}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {series['sum']}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Just enough of the Prometheus text format for counters and histograms, without the client library"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4"
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class TimingMiddleware:
+    """ASGI middleware: one request histogram sample, one sample per phase, and one structured log line.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses and disconnect polling are untouched.
+    """
+
+    def __init__(self, app, requests: Histogram, phases: Histogram, logger: logging.Logger):
+        self.app = app
+        self.requests = requests
+        self.phases = phases
+        self.logger = logger
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+        token = _current_timer.set(timer)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            _current_timer.reset(token)
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            self.requests.observe(duration, endpoint, scope["method"], str(status["code"]))
+            for phase, seconds in timer.phases.items():
+                self.phases.observe(seconds, endpoint, phase)
+            log_event(
+                self.logger, logging.INFO, "request",
+                endpoint=endpoint, method=scope["method"], status=status["code"],
+                duration_ms=round(duration * 1000, 1),
+                phases_ms={phase: round(seconds * 1000, 1) for phase, seconds in timer.phases.items()},
+                **timer.fields,
+            )
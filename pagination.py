@@ -0,0 +1,122 @@
+import hashlib
+import hmac
+import re
+from datetime import datetime, timedelta
+
+import jwt
+
+
+# ===============================
+# 📄 ROW LIMITS & PAGINATION
+# ===============================
+# Trailing "LIMIT n", "LIMIT off, n" or "LIMIT n OFFSET off" at the very end of the statement
+TRAILING_LIMIT = re.compile(
+    r"\s+LIMIT\s+(\d+)(?:\s*,\s*(\d+)|\s+OFFSET\s+(\d+))?\s*;?\s*$", re.IGNORECASE
+)
+
+# Clauses after which a bare LIMIT cannot be appended safely
+UNSAFE_TAIL = re.compile(r"\b(FOR\s+UPDATE|LOCK\s+IN\s+SHARE\s+MODE|INTO\s+(OUT|DUMP)FILE|INTO\s+@)", re.IGNORECASE)
+
+
+def clamp_limit(requested, default_limit: int, max_limit: int) -> int:
+    """Requested page size bounded to [1, max_limit], default_limit when absent or invalid"""
+    try:
+        limit = int(requested) if requested is not None else default_limit
+    except (TypeError, ValueError):
+        limit = default_limit
+    return max(1, min(limit, max_limit))
+
+
+def strip_trailing_comments(sql: str) -> str:
+    """sql up to its last token: trailing --, # and /* */ comments and whitespace are dropped.
+
+    Optimizer hints (/*+ */) and versioned comments (/*! */) are code to MySQL and are kept.
+    """
+    end = 0
+    quote = None
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if quote:
+            if ch == "\\" and quote != "`":
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+                end = i + 1
+        elif ch == "#" or (sql.startswith("--", i) and sql[i + 2:i + 3] in ("", " ", "\t", "\r", "\n")):
+            newline = sql.find("\n", i)
+            i = len(sql) if newline == -1 else newline + 1
+            continue
+        elif sql.startswith("/*", i) and not sql.startswith(("/*!", "/*+"), i):
+            close = sql.find("*/", i + 2)
+            i = len(sql) if close == -1 else close + 2
+            continue
+        elif ch in "'\"`":
+            quote = ch
+        elif not ch.isspace():
+            end = i + 1
+        i += 1
+    return sql[:end]
+
+
+def paginate_sql(sql: str, limit: int, offset: int = 0):
+    """Rewrite a SELECT so MySQL only returns `limit` rows starting at `offset` of its own window.
+
+    An existing trailing LIMIT is kept as the outer window and clamped. Returns
+    (sql, True) when rewritten, or (sql, False) when the caller must cap the fetch instead.
+    """
+    # A trailing comment would swallow an appended LIMIT, so it goes before anything is matched or added
+    stripped = strip_trailing_comments(strip_trailing_comments(sql).rstrip(";")).strip()
+    if not stripped.upper().startswith("SELECT") or UNSAFE_TAIL.search(stripped):
+        return sql, False
+
+    match = TRAILING_LIMIT.search(stripped)
+    if match is None:
+        return f"{stripped}\nLIMIT {limit} OFFSET {offset}", True
+
+    if match.group(2) is not None:
+        user_offset, user_limit = int(match.group(1)), int(match.group(2))
+    else:
+        user_limit, user_offset = int(match.group(1)), int(match.group(3) or 0)
+    window = max(0, min(limit, user_limit - offset))
+    return f"{stripped[:match.start()]}\nLIMIT {window} OFFSET {user_offset + offset}", True
+
+
+PAGE_TOKEN_TYPE = "page"
+
+
+def page_token_key(secret: str) -> str:
+    """Signing key for page tokens, derived so they can never pass for auth tokens or the reverse"""
+    return hmac.new(secret.encode("utf-8"), b"page-token", hashlib.sha256).hexdigest()
+
+
+def encode_page_token(secret: str, sql: str, offset: int, limit: int, ttl_minutes: int = 60) -> str:
+    """Signed continuation token carrying the SQL, so the next page never re-runs the LLM"""
+    payload = {
+        "typ": PAGE_TOKEN_TYPE,
+        "sql": sql,
+        "offset": offset,
+        "limit": limit,
+        "exp": datetime.utcnow() + timedelta(minutes=ttl_minutes),
+    }
+    return jwt.encode(payload, page_token_key(secret), algorithm="HS256")
+
+
+def decode_page_token(secret: str, token: str) -> dict:
+    """Return {sql, offset, limit}; raises ValueError when the token is invalid, expired or not a page token"""
+    if not isinstance(token, str):
+        raise ValueError("Invalid page token")
+    try:
+        payload = jwt.decode(token, page_token_key(secret), algorithms=["HS256"], options={"require": ["exp"]})
+    except jwt.ExpiredSignatureError:
+        raise ValueError("Page token has expired; run the query again")
+    except jwt.InvalidTokenError:
+        raise ValueError("Invalid page token")
+    sql, offset, limit = payload.get("sql"), payload.get("offset"), payload.get("limit")
+    if (
+        payload.get("typ") != PAGE_TOKEN_TYPE or not isinstance(sql, str) or not sql.strip()
+        or type(offset) is not int or offset < 0 or type(limit) is not int or limit < 1
+    ):
+        raise ValueError("Invalid page token")
+    return {"sql": sql, "offset": offset, "limit": limit}
@@ -0,0 +1,93 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+
+
+# ===============================
+# 🔑 PASSWORD HASHING POOL
+# ===============================
+class PasswordPoolBusy(Exception):
+    """Raised when too many hash/verify jobs are already waiting for a worker"""
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def hash_rounds(hashed: str):
+    """Cost factor stored in a $2b$12$... hash, or None when it cannot be read"""
+    parts = hashed.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated bounded pool and sheds load once its queue is full.
+
+    bcrypt releases the GIL, so threads scale across cores; mode="process" is there
+    for interpreters where that does not hold.
+    """
+
+    def __init__(self, rounds=12, workers=4, max_queue=64, mode="thread"):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self.mode = mode
+        if mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolBusy("Authentication service is busy, please retry shortly")
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit(_verify, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when the stored hash was made with a different cost than the configured one"""
+        return hash_rounds(hashed) != self.rounds
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+            }
@@ -0,0 +1,97 @@
+import re
+import threading
+import weakref
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+
+# ===============================
+# ⏱️ QUERY TIMEOUTS & CANCELLATION
+# ===============================
+LEADING_SELECT = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+
+class QueryCancelled(Exception):
+    """Raised when a statement was killed for running past its deadline or losing its client"""
+
+    def __init__(self, reason: str, timeout: float):
+        self.reason = reason
+        self.timeout = timeout
+        if reason == "timeout":
+            message = f"Query exceeded the {timeout:g}s time limit and was cancelled."
+        else:
+            message = "Query was cancelled because the client disconnected."
+        super().__init__(message)
+
+
+class QueryHandle:
+    """Remembers which MySQL server thread runs a statement so another connection can kill it.
+
+    A cancel that arrives before the statement has a connection stays pending, and attach
+    raises QueryCancelled instead of letting the statement start.
+    """
+
+    def __init__(self):
+        self.thread_id = None
+        self.cancelled = None
+        self._lock = threading.Lock()
+
+    def attach(self, conn):
+        # PyMySQL knows its server thread id from the handshake, so this costs no round trip
+        try:
+            thread_id = conn.connection.dbapi_connection.thread_id()
+        except AttributeError:
+            thread_id = None
+        with self._lock:
+            self.thread_id = thread_id
+            cancelled = self.cancelled
+        if cancelled is not None:
+            raise QueryCancelled(*cancelled)
+
+    def cancel(self, engine, reason: str, timeout: float):
+        """Kill the statement if it is running, otherwise stop it from starting"""
+        with self._lock:
+            self.cancelled = (reason, timeout)
+            thread_id = self.thread_id
+        kill_query(engine, thread_id)
+
+
+def clamp_timeout(requested, default_seconds: float, max_seconds: float) -> float:
+    try:
+        timeout = float(requested) if requested is not None else default_seconds
+    except (TypeError, ValueError):
+        timeout = default_seconds
+    return max(0.1, min(timeout, max_seconds))
+
+
+def add_execution_time_hint(sql: str, timeout_seconds: float) -> str:
+    """Prefix a SELECT with MAX_EXECUTION_TIME so MySQL aborts it server-side at the deadline"""
+    if "/*+" in sql or not LEADING_SELECT.match(sql):
+        return sql
+    ms = max(1, int(timeout_seconds * 1000))
+    return LEADING_SELECT.sub(f"SELECT /*+ MAX_EXECUTION_TIME({ms}) */", sql, count=1)
+
+
+# Unpooled twins of the query engines, so a KILL never waits behind the checkouts it is meant to free
+_kill_engines = weakref.WeakKeyDictionary()
+_kill_engines_lock = threading.Lock()
+
+
+def kill_engine(engine):
+    with _kill_engines_lock:
+        killer = _kill_engines.get(engine)
+        if killer is None:
+            killer = _kill_engines[engine] = create_engine(engine.url, poolclass=NullPool)
+        return killer
+
+
+def kill_query(engine, thread_id):
+    """Abort the statement running on thread_id over a fresh connection outside engine's pool.
+
+    The killed statement's own connection stays usable and returns to the pool.
+    """
+    if thread_id is None:
+        return
+    with kill_engine(engine).connect() as conn:
+        conn.execute(text(f"KILL QUERY {int(thread_id)}"))
@@ -0,0 +1,372 @@
+import asyncio
+import gzip
+import json
+import os
+import secrets
+import time
+
+import result_formats
+from result_formats import arrow_record_batch, arrow_schema, ndjson_header, ndjson_rows
+
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+
+class JobQueueFull(Exception):
+    """Raised when max_queued jobs are already waiting for a worker"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's runner once the job has been cancelled"""
+
+
+# ===============================
+# 💾 SPILLED RESULTS
+# ===============================
+class NDJSONSpill:
+    """Gzip-compressed NDJSON on disk: the meta line with the columns, then one JSON array per row"""
+
+    format = "ndjson"
+    extension = ".ndjson.gz"
+
+    def __init__(self, path: str, columns: list, description=None, first_rows=()):
+        self.path = path
+        self.columns = columns
+        self._file = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+        self._file.write(ndjson_header(columns))
+
+    def write(self, rows):
+        self._file.write(ndjson_rows(rows))
+
+    def close(self):
+        self._file.close()
+
+    @staticmethod
+    def read_page(path: str, offset: int, limit: int) -> list:
+        rows = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            next(f, None)  # meta line
+            for index, line in enumerate(f):
+                if index >= offset + limit:
+                    break
+                if index >= offset:
+                    rows.append(json.loads(line))
+        return rows
+
+    @staticmethod
+    def iter_ndjson(path: str, columns: list, chunk_size=64 * 1024):
+        with gzip.open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class ArrowSpill:
+    """Arrow IPC file on disk: typed columns, one record batch per fetch, memory-mapped for paging"""
+
+    format = "arrow"
+    extension = ".arrow"
+
+    def __init__(self, path: str, columns: list, description=None, first_rows=()):
+        self.path = path
+        self.columns = columns
+        self.schema = arrow_schema(columns, description, list(first_rows))
+        self._sink = result_formats.pyarrow.OSFile(path, "wb")
+        self._writer = result_formats.pyarrow.ipc.new_file(self._sink, self.schema)
+
+    def write(self, rows):
+        self._writer.write_batch(arrow_record_batch(self.schema, rows))
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
+
+    @staticmethod
+    def read_page(path: str, offset: int, limit: int) -> list:
+        with result_formats.pyarrow.memory_map(path) as source:
+            table = result_formats.pyarrow.ipc.open_file(source).read_all().slice(offset, limit)
+            columns = [column.to_pylist() for column in table.columns]
+        return [list(row) for row in zip(*columns)]
+
+    @staticmethod
+    def iter_ndjson(path: str, columns: list):
+        yield ndjson_header(columns)
+        with result_formats.pyarrow.memory_map(path) as source:
+            reader = result_formats.pyarrow.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield ndjson_rows(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+SPILL_FORMATS = {"ndjson": NDJSONSpill, "arrow": ArrowSpill}
+
+
+# ===============================
+# 🧵 QUERY JOBS
+# ===============================
+class Job:
+    """One background query: its state, progress and (once finished) where its rows were spilled"""
+
+    def __init__(self, job_id: str, sql=None):
+        self.id = job_id
+        self.status = "queued"
+        self.sql = sql
+        self.rows = 0
+        self.truncated = False
+        self.columns = None
+        self.error = None
+        self.spill = None
+        self.spill_format = None
+        self.path = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.expires_at = None
+        self.task = None
+        self.meta = {}
+        self.cancel_requested = False
+        self._cancelled = asyncio.Event()
+        self.forget_when_finished = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def request_cancel(self):
+        self.cancel_requested = True
+        self._cancelled.set()
+
+    async def is_disconnected(self) -> bool:
+        """A cancelled job looks like a disconnected client, so run_with_deadline kills its query"""
+        return self.cancel_requested
+
+    async def unless_cancelled(self, awaitable):
+        """Await awaitable, abandoning it the moment the job is cancelled (raises JobCancelled)"""
+        work = asyncio.ensure_future(awaitable)
+        cancelled = asyncio.ensure_future(self._cancelled.wait())
+        try:
+            await asyncio.wait({work, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancelled.cancel()
+        if not work.done():
+            work.cancel()
+            raise JobCancelled()
+        return work.result()
+
+    def fail(self, message: str):
+        self.status = "failed"
+        self.error = message
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "sql": self.sql,
+            "rowsFetched": self.rows,
+            "truncated": self.truncated,
+            "columns": self.columns,
+            "error": self.error,
+            "format": self.spill_format,
+            "bytes": os.path.getsize(self.path) if self.path and os.path.exists(self.path) else 0,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "expiresAt": self.expires_at,
+            **self.meta,
+        }
+
+
+class JobManager:
+    """Runs query jobs on a bounded pool of asyncio workers and spills their rows to disk.
+
+    A job's runner is an async callable run(job) that opens the spill with job_manager.open_spill,
+    writes to it as rows arrive and closes it from the thread that wrote it: the manager never
+    closes a spill itself, since a cancelled query's thread may still be writing. Finished jobs
+    and their files are deleted ttl seconds after they finish. Jobs live in this process only;
+    spill files left by a previous run are removed at start.
+    """
+
+    def __init__(self, spill_dir: str, workers=2, max_queued=100, ttl=3600, spill_format="auto"):
+        self.spill_dir = spill_dir
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.spill_class = self._spill_class(spill_format)
+        self._jobs = {}
+        self._queue = None
+        self._tasks = []
+        self.submitted = 0
+        self.rejected = 0
+        self.expired = 0
+
+    @staticmethod
+    def _spill_class(spill_format: str):
+        if spill_format == "auto":
+            return ArrowSpill if result_formats.pyarrow is not None else NDJSONSpill
+        if spill_format == "arrow" and result_formats.pyarrow is None:
+            raise RuntimeError("JOB_SPILL_FORMAT=arrow needs the optional pyarrow package (pip install pyarrow).")
+        return SPILL_FORMATS[spill_format]
+
+    def start(self):
+        """Create the spill directory and worker tasks (idempotent; needs a running event loop)"""
+        if self._queue is not None:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        for name in os.listdir(self.spill_dir):
+            if name.startswith("job-"):
+                os.remove(os.path.join(self.spill_dir, name))
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._sweeper()))
+
+    async def shutdown(self):
+        running = [job.task for job in self._jobs.values() if job.task is not None]
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+        await asyncio.gather(*running, return_exceptions=True)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, run, sql=None) -> Job:
+        """Queue run(job) for the next free worker; raises JobQueueFull past max_queued"""
+        self.start()
+        self.cleanup()
+        queued = sum(1 for job in self._jobs.values() if job.status == "queued")
+        if queued >= self.max_queued:
+            self.rejected += 1
+            raise JobQueueFull(f"{queued} jobs are already waiting. Please try again shortly.")
+        job = Job(secrets.token_urlsafe(16), sql)
+        self._jobs[job.id] = job
+        self._queue.put_nowait((job, run))
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str):
+        self.cleanup()
+        return self._jobs.get(job_id)
+
+    def open_spill(self, job: Job, columns: list, description=None, first_rows=()):
+        """Start the job's result file (blocking file I/O: call it off the event loop)"""
+        if job.cancel_requested or job.finished:
+            raise JobCancelled()  # a query that outlived its job must not leave a file behind
+        spill_class = self.spill_class
+        job.path = os.path.join(self.spill_dir, f"job-{job.id}{spill_class.extension}")
+        job.columns = columns
+        job.spill_format = spill_class.format
+        job.spill = spill_class(job.path, columns, description, first_rows)
+        return job.spill
+
+    def read_page(self, job: Job, offset: int, limit: int) -> list:
+        """Rows [offset, offset + limit) of a finished job's result (blocking file I/O)"""
+        if job.path is None:
+            return []
+        return SPILL_FORMATS[job.spill_format].read_page(job.path, offset, limit)
+
+    def iter_ndjson(self, job: Job):
+        """A finished job's whole result as NDJSON chunks: the meta line, then one array per row"""
+        if job.path is None:
+            return iter([ndjson_header(job.columns or [])])
+        return SPILL_FORMATS[job.spill_format].iter_ndjson(job.path, job.columns)
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a queued or running job; False if it already finished or does not exist.
+
+        A running job stops at its next cancellation point (its query is killed) and then
+        shows as cancelled.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.request_cancel()
+        if job.status == "queued":
+            job.status = "cancelled"
+            self._finish(job)
+        return True
+
+    def delete(self, job_id: str) -> bool:
+        """Cancel the job if needed, then forget it and delete its result file"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.finished:
+            self._discard(job)
+            del self._jobs[job_id]
+        else:
+            # The runner may still be writing the file; _finish expires the job immediately instead
+            job.forget_when_finished = True
+            self.cancel(job_id)
+            self.cleanup()
+        return True
+
+    def cleanup(self) -> int:
+        """Drop finished jobs past their expiry along with their files"""
+        now = time.time()
+        expired = [job for job in self._jobs.values() if job.expires_at is not None and job.expires_at <= now]
+        for job in expired:
+            self._discard(job)
+            del self._jobs[job.id]
+        self.expired += len(expired)
+        return len(expired)
+
+    def _discard(self, job: Job):
+        # A runner thread still writing keeps its open file; unlinking it only drops the name
+        job.spill = None
+        if job.path and os.path.exists(job.path):
+            os.remove(job.path)
+
+    def _finish(self, job: Job):
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at if job.forget_when_finished else job.finished_at + self.ttl
+        if job.status != "succeeded":
+            self._discard(job)
+
+    async def _run(self, job: Job, run):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            await run(job)
+            if job.cancel_requested:
+                raise JobCancelled()
+            if job.status == "running":
+                job.status = "succeeded"
+        except (JobCancelled, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            if not job.cancel_requested:
+                job.fail(f"Job failed: {e}")
+        finally:
+            if job.cancel_requested and job.status == "running":
+                job.status = "cancelled"
+            job.task = None
+            self._finish(job)
+
+    async def _worker(self):
+        while True:
+            job, run = await self._queue.get()
+            if job.status != "queued":
+                continue  # cancelled while waiting
+            job.task = asyncio.ensure_future(self._run(job, run))
+            await asyncio.wait({job.task})
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(min(self.ttl, 60))
+            self.cleanup()
+
+    def stats(self) -> dict:
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": self.workers,
+            "spill_format": self.spill_class.format,
+            **counts,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
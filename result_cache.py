@@ -0,0 +1,123 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+# ===============================
+# 🗃️ READ-ONLY RESULT CACHE
+# ===============================
+TABLE_NAME = r"(?:`[^`]+`|[\w$]+)(?:\.(?:`[^`]+`|[\w$]+))?"
+TABLE_REFERENCE = re.compile(
+    rf"\b(?:FROM|JOIN|UPDATE|INTO|TABLE|TRUNCATE)\s+({TABLE_NAME}(?:\s*,\s*{TABLE_NAME})*)",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and drop trailing semicolons (literals keep their case)"""
+    return re.sub(r"\s+", " ", sql.strip()).rstrip(";").rstrip()
+
+
+def referenced_tables(sql: str) -> set:
+    """Lower-cased table names after FROM/JOIN/UPDATE/INTO/TABLE/TRUNCATE (db prefixes dropped)"""
+    tables = set()
+    for match in TABLE_REFERENCE.finditer(sql):
+        for name in match.group(1).split(","):
+            name = name.strip().split(".")[-1].strip("`").lower()
+            if name and name not in ("select", "if"):
+                tables.add(name)
+    return tables
+
+
+class ResultCache:
+    """Byte-bounded LRU of encoded read results with per-entry TTL and table-level invalidation.
+
+    Entries are keyed per credential (make_key's scope) but filed under the database they read, so
+    a write through any account clears the reads every account cached from the tables it touched.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, default_ttl=30, max_entry_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(scope: str, sql: str, params: dict) -> str:
+        raw = "\x1f".join([scope, normalize_sql(sql), repr(sorted(params.items()))])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self.bytes -= entry["size"]
+
+    def get(self, key: str):
+        """Return (body, age_seconds) or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires"] <= now:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["body"], now - entry["created"]
+
+    def put(self, key: str, database: str, sql: str, body: bytes, ttl=None):
+        size = len(body)
+        if size > self.max_entry_bytes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {
+                "body": body,
+                "size": size,
+                "database": database,
+                "tables": referenced_tables(sql),
+                "created": now,
+                "expires": now + (ttl if ttl is not None else self.default_ttl),
+            }
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_for_write(self, database: str, sql: str) -> int:
+        """Drop cached reads of this database that touch a table the write statement names.
+
+        A write whose tables cannot be worked out clears the whole database.
+        """
+        written = referenced_tables(sql)
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry["database"] == database and (not written or entry["tables"] & written or not entry["tables"])
+            ]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
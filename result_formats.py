@@ -0,0 +1,275 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import zlib
+
+try:
+    import pyarrow
+except ImportError:  # optional: only needed for format=arrow
+    pyarrow = None
+
+try:
+    import pyarrow.parquet as parquet
+except ImportError:  # optional: only needed for Parquet export
+    parquet = None
+
+try:
+    from pymysql.constants import FIELD_TYPE
+    MYSQL_TYPE_NAMES = {
+        code: name for name, code in vars(FIELD_TYPE).items() if name.isupper() and isinstance(code, int)
+    }
+except ImportError:
+    MYSQL_TYPE_NAMES = {}
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+# ===============================
+# 📦 RESULT ENCODING
+# ===============================
+def json_default(value):
+    """Encode the MySQL types json.dumps does not know, the same way FastAPI's encoder does"""
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> str:
+    return json.dumps(value, default=json_default, separators=(",", ":"))
+
+
+def ndjson_header(columns: list, **extra) -> str:
+    """First NDJSON line: column names once, instead of repeating them as keys in every row"""
+    return dumps({"type": "meta", "columns": columns, **extra}) + "\n"
+
+
+def ndjson_rows(rows) -> str:
+    """One JSON array per row, in column order"""
+    return "".join(dumps(list(row)) + "\n" for row in rows)
+
+
+def ndjson_footer(**extra) -> str:
+    return dumps({"type": "end", **extra}) + "\n"
+
+
+def ndjson_error(message: str) -> str:
+    return dumps({"type": "error", "error": message}) + "\n"
+
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def sse_event(event: str, data) -> str:
+    """One server-sent event with a compact JSON payload"""
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+# ===============================
+# 🧱 COLUMNAR PAYLOAD
+# ===============================
+def column_types(description) -> list:
+    """MySQL type names (DECIMAL, DATETIME, ...) from a DB-API cursor description"""
+    if not description:
+        return []
+    return [MYSQL_TYPE_NAMES.get(col[1]) for col in description]
+
+
+def columnar_payload(columns: list, types: list, batches) -> dict:
+    """{columns, types, data: [[...], ...]} with column names sent once instead of per row"""
+    data = []
+    for rows in batches:
+        data.extend(list(row) for row in rows)
+    return {"columns": columns, "types": types, "data": data, "rowCount": len(data)}
+
+
+# ===============================
+# 🏹 APACHE ARROW IPC STREAM
+# ===============================
+# Stream terminator: continuation marker followed by a zero-length message
+ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def _arrow_type_for_mysql(description_row):
+    name = MYSQL_TYPE_NAMES.get(description_row[1])
+    if name in ("TINY", "SHORT", "LONG", "LONGLONG", "INT24", "YEAR"):
+        return pyarrow.int64()
+    if name in ("FLOAT", "DOUBLE"):
+        return pyarrow.float64()
+    if name in ("DECIMAL", "NEWDECIMAL"):
+        precision, scale = description_row[4], description_row[5]
+        if precision and scale is not None and precision <= 38:
+            return pyarrow.decimal128(precision, scale)
+        return pyarrow.float64()
+    if name in ("DATE", "NEWDATE"):
+        return pyarrow.date32()
+    if name in ("DATETIME", "TIMESTAMP"):
+        return pyarrow.timestamp("us")
+    if name == "TIME":
+        return pyarrow.duration("us")
+    if name in ("VARCHAR", "VAR_STRING", "STRING", "JSON", "ENUM", "SET"):
+        return pyarrow.string()
+    # BLOB-typed columns may hold text or bytes; decide from the data
+    return None
+
+
+def arrow_schema(columns: list, description, first_rows: list, metadata=None):
+    """Arrow schema from the cursor description, inferring anything ambiguous from the first batch"""
+    fields = []
+    for i, name in enumerate(columns):
+        arrow_type = _arrow_type_for_mysql(description[i]) if description else None
+        if arrow_type is None:
+            sample = next((row[i] for row in first_rows if row[i] is not None), None)
+            arrow_type = pyarrow.array([sample]).type if sample is not None else pyarrow.string()
+            if pyarrow.types.is_decimal(arrow_type):
+                arrow_type = pyarrow.float64()
+        fields.append(pyarrow.field(name, arrow_type))
+    return pyarrow.schema(fields, metadata=metadata)
+
+
+def arrow_record_batch(schema, rows: list):
+    """Build one Arrow record batch from row tuples in schema column order"""
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pyarrow.types.is_floating(field.type):
+            # Decimals too wide for decimal128 travel as doubles
+            values = [float(v) if isinstance(v, decimal.Decimal) else v for v in values]
+        arrays.append(pyarrow.array(values, type=field.type))
+    return pyarrow.record_batch(arrays, schema=schema)
+
+
+def arrow_batch(schema, rows: list) -> bytes:
+    """Serialize one batch of rows as an encapsulated Arrow IPC record batch message"""
+    return arrow_record_batch(schema, rows).serialize().to_pybytes()
+
+
+# ===============================
+# 📤 EXPORT ENCODERS (CSV / GZIP CSV / PARQUET)
+# ===============================
+BINARY_TYPE_NAMES = {"TINY_BLOB", "MEDIUM_BLOB", "LONG_BLOB", "BLOB", "BIT", "GEOMETRY"}
+
+
+class CSVEncoder:
+    """RFC 4180 CSV, one chunk per batch; NULL is an empty field and only binary columns are converted"""
+
+    media_type = "text/csv"  # Starlette appends "; charset=utf-8" to text/* types
+    extension = "csv"
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\r\n")
+        self._binary = []
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data.encode("utf-8")
+
+    def start(self, columns: list, description, first_rows: list) -> bytes:
+        names = column_types(description)
+        for i in range(len(columns)):
+            sample = next((row[i] for row in first_rows if row[i] is not None), None)
+            if (names and names[i] in BINARY_TYPE_NAMES) or isinstance(sample, (bytes, bytearray)):
+                self._binary.append(i)
+        self._writer.writerow(columns)
+        return self._take()
+
+    def encode(self, rows) -> bytes:
+        if self._binary:
+            rows = [self._text_row(row) for row in rows]
+        self._writer.writerows(rows)
+        return self._take()
+
+    def _text_row(self, row) -> list:
+        row = list(row)
+        for i in self._binary:
+            if isinstance(row[i], (bytes, bytearray)):
+                row[i] = row[i].decode("utf-8", errors="replace")
+        return row
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class GzipCSVEncoder(CSVEncoder):
+    """CSVEncoder output compressed on the fly into a single gzip member"""
+
+    media_type = "application/gzip"
+    extension = "csv.gz"
+
+    def __init__(self, level=6):
+        super().__init__()
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+
+    def start(self, columns: list, description, first_rows: list) -> bytes:
+        return self._compressor.compress(super().start(columns, description, first_rows))
+
+    def encode(self, rows) -> bytes:
+        return self._compressor.compress(super().encode(rows))
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last take()"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ParquetEncoder:
+    """Parquet with one row group per batch, streamed as each row group is written (needs pyarrow)"""
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, compression="snappy"):
+        self.compression = compression
+        self._sink = _ChunkSink()
+        self._writer = None
+        self._schema = None
+
+    def start(self, columns: list, description, first_rows: list) -> bytes:
+        self._schema = arrow_schema(columns, description, first_rows)
+        self._writer = parquet.ParquetWriter(self._sink, self._schema, compression=self.compression)
+        return self._sink.take()
+
+    def encode(self, rows) -> bytes:
+        self._writer.write_batch(arrow_record_batch(self._schema, rows))
+        return self._sink.take()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
+
+
+EXPORT_ENCODERS = {"csv": CSVEncoder, "csv.gz": GzipCSVEncoder, "parquet": ParquetEncoder}
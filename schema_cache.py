@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+
+# ===============================
+# 📚 SCHEMA INTROSPECTION
+# ===============================
+def introspect_schema_describe(conn) -> list:
+    """Read every table's columns with SHOW TABLES + one DESCRIBE per table (N+1 round trips)"""
+    schema_info = []
+    tables = [row[0] for row in conn.execute(text("SHOW TABLES"))]
+    for table in tables:
+        rows = conn.execute(text(f"DESCRIBE `{table}`")).fetchall()
+        columns = [{"name": row[0], "type": row[1], "nullable": row[2], "key": row[3]} for row in rows]
+        schema_info.append({"table": table, "columns": columns})
+    return schema_info
+
+
+def introspect_schema_bulk(conn) -> list:
+    """Read every table's columns in a single information_schema.COLUMNS query.
+
+    COLUMN_TYPE, IS_NULLABLE and COLUMN_KEY carry exactly what DESCRIBE
+    reports as Type, Null and Key, so the result matches the DESCRIBE loop.
+    """
+    rows = conn.execute(text(
+        "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY "
+        "FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() "
+        "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+    ))
+    schema_info = []
+    current = None
+    for table, name, col_type, nullable, key in rows:
+        if current is None or current["table"] != table:
+            current = {"table": table, "columns": []}
+            schema_info.append(current)
+        current["columns"].append({"name": name, "type": col_type, "nullable": nullable, "key": key})
+    return schema_info
+
+
+def introspect_foreign_keys(conn) -> dict:
+    """Map each table to its outgoing foreign keys from information_schema.KEY_COLUMN_USAGE"""
+    rows = conn.execute(text(
+        "SELECT TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+        "FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL "
+        "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+    ))
+    foreign_keys = {}
+    for table, column, ref_table, ref_column in rows:
+        foreign_keys.setdefault(table, []).append(
+            {"column": column, "ref_table": ref_table, "ref_column": ref_column}
+        )
+    return foreign_keys
+
+
+INTROSPECTION_BACKENDS = {
+    "bulk": introspect_schema_bulk,
+    "describe": introspect_schema_describe,
+}
+
+
+def render_schema_text(schema_info: list) -> str:
+    """Render structured schema as the compact text block sent to the LLM"""
+    schema_parts = []
+    for table in schema_info:
+        columns_info = [f"{col['name']} ({col['type']})" for col in table["columns"]]
+        schema_parts.append(f"Table '{table['table']}': {', '.join(columns_info)}")
+    return "\n".join(schema_parts)
+
+
+def schema_fingerprint(conn) -> tuple:
+    """Staleness probe: table and column counts, newest CREATE_TIME, and checksums of the columns and foreign keys.
+
+    The checksums cover every column's name, position, type, nullability and key, and every
+    foreign key, so a rename, a type change or a new key moves the fingerprint even when the
+    counts stay the same. UPDATE_TIME is deliberately not used because it moves on every data write.
+    """
+    row = conn.execute(text(
+        "SELECT "
+        "(SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()), "
+        "(SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE()), "
+        "(SELECT MAX(CREATE_TIME) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()), "
+        "(SELECT SUM(CRC32(CONCAT_WS('|', TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE, "
+        "IS_NULLABLE, COLUMN_KEY))) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE()), "
+        "(SELECT SUM(CRC32(CONCAT_WS('|', TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME))) "
+        "FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL)"
+    )).fetchone()
+    return tuple(str(value) for value in row)
+
+
+# ===============================
+# 🧠 SCHEMA CACHE
+# ===============================
+class SchemaCache:
+    """Per-database cache of structured schema and rendered schema_text"""
+
+    def __init__(self, ttl=300, max_entries=64, loader=introspect_schema_bulk):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key, engine) -> dict:
+        """Return {schema, schema_text, tables, foreign_keys, fingerprint} for the database behind engine"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["checked_at"] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        with engine.connect() as conn:
+            fingerprint = schema_fingerprint(conn)
+            # Past the TTL: keep the entry if the fingerprint has not moved
+            if entry is not None and fingerprint == entry["fingerprint"]:
+                entry["checked_at"] = now
+                self.revalidations += 1
+                self._store(key, entry)
+                return entry
+            schema_info = self.loader(conn)
+            foreign_keys = introspect_foreign_keys(conn)
+
+        self.misses += 1
+        entry = {
+            "schema": schema_info,
+            "schema_text": render_schema_text(schema_info),
+            "tables": [t["table"] for t in schema_info],
+            "foreign_keys": foreign_keys,
+            "fingerprint": fingerprint,
+            "checked_at": now,
+        }
+        self._store(key, entry)
+        return entry
+
+    def invalidate(self, key) -> bool:
+        """Drop the cached schema for one database"""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+            }
@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+
+from schema_cache import render_schema_text
+
+
+# ===============================
+# ✂️ SCHEMA PRUNING FOR THE LLM PROMPT
+# ===============================
+# Rough characters-per-token ratio for English/SQL identifiers (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+# Table name tokens are repeated so a table-name hit outweighs a single column hit
+TABLE_NAME_WEIGHT = 3
+
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "by", "in", "on", "to", "and", "or", "with", "from",
+    "all", "me", "show", "list", "give", "get", "find", "what", "which", "who", "how",
+    "many", "much", "is", "are", "was", "were", "each", "per", "top", "their", "them",
+    "that", "this", "have", "has", "do", "does", "there", "than", "over", "under",
+}
+
+
+def estimate_tokens(text_value: str) -> int:
+    return (len(text_value) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("es") and token[-3] in "sxz":
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(value: str) -> list:
+    """Split identifiers and prose into stemmed lowercase tokens (snake_case and camelCase aware)"""
+    value = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", value)
+    words = re.split(r"[^A-Za-z0-9]+", value.lower())
+    return [_stem(w) for w in words if w and not w.isdigit() and w not in STOPWORDS]
+
+
+class SchemaIndex:
+    """BM25 index over table and column names of one cached schema"""
+
+    def __init__(self, schema_info: list, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.tables = {t["table"]: t for t in schema_info}
+        self.docs = {}
+        for table in schema_info:
+            terms = tokenize(table["table"]) * TABLE_NAME_WEIGHT
+            for col in table["columns"]:
+                terms.extend(tokenize(col["name"]))
+            self.docs[table["table"]] = Counter(terms)
+        self.avg_len = (sum(sum(d.values()) for d in self.docs.values()) / len(self.docs)) if self.docs else 0
+        df = Counter()
+        for doc in self.docs.values():
+            df.update(doc.keys())
+        n = len(self.docs)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def _term_frequency(self, doc: Counter, term: str) -> float:
+        # Exact hits count fully; compound names like "orderdetails" get half credit
+        tf = doc.get(term, 0)
+        if len(term) >= 4:
+            tf += 0.5 * sum(count for word, count in doc.items() if word != term and term in word)
+        return tf
+
+    def score(self, question: str) -> dict:
+        terms = set(tokenize(question))
+        scores = {}
+        for table, doc in self.docs.items():
+            doc_len = sum(doc.values())
+            total = 0.0
+            for term in terms:
+                tf = self._term_frequency(doc, term)
+                if not tf:
+                    continue
+                idf = self.idf.get(term)
+                if idf is None:
+                    idf = max(self.idf.get(word, 0) for word in doc if term in word)
+                norm = self.k1 * (1 - self.b + self.b * doc_len / (self.avg_len or 1))
+                total += idf * tf * (self.k1 + 1) / (tf + norm)
+            scores[table] = total
+        return scores
+
+
+def _fk_neighbours(table: str, foreign_keys: dict) -> set:
+    neighbours = {fk["ref_table"] for fk in foreign_keys.get(table, [])}
+    for source, fks in foreign_keys.items():
+        if any(fk["ref_table"] == table for fk in fks):
+            neighbours.add(source)
+    return neighbours
+
+
+def _compact_table(table: dict, question_terms: set) -> dict:
+    """Keep key columns plus columns the question mentions"""
+    columns = [
+        col for col in table["columns"]
+        if col["key"] or question_terms.intersection(tokenize(col["name"]))
+    ]
+    return {"table": table["table"], "columns": columns or table["columns"][:1]}
+
+
+def prune_schema(cached_schema: dict, question: str, top_k=8, token_budget=2000) -> tuple:
+    """Select the tables most relevant to question (plus FK neighbours) within a token budget.
+
+    Returns (schema_text, report) where report says how much of the full schema was saved.
+    """
+    full_text = cached_schema["schema_text"]
+    schema_info = cached_schema["schema"]
+    report = {
+        "tables_total": len(schema_info),
+        "tables_sent": len(schema_info),
+        "chars_full": len(full_text),
+        "chars_sent": len(full_text),
+        "chars_saved": 0,
+        "tokens_saved": 0,
+    }
+    if len(schema_info) <= top_k and estimate_tokens(full_text) <= token_budget:
+        return full_text, report
+
+    index = cached_schema.get("prune_index")
+    if index is None:
+        index = cached_schema["prune_index"] = SchemaIndex(schema_info)
+
+    scores = index.score(question)
+    ranked = sorted(scores, key=lambda t: scores[t], reverse=True)
+    selected = [t for t in ranked[:top_k] if scores[t] > 0] or ranked[:top_k]
+
+    # FK neighbours go right after the table that pulled them in, so joins stay possible
+    ordered = []
+    for table in selected:
+        for candidate in [table] + sorted(_fk_neighbours(table, cached_schema.get("foreign_keys", {}))):
+            if candidate not in ordered and candidate in index.tables:
+                ordered.append(candidate)
+
+    question_terms = set(tokenize(question))
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    parts = []
+    used = 0
+    for table in ordered:
+        for variant in (index.tables[table], _compact_table(index.tables[table], question_terms)):
+            rendered = render_schema_text([variant])
+            if not parts or used + len(rendered) + 1 <= budget_chars:
+                parts.append(rendered)
+                used += len(rendered) + 1
+                break
+
+    schema_text = "\n".join(parts)
+    report.update({
+        "tables_sent": len(parts),
+        "chars_sent": len(schema_text),
+        "chars_saved": len(full_text) - len(schema_text),
+        "tokens_saved": estimate_tokens(full_text) - estimate_tokens(schema_text),
+    })
+    return schema_text, report
@@ -0,0 +1,71 @@
+import asyncio
+from collections import defaultdict
+
+from observability import annotate
+
+
+# ===============================
+# 🤝 REQUEST COALESCING (SINGLE-FLIGHT)
+# ===============================
+class Flight:
+    """One in-flight call and the clients waiting on it"""
+
+    def __init__(self):
+        self.clients = []
+        self.task = None
+
+    async def is_disconnected(self) -> bool:
+        """True once every waiting client has gone, so it can stand in for the Request in run_with_deadline"""
+        for client in self.clients:
+            if not await client.is_disconnected():
+                return False
+        return bool(self.clients)
+
+
+class SingleFlight:
+    """Concurrent callers with the same (operation, key) share one execution and all get its result.
+
+    Nothing is cached: the key is forgotten as soon as the call finishes, so the next caller starts
+    fresh. A caller that is cancelled stops waiting without cancelling the shared call.
+    """
+
+    def __init__(self, coalesced_metric=None):
+        self.coalesced_metric = coalesced_metric
+        self._flights = {}
+        self.started = defaultdict(int)
+        self.coalesced = defaultdict(int)
+
+    async def do(self, operation: str, key, start, client=None):
+        """Await start(flight) once for everyone asking for (operation, key) while it runs.
+
+        client (usually the Request) joins the flight's clients, see Flight.is_disconnected.
+        """
+        flight_key = (operation, key)
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = self._flights[flight_key] = Flight()
+            flight.task = asyncio.ensure_future(start(flight))
+            flight.task.add_done_callback(lambda _: self._finish(flight_key, flight))
+            self.started[operation] += 1
+        else:
+            self.coalesced[operation] += 1
+            if self.coalesced_metric is not None:
+                self.coalesced_metric.inc(1, operation)
+            annotate(coalesced=operation)
+        if client is not None:
+            flight.clients.append(client)
+        return await asyncio.shield(flight.task)
+
+    def _finish(self, flight_key, flight):
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+        # Retrieve the outcome so an error nobody is still waiting for is not logged as unhandled
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "started": dict(self.started),
+            "coalesced": dict(self.coalesced),
+        }
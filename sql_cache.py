@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("asklytics")
+
+
+# ===============================
+# 💾 GENERATED SQL CACHE (NL → SQL)
+# ===============================
+def normalize_prompt(prompt: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation so trivial variants share a key"""
+    prompt = re.sub(r"\s+", " ", prompt.strip().lower())
+    return prompt.rstrip(" ?.!;")
+
+
+class SQLiteWriter:
+    """Runs SQLite writes in order on one background thread, so callers on the event loop never wait on disk"""
+
+    def __init__(self, db: sqlite3.Connection, name: str):
+        self._db = db
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def _run(self, statements: list):
+        try:
+            for statement, params in statements:
+                if isinstance(params, list):
+                    self._db.executemany(statement, params)
+                else:
+                    self._db.execute(statement, params)
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning("SQLite write failed: %s", e)
+
+    def submit(self, *statements):
+        """Queue (statement, params) pairs to run in one transaction; a list of params runs executemany"""
+        self._executor.submit(self._run, list(statements))
+
+    def close(self):
+        """Finish the queued writes"""
+        self._executor.shutdown(wait=True)
+
+
+class GeneratedSQLCache:
+    """LRU of generated SQL keyed by (database, normalized prompt, schema fingerprint, model, prompt version).
+
+    When db_path is set, entries are also persisted to SQLite so they survive restarts: writes go
+    through a background thread and the newest max_entries are loaded back at startup, so lookups
+    never touch the disk. Scopes are stored as given, so pass an opaque id (connection_scope), never
+    anything derived from credentials. Seeing a new schema fingerprint for a database drops
+    everything cached for it.
+    """
+
+    def __init__(self, max_entries=1000, db_path=""):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._writer = None
+        if db_path:
+            db = sqlite3.connect(db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS generated_sql ("
+                "cache_key TEXT PRIMARY KEY, scope TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                "sql TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS generated_sql_scope ON generated_sql (scope)")
+            rows = db.execute(
+                "SELECT cache_key, scope, fingerprint, sql, created_at FROM generated_sql "
+                "ORDER BY created_at DESC LIMIT ?", (max_entries,)
+            ).fetchall()
+            for key, scope, fingerprint, sql, created_at in reversed(rows):
+                self._entries[key] = {"scope": scope, "sql": sql, "created_at": created_at}
+                self._fingerprints[scope] = fingerprint
+            self._writer = SQLiteWriter(db, "sql-cache")
+
+    @staticmethod
+    def make_key(scope: str, prompt: str, fingerprint: str, model: str, prompt_version: str) -> str:
+        raw = "\x1f".join([scope, normalize_prompt(prompt), fingerprint, model, prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _drop_scope(self, scope: str):
+        for key in [k for k, e in self._entries.items() if e["scope"] == scope]:
+            del self._entries[key]
+
+    def _check_fingerprint(self, scope: str, fingerprint: str):
+        previous = self._fingerprints.get(scope)
+        self._fingerprints[scope] = fingerprint
+        if previous is None or previous == fingerprint:
+            return
+        self._drop_scope(scope)
+        if self._writer is not None:
+            self._writer.submit(
+                ("DELETE FROM generated_sql WHERE scope = ? AND fingerprint != ?", (scope, fingerprint))
+            )
+        self.invalidations += 1
+
+    def _remember(self, key: str, entry: dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, scope: str, prompt: str, fingerprint: str, model: str, prompt_version: str):
+        """Return the cached SQL string, or None on a miss"""
+        key = self.make_key(scope, prompt, fingerprint, model, prompt_version)
+        with self._lock:
+            self._check_fingerprint(scope, fingerprint)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["sql"]
+
+    def put(self, scope: str, prompt: str, fingerprint: str, model: str, prompt_version: str, sql: str):
+        key = self.make_key(scope, prompt, fingerprint, model, prompt_version)
+        entry = {"scope": scope, "sql": sql, "created_at": time.time()}
+        with self._lock:
+            self._check_fingerprint(scope, fingerprint)
+            self._remember(key, entry)
+        if self._writer is not None:
+            self._writer.submit((
+                "INSERT OR REPLACE INTO generated_sql (cache_key, scope, fingerprint, sql, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, scope, fingerprint, sql, entry["created_at"]),
+            ))
+
+    def invalidate_scope(self, scope: str) -> int:
+        """Forget everything cached for one database, in memory and on disk (after /schema/refresh)"""
+        with self._lock:
+            before = len(self._entries)
+            self._drop_scope(scope)
+            self._fingerprints.pop(scope, None)
+            dropped = before - len(self._entries)
+            self.invalidations += 1
+        if self._writer is not None:
+            self._writer.submit(("DELETE FROM generated_sql WHERE scope = ?", (scope,)))
+        return dropped
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "persistent": self._writer is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
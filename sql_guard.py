@@ -0,0 +1,111 @@
+import re
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from pagination import strip_trailing_comments
+from result_cache import referenced_tables
+from sql_stream import statement_end
+
+try:
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # optional: without it only tables are checked, via regex
+    sqlglot = None
+
+
+# ===============================
+# 🛡️ PRE-EXECUTION SQL VALIDATION
+# ===============================
+CTE_NAME = re.compile(r"(?:\bWITH(?:\s+RECURSIVE)?|,)\s+`?(\w+)`?\s+AS\s*\(", re.IGNORECASE)
+
+
+class SQLValidationError(Exception):
+    """Generated SQL that must not reach the database (message is shown to the user)"""
+
+
+def reject_multiple_statements(sql: str):
+    end = statement_end(sql)
+    # Comments after the terminator are not another statement
+    if end is not None and strip_trailing_comments(sql[end:].strip(" \t\r\n;")).strip(" \t\r\n;"):
+        raise SQLValidationError("Only one SQL statement can be run at a time.")
+
+
+def _schema_columns(schema_info: list) -> dict:
+    return {t["table"].lower(): {c["name"].lower() for c in t["columns"]} for t in schema_info}
+
+
+def _check_tables_regex(sql: str, columns: dict):
+    ctes = {name.lower() for name in CTE_NAME.findall(sql)}
+    for table in referenced_tables(sql) - ctes:
+        if table not in columns:
+            raise SQLValidationError(f"Unknown table '{table}'.")
+
+
+def _check_with_sqlglot(sql: str, columns: dict, database: str):
+    try:
+        statements = [s for s in sqlglot.parse(sql, read="mysql") if s is not None]
+    except sqlglot.errors.ParseError as e:
+        raise SQLValidationError(f"Could not parse the SQL: {str(e).splitlines()[0]}")
+    if len(statements) > 1:
+        raise SQLValidationError("Only one SQL statement can be run at a time.")
+    if not statements or isinstance(statements[0], exp.Show):
+        return
+    tree = statements[0]
+
+    ctes = {cte.alias.lower() for cte in tree.find_all(exp.CTE)}
+    aliases = {}
+    for table in tree.find_all(exp.Table):
+        name = table.name.lower()
+        if table.db and table.db.lower() != database.lower():
+            aliases[table.alias_or_name.lower()] = None  # another database: not ours to check
+            continue
+        if name in ctes:
+            aliases[table.alias_or_name.lower()] = None
+            continue
+        if name not in columns:
+            raise SQLValidationError(f"Unknown table '{table.name}'.")
+        aliases[table.alias_or_name.lower()] = name
+
+    # Column scoping through CTEs and derived tables is left to MySQL
+    derived = any(isinstance(s.this, exp.Select) for s in tree.find_all(exp.Subquery))
+    if ctes or derived or None in aliases.values():
+        return
+    select_aliases = {a.alias.lower() for a in tree.find_all(exp.Alias)}
+    in_scope = [columns[name] for name in aliases.values()]
+    for column in tree.find_all(exp.Column):
+        name = column.name.lower()
+        if not name or isinstance(column.this, exp.Star):
+            continue
+        if column.table:
+            table = aliases.get(column.table.lower())
+            if table is not None and name not in columns[table]:
+                raise SQLValidationError(f"Unknown column '{column.table}.{column.name}'.")
+        elif name not in select_aliases and in_scope and not any(name in cols for cols in in_scope):
+            raise SQLValidationError(f"Unknown column '{column.name}'.")
+
+
+def validate_sql(sql: str, schema_info: list, database: str = ""):
+    """Reject multi-statement payloads and references to tables/columns the cached schema lacks.
+
+    Uses sqlglot when installed; otherwise only table names are checked.
+    """
+    reject_multiple_statements(sql)
+    columns = _schema_columns(schema_info)
+    if sqlglot is None:
+        _check_tables_regex(sql, columns)
+    else:
+        _check_with_sqlglot(sql, columns, database)
+
+
+# ===============================
+# 💸 EXPLAIN COST GUARD
+# ===============================
+def estimate_scanned_rows(engine, sql: str):
+    """Rows MySQL expects to examine: product of EXPLAIN rows within each SELECT, summed across SELECTs"""
+    with engine.connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    per_select = defaultdict(lambda: 1)
+    for row in plan:
+        per_select[row.get("id")] *= max(1, int(row.get("rows") or 1))
+    return sum(per_select.values()) if per_select else None
@@ -0,0 +1,67 @@
+# ===============================
+# ⚡ STREAMED SQL DETECTION
+# ===============================
+FENCE = "```"
+
+
+def statement_end(body: str):
+    """Index of the first ; or closing code fence outside quotes, backticks and comments, else None"""
+    quote = None
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if quote:
+            if ch == "\\" and quote != "`":
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif body.startswith(FENCE, i) or ch == ";":
+            return i
+        elif ch == "#" or (body.startswith("--", i) and body[i + 2:i + 3] in ("", " ", "\t", "\r", "\n")):
+            # An unfinished comment hides everything after it until more text streams in
+            newline = body.find("\n", i)
+            if newline == -1:
+                return None
+            i = newline + 1
+            continue
+        elif body.startswith("/*", i):
+            close = body.find("*/", i + 2)
+            if close == -1:
+                return None
+            i = close + 2
+            continue
+        elif ch in "'\"`":
+            quote = ch
+        i += 1
+    return None
+
+
+class StatementDetector:
+    """Accumulates streamed LLM text and reports the statement the moment it is complete"""
+
+    def __init__(self):
+        self.text = ""
+
+    def _body(self):
+        stripped = self.text.lstrip()
+        if not stripped.startswith(FENCE):
+            return stripped
+        # ```sql\n ... : the statement starts after the fence line
+        newline = stripped.find("\n")
+        return stripped[newline + 1:] if newline != -1 else None
+
+    def feed(self, delta: str):
+        """Add a chunk; returns the raw statement once a terminator has streamed in, else None"""
+        self.text += delta
+        body = self._body()
+        if not body:
+            return None
+        end = statement_end(body)
+        if end is None or not body[:end].strip():
+            return None
+        return body[:end]
+
+    def finish(self) -> str:
+        """Whatever streamed in, for completions that end without a terminator"""
+        return self._body() or self.text
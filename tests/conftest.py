@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend modules live flat at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
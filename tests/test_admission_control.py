@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+from admission_control import (
+    AdmissionController, AdmissionMiddleware, AdmissionRejected, MemoryAdmissionStore, SQLiteAdmissionStore,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryAdmissionStore()
+    return SQLiteAdmissionStore(str(tmp_path / "admission.db"))
+
+
+def test_bucket_admits_the_burst_then_rejects(store):
+    controller = AdmissionController(store, {"llm": (60, 2)}, max_wait=0)
+
+    async def scenario():
+        assert await controller.admit("user:1", "llm") is None
+        assert await controller.admit("user:1", "llm") is None
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit("user:1", "llm")
+        assert rejected.value.scope == "user" and rejected.value.retry_after > 0
+        await controller.admit("user:2", "llm")  # buckets are per identity
+    asyncio.run(scenario())
+    assert controller.rejected == {"user": 1, "connection": 0}
+    stats = controller.stats()
+    assert stats["buckets"] == {"llm": {"per_minute": 60, "burst": 2}}
+    assert stats["tracked_buckets"] == 2
+
+
+def test_costs_above_the_burst_leave_the_bucket_in_debt(store):
+    controller = AdmissionController(store, {"llm": (60, 10)}, max_wait=0)
+
+    async def scenario():
+        await controller.admit("user:1", "llm", cost=100)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.admit("user:1", "llm")
+        # 90 tokens of debt plus the one wanted, refilled at one a second
+        assert rejected.value.retry_after == pytest.approx(91, abs=1)
+    asyncio.run(scenario())
+
+
+def test_connection_slots_are_bounded_and_released(store):
+    controller = AdmissionController(store, {}, connection_limit=1, max_wait=0.2, poll_interval=0.01)
+
+    async def scenario():
+        slot = await controller.admit("user:1", connection="conn-a")
+        with pytest.raises(AdmissionRejected, match="Too many queries"):
+            await controller.admit("user:2", connection="conn-a")
+        other = await controller.admit("user:2", connection="conn-b")
+        waiter = asyncio.ensure_future(controller.admit("user:3", connection="conn-a"))
+        await asyncio.sleep(0.02)
+        await controller.release(slot)
+        await controller.release(await waiter)
+        await controller.release(other)
+    asyncio.run(scenario())
+    assert controller.waited == 1
+    assert controller.stats()["slots_held"] == 0
+
+
+def test_middleware_answers_429_and_replays_the_body():
+    controller = AdmissionController(MemoryAdmissionStore(), {"sql": (60, 1)}, max_wait=0)
+    seen = []
+
+    async def endpoint(scope, receive, send):
+        seen.append(json.loads((await receive())["body"]))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def identify(scope):
+        return "ip:test"
+
+    middleware = AdmissionMiddleware(
+        endpoint, controller, ["/execute-sql"], identify, lambda path, body: ("sql", 1, None),
+    )
+
+    async def post():
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b'{"sql": "SELECT 1"}', "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware({"type": "http", "method": "POST", "path": "/execute-sql"}, receive, send)
+        return sent[0]
+
+    first, second = asyncio.run(post()), asyncio.run(post())
+    assert first["status"] == 200 and seen == [{"sql": "SELECT 1"}]
+    assert second["status"] == 429
+    assert (b"retry-after", b"1") in second["headers"]
@@ -0,0 +1,24 @@
+from engine_registry import EngineRegistry, connection_key, connection_scope
+
+CONN = {"host": "db.internal", "port": 3306, "user": "analyst", "password": "s3cret@#", "database": "sales"}
+
+
+def test_connection_key_and_scope_never_contain_the_password():
+    key = connection_key(CONN)
+    assert "s3cret@#" not in key
+    scope = connection_scope(CONN, "server-secret")
+    assert scope != connection_scope(CONN, "other-secret")
+    assert scope != connection_scope({**CONN, "password": "changed"}, "server-secret")
+    assert "analyst" not in scope and "db.internal" not in scope
+
+
+def test_stats_expose_only_opaque_connection_ids():
+    registry = EngineRegistry(max_size=2)
+    engine = registry.get(CONN)
+    assert registry.get(CONN) is engine
+    stats = registry.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    text = repr(stats)
+    for secret in ("analyst", "db.internal", "sales"):
+        assert secret not in text
+    registry.dispose_all()
@@ -0,0 +1,42 @@
+from example_store import ExampleStore, example_scope
+
+
+def test_scope_ignores_credentials():
+    a = {"host": "db", "port": 3306, "database": "shop", "user": "a", "password": "x"}
+    b = {**a, "user": "b", "password": "y"}
+    assert example_scope(a) == example_scope(b) == "db:3306/shop"
+
+
+def test_search_ranks_similar_questions_first():
+    store = ExampleStore()
+    store.add("s", "Total payments per customer", "SELECT 1")
+    store.add("s", "List all employees", "SELECT 2")
+    store.add("other", "Total payments per customer", "SELECT 3")
+    assert [e["sql"] for e in store.search("s", "payments by customer", 2)] == ["SELECT 1"]
+    assert store.search("s", "weather tomorrow", 2) == []
+
+
+def test_index_follows_adds_replacements_and_evictions():
+    store = ExampleStore(max_per_scope=2)
+    store.add("s", "orders by status", "SELECT 1")
+    assert store.search("s", "orders", 3)[0]["sql"] == "SELECT 1"  # index now built
+    store.add("s", "Orders by status?", "SELECT 2")  # same normalized question: replaced
+    store.add("s", "products in stock", "SELECT 3")
+    store.add("s", "offices by country", "SELECT 4")  # evicts the orders example
+    assert store.search("s", "orders status", 3) == []
+    assert {e["sql"] for e in store.search("s", "products stock offices", 3)} == {"SELECT 3", "SELECT 4"}
+    assert store.stats()["examples"] == 2
+
+
+def test_examples_persist_across_restarts(tmp_path):
+    path = str(tmp_path / "examples.sqlite3")
+    store = ExampleStore(max_per_scope=2, db_path=path)
+    for i, question in enumerate(["orders by status", "products in stock", "offices by country"]):
+        store.add("s", question, f"SELECT {i}")
+    store.close()
+
+    reloaded = ExampleStore(max_per_scope=2, db_path=path)
+    assert reloaded.stats()["examples"] == 2
+    assert reloaded.search("s", "orders", 3) == []
+    assert reloaded.search("s", "offices", 3)[0]["sql"] == "SELECT 2"
+    reloaded.close()
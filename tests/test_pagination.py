@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from pagination import (
+    clamp_limit, decode_page_token, encode_page_token, page_token_key, paginate_sql, strip_trailing_comments,
+)
+
+
+def test_clamp_limit_bounds_and_defaults():
+    assert clamp_limit(None, 1000, 10000) == 1000
+    assert clamp_limit("50", 1000, 10000) == 50
+    assert clamp_limit(99999, 1000, 10000) == 10000
+    assert clamp_limit(0, 1000, 10000) == 1
+    assert clamp_limit("abc", 1000, 10000) == 1000
+
+
+def test_paginate_appends_limit_on_its_own_line():
+    assert paginate_sql("SELECT * FROM customers;", 11, 20) == ("SELECT * FROM customers\nLIMIT 11 OFFSET 20", True)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM customers -- every customer",
+    "SELECT * FROM customers # every customer",
+    "SELECT * FROM customers /* every customer */",
+    "SELECT * FROM customers; -- every customer",
+    "SELECT * FROM customers -- every customer\n;",
+])
+def test_paginate_drops_trailing_comments(sql):
+    paged, rewritten = paginate_sql(sql, 3, 3)
+    assert rewritten
+    assert paged == "SELECT * FROM customers\nLIMIT 3 OFFSET 3"
+
+
+def test_paginate_keeps_user_limit_before_a_comment():
+    paged, rewritten = paginate_sql("SELECT * FROM payments LIMIT 5 -- top five", 3, 3)
+    assert rewritten
+    assert paged == "SELECT * FROM payments\nLIMIT 2 OFFSET 3"
+
+
+def test_paginate_clamps_existing_limit_forms():
+    assert paginate_sql("SELECT 1 FROM t LIMIT 10, 5", 3, 0)[0] == "SELECT 1 FROM t\nLIMIT 3 OFFSET 10"
+    assert paginate_sql("SELECT 1 FROM t LIMIT 5 OFFSET 10", 3, 4)[0] == "SELECT 1 FROM t\nLIMIT 1 OFFSET 14"
+
+
+@pytest.mark.parametrize("sql", ["SHOW TABLES", "UPDATE t SET a = 1", "SELECT * FROM t FOR UPDATE"])
+def test_paginate_leaves_unsafe_statements_alone(sql):
+    assert paginate_sql(sql, 10) == (sql, False)
+
+
+def test_strip_trailing_comments_respects_strings_and_hints():
+    assert strip_trailing_comments("SELECT '--not a comment' -- c") == "SELECT '--not a comment'"
+    assert strip_trailing_comments("SELECT 'a#b', \"it''s\" # c") == "SELECT 'a#b', \"it''s\""
+    assert strip_trailing_comments("SELECT 'x\\' # y' /* c */") == "SELECT 'x\\' # y'"
+    assert strip_trailing_comments("SELECT a--b") == "SELECT a--b"
+    assert strip_trailing_comments("SELECT /*+ MAX_EXECUTION_TIME(100) */ 1") == "SELECT /*+ MAX_EXECUTION_TIME(100) */ 1"
+
+
+def test_page_token_round_trip_and_tampering():
+    token = encode_page_token("secret", "SELECT 1", 20, 10)
+    assert decode_page_token("secret", token) == {"sql": "SELECT 1", "offset": 20, "limit": 10}
+    with pytest.raises(ValueError):
+        decode_page_token("other-secret", token)
+
+
+def test_page_tokens_and_auth_tokens_do_not_cross():
+    expires = datetime.utcnow() + timedelta(minutes=5)
+    auth_token = jwt.encode({"user_id": 1, "email": "a@b.c", "exp": expires}, "secret", algorithm="HS256")
+    with pytest.raises(ValueError, match="Invalid page token"):
+        decode_page_token("secret", auth_token)
+    with pytest.raises(jwt.InvalidSignatureError):
+        jwt.decode(encode_page_token("secret", "SELECT 1", 0, 10), "secret", algorithms=["HS256"])
+
+
+@pytest.mark.parametrize("claims", [
+    {"sql": "SELECT 1", "offset": 0, "limit": 10},
+    {"typ": "page", "offset": 0, "limit": 10},
+    {"typ": "page", "sql": "SELECT 1", "offset": -1, "limit": 10},
+    {"typ": "page", "sql": "SELECT 1", "offset": 0, "limit": "10"},
+])
+def test_page_tokens_missing_claims_are_invalid(claims):
+    claims["exp"] = datetime.utcnow() + timedelta(minutes=5)
+    token = jwt.encode(claims, page_token_key("secret"), algorithm="HS256")
+    with pytest.raises(ValueError, match="Invalid page token"):
+        decode_page_token("secret", token)
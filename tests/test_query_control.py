@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from query_control import QueryCancelled, QueryHandle, add_execution_time_hint, clamp_timeout, kill_engine
+
+
+def test_cancel_before_attach_stops_the_statement_from_starting():
+    engine = create_engine("sqlite://")
+    handle = QueryHandle()
+    handle.cancel(engine, "timeout", 2)  # no thread id yet, so nothing is killed
+    with engine.connect() as conn:
+        with pytest.raises(QueryCancelled, match="2s time limit"):
+            handle.attach(conn)
+
+
+def test_attach_without_cancel_records_no_thread_for_non_mysql_drivers():
+    engine = create_engine("sqlite://")
+    handle = QueryHandle()
+    with engine.connect() as conn:
+        handle.attach(conn)
+    assert handle.thread_id is None and handle.cancelled is None
+
+
+def test_kill_engine_is_unpooled_and_cached_per_engine():
+    engine = create_engine("sqlite://")
+    killer = kill_engine(engine)
+    assert isinstance(killer.pool, NullPool)
+    assert killer is kill_engine(engine)
+    assert kill_engine(create_engine("sqlite://")) is not killer
+
+
+def test_timeout_clamping_and_hint():
+    assert clamp_timeout(None, 30, 300) == 30
+    assert clamp_timeout("bad", 30, 300) == 30
+    assert clamp_timeout(1000, 30, 300) == 300
+    assert add_execution_time_hint("select 1", 1.5) == "SELECT /*+ MAX_EXECUTION_TIME(1500) */ 1"
+    assert add_execution_time_hint("UPDATE t SET a = 1", 1) == "UPDATE t SET a = 1"
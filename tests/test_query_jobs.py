@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+import result_formats
+from query_jobs import JobCancelled, JobManager, JobQueueFull
+
+ROWS = [(1, "a"), (2, "b"), (3, "c")]
+
+
+def run_jobs(manager, scenario):
+    async def main():
+        manager.start()
+        try:
+            return await scenario()
+        finally:
+            await manager.shutdown()
+    return asyncio.run(main())
+
+
+async def wait_finished(manager, job, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job still {job.status}")
+
+
+def spill_rows(manager, rows=ROWS):
+    def write(job):
+        spill = manager.open_spill(job, ["id", "name"], None, rows)
+        try:
+            spill.write(rows)
+            job.rows += len(rows)
+        finally:
+            spill.close()
+
+    async def run(job):
+        await asyncio.to_thread(write, job)
+    return run
+
+
+@pytest.mark.parametrize("spill_format", ["ndjson", "arrow"])
+def test_job_spills_and_pages_its_rows(tmp_path, spill_format):
+    if spill_format == "arrow" and result_formats.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+    manager = JobManager(str(tmp_path), workers=1, spill_format=spill_format)
+
+    async def scenario():
+        job = await wait_finished(manager, manager.submit(spill_rows(manager), "SELECT 1"))
+        assert job.status == "succeeded" and job.rows == 3
+        assert manager.read_page(job, 1, 5) == [[2, "b"], [3, "c"]]
+        body = "".join(c if isinstance(c, str) else c.decode() for c in manager.iter_ndjson(job))
+        assert body.count("\n") == 4  # meta line plus one line per row
+    run_jobs(manager, scenario)
+
+
+def test_cancel_while_resolving_sql_marks_the_job_cancelled(tmp_path):
+    manager = JobManager(str(tmp_path), workers=1)
+
+    async def run(job):
+        try:
+            await job.unless_cancelled(asyncio.sleep(30))
+        except Exception as e:  # a runner's generic handler must not turn this into a failure
+            if isinstance(e, JobCancelled):
+                raise
+            job.fail(str(e))
+
+    async def scenario():
+        job = manager.submit(run)
+        await asyncio.sleep(0.05)
+        assert job.status == "running"
+        assert manager.cancel(job.id)
+        await wait_finished(manager, job)
+        assert job.status == "cancelled" and job.error is None
+        assert not manager.cancel(job.id)
+    run_jobs(manager, scenario)
+
+
+def test_spill_cannot_be_opened_after_cancel(tmp_path):
+    manager = JobManager(str(tmp_path), workers=1)
+
+    async def run(job):
+        job.request_cancel()
+        await spill_rows(manager)(job)
+
+    async def scenario():
+        job = await wait_finished(manager, manager.submit(run))
+        assert job.status == "cancelled"
+        assert list(tmp_path.iterdir()) == []
+    run_jobs(manager, scenario)
+
+
+def test_runner_error_fails_the_job_and_removes_its_file(tmp_path):
+    manager = JobManager(str(tmp_path), workers=1)
+
+    async def run(job):
+        await spill_rows(manager)(job)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        job = await wait_finished(manager, manager.submit(run))
+        assert job.status == "failed" and "boom" in job.error
+        assert list(tmp_path.iterdir()) == []
+    run_jobs(manager, scenario)
+
+
+def test_queue_bound_and_delete(tmp_path):
+    manager = JobManager(str(tmp_path), workers=1, max_queued=1)
+    release = asyncio.Event
+
+    async def scenario():
+        gate = release()
+
+        async def blocked(job):
+            await job.unless_cancelled(gate.wait())
+
+        running = manager.submit(blocked)
+        await asyncio.sleep(0.05)
+        queued = manager.submit(blocked)
+        with pytest.raises(JobQueueFull):
+            manager.submit(blocked)
+        assert manager.delete(queued.id) and manager.get(queued.id) is None
+        gate.set()
+        await wait_finished(manager, running)
+        assert running.status == "succeeded"
+        assert manager.stats()["rejected"] == 1
+    run_jobs(manager, scenario)
+
+
+def test_finished_jobs_expire_after_ttl(tmp_path):
+    manager = JobManager(str(tmp_path), workers=1, ttl=0)
+
+    async def scenario():
+        job = await wait_finished(manager, manager.submit(spill_rows(manager)))
+        assert manager.get(job.id) is None
+        assert list(tmp_path.iterdir()) == []
+    run_jobs(manager, scenario)
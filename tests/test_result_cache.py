@@ -0,0 +1,67 @@
+import time
+
+from engine_registry import connection_key, database_key
+from result_cache import ResultCache, normalize_sql, referenced_tables
+
+
+def test_normalize_and_referenced_tables():
+    assert normalize_sql("  SELECT *\n  FROM t ;; ") == "SELECT * FROM t"
+    assert referenced_tables("SELECT * FROM `sales`.Orders o JOIN customers c ON 1") == {"orders", "customers"}
+    assert referenced_tables("UPDATE products SET a = 1") == {"products"}
+    assert referenced_tables("INSERT INTO a, b SELECT 1") == {"a", "b"}
+
+
+def test_keys_ignore_formatting_but_not_scope_or_params():
+    key = ResultCache.make_key("conn", "SELECT 1;", {"limit": 10})
+    assert key == ResultCache.make_key("conn", "  SELECT   1 ", {"limit": 10})
+    assert key != ResultCache.make_key("other", "SELECT 1", {"limit": 10})
+    assert key != ResultCache.make_key("conn", "SELECT 1", {"limit": 20})
+
+
+def test_get_put_and_ttl():
+    cache = ResultCache(default_ttl=60)
+    cache.put("k", "conn", "SELECT * FROM t", b"body")
+    body, age = cache.get("k")
+    assert body == b"body" and age >= 0
+    cache.put("stale", "conn", "SELECT * FROM t", b"old", ttl=0)
+    time.sleep(0.001)
+    assert cache.get("stale") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_byte_bound_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=10, max_entry_bytes=8)
+    cache.put("too-big", "conn", "SELECT 1", b"123456789")
+    assert cache.get("too-big") is None
+    cache.put("a", "conn", "SELECT 1", b"aaaa")
+    cache.put("b", "conn", "SELECT 1", b"bbbb")
+    cache.get("a")
+    cache.put("c", "conn", "SELECT 1", b"cccc")
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    assert cache.stats()["bytes"] == 8 and cache.stats()["evictions"] == 1
+
+
+def test_writes_invalidate_reads_of_the_tables_they_touch_in_that_database():
+    cache = ResultCache()
+    cache.put("orders", "conn", "SELECT * FROM orders", b"1")
+    cache.put("customers", "conn", "SELECT * FROM customers", b"2")
+    cache.put("unknown", "conn", "SHOW STATUS", b"3")
+    cache.put("other-conn", "other", "SELECT * FROM orders", b"4")
+    assert cache.invalidate_for_write("conn", "DELETE FROM orders WHERE id = 1") == 2
+    assert cache.get("orders") is None and cache.get("unknown") is None
+    assert cache.get("customers") and cache.get("other-conn")
+    assert cache.invalidate_for_write("conn", "CALL refresh()") == 1  # tables unknown: the connection is cleared
+    assert cache.get("customers") is None
+
+
+def test_a_write_through_one_account_clears_reads_cached_by_another():
+    reader = {"host": "DB.internal", "port": 3306, "user": "reporting", "password": "r", "database": "shop"}
+    writer = {**reader, "host": "db.internal", "user": "app", "password": "w"}
+    cache = ResultCache()
+    sql = "SELECT * FROM orders"
+    key = ResultCache.make_key("|".join(connection_key(reader)), sql, {})
+    assert key != ResultCache.make_key("|".join(connection_key(writer)), sql, {})
+    cache.put(key, database_key(reader), sql, b"rows")
+    assert cache.invalidate_for_write(database_key({**writer, "database": "other"}), "DELETE FROM orders") == 0
+    assert cache.invalidate_for_write(database_key(writer), "DELETE FROM orders") == 1
+    assert cache.get(key) is None
@@ -0,0 +1,56 @@
+from schema_cache import render_schema_text
+from schema_pruning import SchemaIndex, estimate_tokens, prune_schema, tokenize
+
+
+def column(name, key=""):
+    return {"name": name, "type": "varchar(50)", "nullable": "YES", "key": key}
+
+
+SCHEMA = [
+    {"table": "customers", "columns": [column("customerNumber", "PRI"), column("customerName"), column("country")]},
+    {"table": "orders", "columns": [column("orderNumber", "PRI"), column("customerNumber", "MUL"), column("status")]},
+    {"table": "orderdetails", "columns": [column("orderNumber", "PRI"), column("productCode", "PRI"), column("quantityOrdered")]},
+    {"table": "products", "columns": [column("productCode", "PRI"), column("productName"), column("buyPrice")]},
+    {"table": "employees", "columns": [column("employeeNumber", "PRI"), column("lastName"), column("jobTitle")]},
+    {"table": "offices", "columns": [column("officeCode", "PRI"), column("city"), column("territory")]},
+]
+FOREIGN_KEYS = {"orders": [{"column": "customerNumber", "ref_table": "customers", "ref_column": "customerNumber"}]}
+
+
+def cached(schema=SCHEMA):
+    return {"schema": schema, "schema_text": render_schema_text(schema), "foreign_keys": FOREIGN_KEYS}
+
+
+def test_tokenize_splits_identifiers_and_stems():
+    assert tokenize("customerNumber") == ["customer", "number"]
+    assert tokenize("Show all the categories per office_code") == ["category", "office", "code"]
+    assert estimate_tokens("abcde") == 2
+
+
+def test_index_ranks_table_name_hits_first():
+    scores = SchemaIndex(SCHEMA).score("List product names")
+    assert max(scores, key=scores.get) == "products"
+    assert scores["offices"] == 0
+
+
+def test_small_schemas_are_sent_whole():
+    text, report = prune_schema(cached(), "anything", top_k=10, token_budget=10_000)
+    assert text == cached()["schema_text"]
+    assert report["chars_saved"] == 0 and report["tables_sent"] == len(SCHEMA)
+
+
+def test_pruning_keeps_relevant_tables_and_their_fk_neighbours():
+    schema = cached()
+    text, report = prune_schema(schema, "orders by status", top_k=1, token_budget=10_000)
+    assert [line.split("'")[1] for line in text.splitlines()] == ["orders", "customers"]
+    assert report["tables_sent"] == 2 and report["chars_saved"] > 0 and report["tokens_saved"] > 0
+    assert isinstance(schema["prune_index"], SchemaIndex)  # built once and kept on the cache entry
+
+
+def test_tables_over_budget_are_compacted_to_keys_and_mentioned_columns():
+    text, report = prune_schema(cached(), "customers by country and orders", top_k=2, token_budget=45)
+    assert text.splitlines() == [
+        "Table 'customers': customerNumber (varchar(50)), customerName (varchar(50)), country (varchar(50))",
+        "Table 'orders': orderNumber (varchar(50)), customerNumber (varchar(50))",
+    ]
+    assert report["chars_sent"] <= 45 * 4
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+class Client:
+    def __init__(self, gone=False):
+        self.gone = gone
+
+    async def is_disconnected(self):
+        return self.gone
+
+
+def test_concurrent_callers_share_one_call_and_later_callers_start_fresh():
+    flights = SingleFlight()
+    calls = []
+
+    async def start(flight):
+        calls.append(flight)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("llm", "q", start) for _ in range(5)))
+        assert results == [1] * 5
+        assert await flights.do("llm", "q", start) == 2
+        assert await flights.do("llm", "other", start) == 3
+    asyncio.run(scenario())
+    assert flights.stats() == {"in_flight": 0, "started": {"llm": 3}, "coalesced": {"llm": 4}}
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def start(flight):
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("schema", 1, start) for _ in range(3)), return_exceptions=True)
+        assert [str(r) for r in results] == ["boom"] * 3
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    flights = SingleFlight()
+
+    async def start(flight):
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("execute", "sql", start))
+        second = asyncio.ensure_future(flights.do("execute", "sql", start))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+    asyncio.run(scenario())
+
+
+def test_flight_is_disconnected_only_once_every_client_has_gone():
+    flights = SingleFlight()
+    seen = []
+
+    async def start(flight):
+        await asyncio.sleep(0.01)
+        seen.append(await flight.is_disconnected())
+        flight.clients[1].gone = True
+        seen.append(await flight.is_disconnected())
+
+    async def scenario():
+        await asyncio.gather(
+            flights.do("execute", "sql", start, client=Client(gone=True)),
+            flights.do("execute", "sql", start, client=Client()),
+        )
+    asyncio.run(scenario())
+    assert seen == [False, True]
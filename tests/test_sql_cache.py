@@ -0,0 +1,51 @@
+import sqlite3
+
+from engine_registry import connection_scope
+from sql_cache import GeneratedSQLCache, normalize_prompt
+
+CONN = {"host": "db", "port": 3306, "user": "app", "password": "hunter2", "database": "shop"}
+ARGS = ("fp1", "model", "v1")
+
+
+def test_normalize_prompt_merges_trivial_variants():
+    assert normalize_prompt("  Show   ALL customers?? ") == normalize_prompt("show all customers")
+
+
+def test_new_fingerprint_drops_the_scope():
+    cache = GeneratedSQLCache()
+    cache.put("s", "q", *ARGS, "SELECT 1")
+    assert cache.get("s", "Q?", *ARGS) == "SELECT 1"
+    assert cache.get("s", "q", "fp2", "model", "v1") is None
+    assert cache.get("s", "q", *ARGS) is None
+
+
+def test_persisted_entries_reload_and_invalidate(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = GeneratedSQLCache(db_path=path)
+    cache.put("a", "q", *ARGS, "SELECT 1")
+    cache.put("b", "q", *ARGS, "SELECT 2")
+    cache.close()
+
+    reloaded = GeneratedSQLCache(db_path=path)
+    assert reloaded.get("a", "q", *ARGS) == "SELECT 1"
+    assert reloaded.invalidate_scope("a") == 1
+    assert reloaded.get("a", "q", *ARGS) is None
+    reloaded.close()
+
+    again = GeneratedSQLCache(db_path=path)
+    assert again.get("a", "q", *ARGS) is None
+    assert again.get("b", "q", *ARGS) == "SELECT 2"
+    again.close()
+
+
+def test_scope_on_disk_is_opaque(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = GeneratedSQLCache(db_path=path)
+    scope = connection_scope(CONN, "server-secret")
+    cache.put(scope, "q", *ARGS, "SELECT 1")
+    cache.close()
+
+    scopes = [row[0] for row in sqlite3.connect(path).execute("SELECT scope FROM generated_sql")]
+    assert scopes == [scope]
+    assert "|" not in scope and "hunter2" not in scope
+    assert connection_scope(CONN, "other-secret") != scope
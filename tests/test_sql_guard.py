@@ -0,0 +1,58 @@
+import pytest
+
+import sql_guard
+from sql_guard import SQLValidationError, reject_multiple_statements, validate_sql
+
+SCHEMA = [
+    {"table": "customers", "columns": [{"name": "customerNumber"}, {"name": "customerName"}, {"name": "country"}]},
+    {"table": "orders", "columns": [{"name": "orderNumber"}, {"name": "customerNumber"}, {"name": "status"}]},
+]
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1",
+    "SELECT 1;",
+    "SELECT 1;;\n",
+    "SELECT 1; -- trailing note",
+    "SELECT 1; /* done */",
+    "SELECT 1; # done",
+    "SELECT 1 -- no; not a terminator\nFROM dual",
+    "SELECT 1 /* a; b */ FROM dual",
+    "SELECT 1 # x; y\nFROM dual",
+    "SELECT ';' AS semi, `a;b` FROM t",
+    "SELECT 'it\\'s; fine'",
+])
+def test_single_statements_pass(sql):
+    reject_multiple_statements(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; DROP TABLE customers",
+    "SELECT 1; -- note\nDELETE FROM orders",
+    "SELECT 1 -- note\n; DELETE FROM orders",
+    "SELECT 1; /*! DROP TABLE customers */",
+])
+def test_second_statements_are_rejected(sql):
+    with pytest.raises(SQLValidationError, match="one SQL statement"):
+        reject_multiple_statements(sql)
+
+
+def test_unknown_tables_are_rejected_without_sqlglot(monkeypatch):
+    monkeypatch.setattr(sql_guard, "sqlglot", None)
+    validate_sql("SELECT * FROM customers JOIN orders USING (customerNumber)", SCHEMA)
+    validate_sql("WITH recent AS (SELECT * FROM orders) SELECT * FROM recent", SCHEMA)
+    with pytest.raises(SQLValidationError, match="Unknown table 'payments'"):
+        validate_sql("SELECT * FROM payments", SCHEMA)
+
+
+def test_unknown_columns_are_rejected_with_sqlglot():
+    pytest.importorskip("sqlglot")
+    validate_sql("SELECT c.customerName, COUNT(*) AS n FROM customers c JOIN orders o "
+                 "ON o.customerNumber = c.customerNumber GROUP BY c.customerName ORDER BY n", SCHEMA)
+    validate_sql("SELECT * FROM other_db.anything", SCHEMA, database="sales")
+    with pytest.raises(SQLValidationError, match="Unknown column 'c.city'"):
+        validate_sql("SELECT c.city FROM customers c", SCHEMA)
+    with pytest.raises(SQLValidationError, match="Unknown column 'total'"):
+        validate_sql("SELECT total FROM orders", SCHEMA)
+    with pytest.raises(SQLValidationError, match="Unknown table 'payments'"):
+        validate_sql("SELECT amount FROM payments", SCHEMA)
@@ -0,0 +1,29 @@
+from sql_stream import StatementDetector, statement_end
+
+
+def feed_all(chunks):
+    detector = StatementDetector()
+    for chunk in chunks:
+        statement = detector.feed(chunk)
+        if statement is not None:
+            return statement
+    return None
+
+
+def test_statement_end_skips_quotes_and_comments():
+    assert statement_end("SELECT 1; SELECT 2") == 8
+    assert statement_end("SELECT ';' -- x;\n/* y; */ # z;\nFROM t;") == len("SELECT ';' -- x;\n/* y; */ # z;\nFROM t")
+    assert statement_end("SELECT 1 -- still streaming;") is None
+    assert statement_end("SELECT 1 /* unfinished;") is None
+
+
+def test_detector_waits_out_comments_split_across_chunks():
+    chunks = ["```sql\nSELECT name -", "- top; customers\n", "FROM customers /* by", " name; */ ORDER BY 1;", " extra"]
+    assert feed_all(chunks) == "SELECT name -- top; customers\nFROM customers /* by name; */ ORDER BY 1"
+
+
+def test_detector_stops_at_closing_fence_and_finish_returns_the_rest():
+    assert feed_all(["```sql\nSELECT 1\n", "```\nThat query counts."]) == "SELECT 1\n"
+    detector = StatementDetector()
+    assert detector.feed("SELECT 2") is None
+    assert detector.finish() == "SELECT 2"